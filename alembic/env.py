@@ -0,0 +1,54 @@
+"""
+Alembic environment for Regisbridge College Management System
+
+Uses the same DATABASE_URL as the API (api/database.py) and the model
+metadata from models/models.py.
+"""
+
+from logging.config import fileConfig
+
+from alembic import context
+from decouple import config as env_config
+from sqlalchemy import engine_from_config, pool
+
+from models.models import Base
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+config.set_main_option(
+    "sqlalchemy.url",
+    env_config("DATABASE_URL", default="sqlite:///../db.sqlite3").replace("%", "%%")
+)
+
+target_metadata = Base.metadata
+
+def run_migrations_offline() -> None:
+    """Emit SQL to stdout instead of connecting (``alembic upgrade head --sql``)"""
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url"),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online() -> None:
+    """Run migrations against the configured database"""
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+    with connectable.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
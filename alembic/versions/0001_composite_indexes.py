@@ -0,0 +1,51 @@
+"""Composite indexes for the hot list, report and lookup queries
+
+Revision ID: 0001_composite_indexes
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+Mirrors the ``Index`` declarations in ``models/*.py``. Tables created by
+``create_tables()`` already have them, so every statement is IF NOT EXISTS.
+On PostgreSQL the indexes are built CONCURRENTLY so large tables such as
+attendance_records stay writable during the migration.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001_composite_indexes'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_attendance_records_student_session", "attendance_records", ["student_id", "session_id"]),
+    ("ix_attendance_records_session_status", "attendance_records", ["session_id", "status"]),
+    ("ix_attendance_sessions_classroom_date", "attendance_sessions", ["classroom_id", "date"]),
+    ("ix_grades_student_assessment", "grades", ["student_id", "assessment_id"]),
+    ("ix_grades_assessment", "grades", ["assessment_id"]),
+    ("ix_invoices_status_due_date", "invoices", ["status", "due_date"]),
+    ("ix_invoices_student_status", "invoices", ["student_id", "status"]),
+    ("ix_notifications_user_read_created", "notifications", ["user_id", "is_read", "created_at"]),
+    ("ix_messages_thread_created", "messages", ["thread_id", "created_at"]),
+    ("ix_blog_posts_status_published", "blog_posts", ["status", "published_at"]),
+    ("ix_student_profiles_classroom", "student_profiles", ["classroom_id"]),
+    ("ix_student_profiles_grade_level", "student_profiles", ["grade_level_id"]),
+    ("ix_payments_invoice", "payments", ["invoice_id"]),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
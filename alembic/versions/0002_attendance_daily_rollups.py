@@ -0,0 +1,52 @@
+"""Attendance rollup table
+
+Revision ID: 0002_attendance_daily_rollups
+Revises: 0001_composite_indexes
+Create Date: 2026-10-17 00:00:00
+
+Per student, classroom and day attendance counts maintained by the
+attendance record handlers. Populate it after upgrading with
+``python rebuild_attendance_rollup.py``.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_attendance_daily_rollups'
+down_revision: Union[str, None] = '0001_composite_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # create_tables() may already have made it from the model
+    if sa.inspect(op.get_bind()).has_table('attendance_daily_rollups'):
+        return
+    op.create_table(
+        'attendance_daily_rollups',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('student_id', sa.Integer(), sa.ForeignKey('student_profiles.id'), nullable=False),
+        sa.Column('classroom_id', sa.Integer(), sa.ForeignKey('classrooms.id'), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('present', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('absent', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('late', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('excused', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint('student_id', 'classroom_id', 'date', name='uq_attendance_daily_rollups_student_classroom_date'),
+    )
+    op.create_index('ix_attendance_daily_rollups_id', 'attendance_daily_rollups', ['id'])
+    op.create_index('ix_attendance_daily_rollups_classroom_date', 'attendance_daily_rollups', ['classroom_id', 'date'])
+    op.create_index('ix_attendance_daily_rollups_date', 'attendance_daily_rollups', ['date'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_attendance_daily_rollups_date', table_name='attendance_daily_rollups')
+    op.drop_index('ix_attendance_daily_rollups_classroom_date', table_name='attendance_daily_rollups')
+    op.drop_index('ix_attendance_daily_rollups_id', table_name='attendance_daily_rollups')
+    op.drop_table('attendance_daily_rollups')
@@ -0,0 +1,41 @@
+"""Covering date index on the attendance rollup
+
+Revision ID: 0003_rollup_date_counts_index
+Revises: 0002_attendance_daily_rollups
+Create Date: 2026-10-17 00:00:00
+
+Replaces the plain date index with one on (date, counts) so the dashboard's
+today / this week / this term totals are read from the index alone instead
+of visiting a table row per student per day.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_rollup_date_counts_index'
+down_revision: Union[str, None] = '0002_attendance_daily_rollups'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNT_COLUMNS = ['present', 'absent', 'late', 'excused', 'total']
+
+
+def _indexes() -> set:
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('attendance_daily_rollups')}
+
+
+def upgrade() -> None:
+    # create_tables() may already have made it from the model
+    indexes = _indexes()
+    if 'ix_attendance_daily_rollups_date_counts' not in indexes:
+        op.create_index('ix_attendance_daily_rollups_date_counts', 'attendance_daily_rollups', ['date'] + COUNT_COLUMNS)
+    if 'ix_attendance_daily_rollups_date' in indexes:
+        op.drop_index('ix_attendance_daily_rollups_date', table_name='attendance_daily_rollups')
+
+
+def downgrade() -> None:
+    op.create_index('ix_attendance_daily_rollups_date', 'attendance_daily_rollups', ['date'])
+    op.drop_index('ix_attendance_daily_rollups_date_counts', table_name='attendance_daily_rollups')
@@ -0,0 +1,80 @@
+"""Full-text index on blog posts
+
+Revision ID: 0004_blog_posts_full_text
+Revises: 0003_rollup_date_counts_index
+Create Date: 2026-10-17 00:00:00
+
+Blog search reads a full-text index instead of scanning every post with
+ILIKE: on SQLite an external-content FTS5 table kept in step by triggers,
+on PostgreSQL a generated tsvector column with a GIN index. Existing posts
+are indexed by the upgrade itself.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_blog_posts_full_text'
+down_revision: Union[str, None] = '0003_rollup_date_counts_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE blog_posts_fts USING fts5("
+    "title, excerpt, content, content='blog_posts', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER blog_posts_fts_insert AFTER INSERT ON blog_posts BEGIN "
+    "INSERT INTO blog_posts_fts(rowid, title, excerpt, content) VALUES (new.id, new.title, new.excerpt, new.content); "
+    "END",
+    "CREATE TRIGGER blog_posts_fts_delete AFTER DELETE ON blog_posts BEGIN "
+    "INSERT INTO blog_posts_fts(blog_posts_fts, rowid, title, excerpt, content) "
+    "VALUES ('delete', old.id, old.title, old.excerpt, old.content); "
+    "END",
+    "CREATE TRIGGER blog_posts_fts_update AFTER UPDATE OF title, excerpt, content ON blog_posts BEGIN "
+    "INSERT INTO blog_posts_fts(blog_posts_fts, rowid, title, excerpt, content) "
+    "VALUES ('delete', old.id, old.title, old.excerpt, old.content); "
+    "INSERT INTO blog_posts_fts(rowid, title, excerpt, content) VALUES (new.id, new.title, new.excerpt, new.content); "
+    "END",
+    # Index the posts that already exist
+    "INSERT INTO blog_posts_fts(blog_posts_fts) VALUES ('rebuild')",
+]
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS blog_posts_fts_update",
+    "DROP TRIGGER IF EXISTS blog_posts_fts_delete",
+    "DROP TRIGGER IF EXISTS blog_posts_fts_insert",
+    "DROP TABLE IF EXISTS blog_posts_fts",
+]
+
+POSTGRESQL_UPGRADE = [
+    "ALTER TABLE blog_posts ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(excerpt, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(content, '')), 'C')) STORED",
+    "CREATE INDEX ix_blog_posts_search_vector ON blog_posts USING GIN (search_vector)",
+]
+POSTGRESQL_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_blog_posts_search_vector",
+    "ALTER TABLE blog_posts DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    # create_tables() may already have made it along with blog_posts
+    if bind.dialect.name == 'sqlite' and not inspector.has_table('blog_posts_fts'):
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+    elif bind.dialect.name == 'postgresql':
+        columns = {column['name'] for column in inspector.get_columns('blog_posts')}
+        if 'search_vector' not in columns:
+            for statement in POSTGRESQL_UPGRADE:
+                op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    for statement in {'sqlite': SQLITE_DOWNGRADE, 'postgresql': POSTGRESQL_DOWNGRADE}.get(dialect, []):
+        op.execute(statement)
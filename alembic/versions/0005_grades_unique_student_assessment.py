@@ -0,0 +1,48 @@
+"""Unique grade per student and assessment
+
+Revision ID: 0005_grades_unique_student
+Revises: 0004_blog_posts_full_text
+Create Date: 2026-10-17 00:00:00
+
+Makes ix_grades_student_assessment unique so two imports (or an import and
+a single grade entry) running at once cannot both insert the same grade;
+the grade import upserts against it with ON CONFLICT DO UPDATE. Duplicates
+already in the table are removed first, keeping the most recent grade.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005_grades_unique_student'
+down_revision: Union[str, None] = '0004_blog_posts_full_text'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _index() -> Union[dict, None]:
+    for index in sa.inspect(op.get_bind()).get_indexes('grades'):
+        if index['name'] == 'ix_grades_student_assessment':
+            return index
+    return None
+
+
+def upgrade() -> None:
+    # create_tables() may already have made it unique from the model
+    index = _index()
+    if index is not None and index['unique']:
+        return
+    op.execute(
+        "DELETE FROM grades WHERE id NOT IN "
+        "(SELECT MAX(id) FROM grades GROUP BY student_id, assessment_id)"
+    )
+    if index is not None:
+        op.drop_index('ix_grades_student_assessment', table_name='grades')
+    op.create_index('ix_grades_student_assessment', 'grades', ['student_id', 'assessment_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_grades_student_assessment', table_name='grades')
+    op.create_index('ix_grades_student_assessment', 'grades', ['student_id', 'assessment_id'])
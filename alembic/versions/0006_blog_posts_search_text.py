@@ -0,0 +1,114 @@
+"""Index blog post text without its HTML
+
+Revision ID: 0006_blog_posts_search_text
+Revises: 0005_grades_unique_student
+Create Date: 2026-10-17 00:00:00
+
+Post content is HTML, and 0004 indexed it as is, so tag and attribute
+names matched searches and snippets cut through markup. Adds
+blog_posts.search_text (the content with its tags stripped, kept in step by
+the model), fills it for existing posts and rebuilds the full-text index
+(SQLite FTS5 table and triggers, PostgreSQL generated tsvector) over it.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from models.blog import html_to_text
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006_blog_posts_search_text'
+down_revision: Union[str, None] = '0005_grades_unique_student'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+
+def _sqlite_index(column: str) -> list:
+    return [
+        "CREATE VIRTUAL TABLE blog_posts_fts USING fts5("
+        f"title, excerpt, {column}, content='blog_posts', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        "CREATE TRIGGER blog_posts_fts_insert AFTER INSERT ON blog_posts BEGIN "
+        f"INSERT INTO blog_posts_fts(rowid, title, excerpt, {column}) VALUES (new.id, new.title, new.excerpt, new.{column}); "
+        "END",
+        "CREATE TRIGGER blog_posts_fts_delete AFTER DELETE ON blog_posts BEGIN "
+        f"INSERT INTO blog_posts_fts(blog_posts_fts, rowid, title, excerpt, {column}) "
+        f"VALUES ('delete', old.id, old.title, old.excerpt, old.{column}); "
+        "END",
+        f"CREATE TRIGGER blog_posts_fts_update AFTER UPDATE OF title, excerpt, {column} ON blog_posts BEGIN "
+        f"INSERT INTO blog_posts_fts(blog_posts_fts, rowid, title, excerpt, {column}) "
+        f"VALUES ('delete', old.id, old.title, old.excerpt, old.{column}); "
+        f"INSERT INTO blog_posts_fts(rowid, title, excerpt, {column}) VALUES (new.id, new.title, new.excerpt, new.{column}); "
+        "END",
+        "INSERT INTO blog_posts_fts(blog_posts_fts) VALUES ('rebuild')",
+    ]
+
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS blog_posts_fts_update",
+    "DROP TRIGGER IF EXISTS blog_posts_fts_delete",
+    "DROP TRIGGER IF EXISTS blog_posts_fts_insert",
+    "DROP TABLE IF EXISTS blog_posts_fts",
+]
+
+
+def _postgresql_index(column: str) -> list:
+    return [
+        "ALTER TABLE blog_posts ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(excerpt, '')), 'B') || "
+        f"setweight(to_tsvector('simple', coalesce({column}, '')), 'C')) STORED",
+        "CREATE INDEX ix_blog_posts_search_vector ON blog_posts USING GIN (search_vector)",
+    ]
+
+
+POSTGRESQL_DROP = [
+    "DROP INDEX IF EXISTS ix_blog_posts_search_vector",
+    "ALTER TABLE blog_posts DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _fill_search_text() -> None:
+    bind = op.get_bind()
+    posts = sa.table('blog_posts', sa.column('id', sa.Integer), sa.column('content', sa.Text), sa.column('search_text', sa.Text))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(posts.c.id, posts.c.content).where(posts.c.id > last_id).order_by(posts.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            posts.update().where(posts.c.id == sa.bindparam('post_id')).values(search_text=sa.bindparam('text')),
+            [{'post_id': post_id, 'text': html_to_text(content)} for post_id, content in rows]
+        )
+        last_id = rows[-1][0]
+
+
+def _reindex(column: str) -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_DROP + _sqlite_index(column):
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        for statement in POSTGRESQL_DROP + _postgresql_index(column):
+            op.execute(statement)
+
+
+def upgrade() -> None:
+    # create_tables() may already have made the column and the index from the model
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('blog_posts')}
+    if 'search_text' in columns:
+        return
+    op.add_column('blog_posts', sa.Column('search_text', sa.Text(), nullable=True))
+    _fill_search_text()
+    _reindex('search_text')
+
+
+def downgrade() -> None:
+    _reindex('content')
+    op.drop_column('blog_posts', 'search_text')
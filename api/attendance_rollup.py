@@ -0,0 +1,232 @@
+"""
+Attendance rollup maintenance and queries
+
+``attendance_daily_rollups`` holds one row per (student, classroom, day)
+with a count column per status. The record handlers adjust it in the same
+transaction as the record itself, so every statistic that used to scan
+``attendance_records`` (dashboard, mobile, report cards, class reports)
+sums a handful of rollup rows instead.
+
+If the table is ever out of step (bulk imports, manual SQL), rebuild it:
+
+    python rebuild_attendance_rollup.py
+"""
+
+from datetime import date, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models.models import AttendanceDailyRollup, AttendanceRecord, AttendanceSession, AttendanceStatus
+
+# Rollup column for each status
+STATUS_COLUMNS = {
+    AttendanceStatus.PRESENT: "present",
+    AttendanceStatus.ABSENT: "absent",
+    AttendanceStatus.LATE: "late",
+    AttendanceStatus.EXCUSED: "excused",
+}
+COUNT_COLUMNS = list(STATUS_COLUMNS.values()) + ["total"]
+
+def status_column(status) -> str:
+    return STATUS_COLUMNS[AttendanceStatus(status)]
+
+def adjust_rollup(db: Session, student_id: int, classroom_id: int, day: date, changes: Dict[str, int]) -> None:
+    """
+    Add ``changes`` ({column: delta}) to one rollup row inside the caller's
+    transaction. Pure additions upsert the row; anything that removes a
+    count updates the existing row only.
+    """
+    table = AttendanceDailyRollup.__table__
+    key = {"student_id": student_id, "classroom_id": classroom_id, "date": day}
+    increments = {column: table.c[column] + delta for column, delta in changes.items() if delta}
+    if not increments:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if all(delta >= 0 for delta in changes.values()) and dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        values = {column: changes.get(column, 0) for column in COUNT_COLUMNS}
+        statement = insert(table).values(**key, **values).on_conflict_do_update(
+            index_elements=["student_id", "classroom_id", "date"],
+            set_={**increments, "updated_at": func.now()}
+        )
+        db.execute(statement)
+        return
+
+    result = db.execute(
+        update(table)
+        .where(*(table.c[column] == value for column, value in key.items()))
+        .values(**increments, updated_at=func.now())
+    )
+    if result.rowcount == 0 and all(delta >= 0 for delta in changes.values()):
+        db.execute(table.insert().values(
+            **key, **{column: changes.get(column, 0) for column in COUNT_COLUMNS}
+        ))
+
+def apply_rollup_changes(db: Session, classroom_id: int, day: date, changes: Dict[int, Dict[str, int]]) -> None:
+    """
+    ``adjust_rollup`` for many students of one session at once
+    ({student_id: {column: delta}}): one executemany upsert for students
+    whose counts only grow and one executemany update for the rest.
+    """
+    table = AttendanceDailyRollup.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect not in ("postgresql", "sqlite"):
+        for student_id, deltas in changes.items():
+            adjust_rollup(db, student_id, classroom_id, day, deltas)
+        return
+    
+    additions, moves = [], []
+    for student_id, deltas in changes.items():
+        if not any(deltas.values()):
+            continue
+        params = {"b_student_id": student_id, "b_classroom_id": classroom_id, "b_date": day}
+        params.update({f"d_{column}": deltas.get(column, 0) for column in COUNT_COLUMNS})
+        if all(delta >= 0 for delta in deltas.values()):
+            additions.append(params)
+        else:
+            moves.append(params)
+    
+    if additions:
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = insert(table).values(
+            student_id=bindparam("b_student_id"),
+            classroom_id=bindparam("b_classroom_id"),
+            date=bindparam("b_date"),
+            **{column: bindparam(f"d_{column}") for column in COUNT_COLUMNS}
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=["student_id", "classroom_id", "date"],
+            set_={
+                **{column: table.c[column] + statement.excluded[column] for column in COUNT_COLUMNS},
+                "updated_at": func.now()
+            }
+        )
+        db.execute(statement, additions)
+    
+    if moves:
+        db.execute(
+            update(table).where(
+                table.c.student_id == bindparam("b_student_id"),
+                table.c.classroom_id == bindparam("b_classroom_id"),
+                table.c.date == bindparam("b_date")
+            ).values(
+                **{column: table.c[column] + bindparam(f"d_{column}") for column in COUNT_COLUMNS},
+                updated_at=func.now()
+            ),
+            moves
+        )
+
+def rollup_record_added(db: Session, record: AttendanceRecord, session: AttendanceSession) -> None:
+    """Count a new record"""
+    adjust_rollup(db, record.student_id, session.classroom_id, session.date, {
+        status_column(record.status): 1, "total": 1
+    })
+
+def rollup_record_removed(db: Session, record: AttendanceRecord, session: AttendanceSession) -> None:
+    """Uncount a deleted record"""
+    adjust_rollup(db, record.student_id, session.classroom_id, session.date, {
+        status_column(record.status): -1, "total": -1
+    })
+
+def rollup_status_changed(db: Session, record: AttendanceRecord, session: AttendanceSession, old_status) -> None:
+    """Move a record's count from its old status to its new one"""
+    old_column, new_column = status_column(old_status), status_column(record.status)
+    if old_column != new_column:
+        adjust_rollup(db, record.student_id, session.classroom_id, session.date, {
+            old_column: -1, new_column: 1
+        })
+
+def rebuild_attendance_rollup(db: Session) -> int:
+    """Recompute the whole rollup from attendance_records in one INSERT ... SELECT; returns rows written"""
+    table = AttendanceDailyRollup.__table__
+    counts = [
+        func.count().filter(AttendanceRecord.status == status).label(column)
+        for status, column in STATUS_COLUMNS.items()
+    ]
+    source = select(
+        AttendanceRecord.student_id,
+        AttendanceSession.classroom_id,
+        AttendanceSession.date,
+        *counts,
+        func.count().label("total")
+    ).join(
+        AttendanceSession, AttendanceSession.id == AttendanceRecord.session_id
+    ).group_by(AttendanceRecord.student_id, AttendanceSession.classroom_id, AttendanceSession.date)
+
+    db.execute(table.delete())
+    db.execute(table.insert().from_select(
+        ["student_id", "classroom_id", "date"] + COUNT_COLUMNS, source
+    ))
+    db.commit()
+    return db.query(func.count(AttendanceDailyRollup.id)).scalar()
+
+def rollup_sums():
+    """SUM() of every count column, labelled by column name, for use in a grouped query"""
+    return [func.coalesce(func.sum(getattr(AttendanceDailyRollup, column)), 0).label(column) for column in COUNT_COLUMNS]
+
+def student_attendance_totals(
+    db: Session,
+    student_ids: Iterable[int],
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> Dict[int, Dict[str, int]]:
+    """{student_id: {present, absent, late, excused, total}} from the rollup, optionally for a date range"""
+    query = db.query(AttendanceDailyRollup.student_id, *rollup_sums()).filter(
+        AttendanceDailyRollup.student_id.in_(list(student_ids))
+    )
+    if start_date is not None:
+        query = query.filter(AttendanceDailyRollup.date >= start_date)
+    if end_date is not None:
+        query = query.filter(AttendanceDailyRollup.date <= end_date)
+    return {
+        row.student_id: {column: getattr(row, column) for column in COUNT_COLUMNS}
+        for row in query.group_by(AttendanceDailyRollup.student_id)
+    }
+
+def attendance_windows(today: date, term_start: Optional[date] = None, term_end: Optional[date] = None) -> Dict[str, Tuple[date, date]]:
+    """{name: (first day, last day)} for today, this week (from Monday) and, given its dates, this term"""
+    windows = {
+        "today": (today, today),
+        "this_week": (today - timedelta(days=today.weekday()), today),
+    }
+    if term_start is not None and term_end is not None:
+        windows["this_term"] = (term_start, min(term_end, today))
+    return windows
+
+def windowed_attendance_statement(windows: Dict[str, Tuple[date, date]]):
+    """
+    One row with a SUM per window and count column (labelled
+    ``<window>__<column>``). The rollup rows between the earliest start and
+    the latest end are first summed per day, straight off the covering date
+    index; the per-window FILTERs then only see one row per day.
+    """
+    daily = select(
+        AttendanceDailyRollup.date,
+        *(func.sum(getattr(AttendanceDailyRollup, column)).label(column) for column in COUNT_COLUMNS)
+    ).where(
+        AttendanceDailyRollup.date >= min(start for start, _ in windows.values()),
+        AttendanceDailyRollup.date <= max(end for _, end in windows.values())
+    ).group_by(AttendanceDailyRollup.date).subquery()
+
+    columns = []
+    for name, (start, end) in windows.items():
+        in_window = and_(daily.c.date >= start, daily.c.date <= end)
+        columns.extend(
+            func.coalesce(func.sum(daily.c[column]).filter(in_window), 0).label(f"{name}__{column}")
+            for column in COUNT_COLUMNS
+        )
+    return select(*columns)
+
+def windowed_attendance_totals(db: Session, windows: Dict[str, Tuple[date, date]]) -> Dict[str, Dict[str, int]]:
+    """{window: {present, absent, late, excused, total}} for several date windows in one statement"""
+    if not windows:
+        return {}
+    row = db.execute(windowed_attendance_statement(windows)).one()
+    return {
+        name: {column: getattr(row, f"{name}__{column}") for column in COUNT_COLUMNS}
+        for name in windows
+    }
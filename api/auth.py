@@ -3,34 +3,71 @@ Authentication and authorization for FastAPI
 """
 
 import os
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from models.models import User
-from api.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from models.models import User, UserRole
+from api.database import get_db, get_async_db
+from api.cache import TagVersions, TTLCache
+from api.http_cache import RESPONSE_CACHE_TAG_DIR
+from api.security import verify_password, get_password_hash, password_hasher
 
 # Security configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "django-insecure-=9$v7@=1l6$w_gp=o&atuj@h31xcne2kt#odc73p&(%)%3xwl7")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Authenticated user cache, keyed by (username, token iat). Each worker has
+# its own; invalidate_user_cache bumps a per-user tag that all of them check.
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "4096"))
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+user_tags = TagVersions(RESPONSE_CACHE_TAG_DIR)
 
-# JWT token scheme
-security = HTTPBearer()
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """
+    The current user's columns, copied out of the session that loaded them.
+    Cached and shared between requests, so unlike a detached ``User`` it has
+    no session state or lazy relationships; query profiles by ``id``.
+    """
+    id: int
+    username: str
+    email: str
+    first_name: str
+    last_name: str
+    role: UserRole
+    is_active: bool
+    is_staff: bool
+    is_superuser: bool
+    is_boarder: bool
+    last_login: Optional[datetime]
+    date_joined: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user: User) -> "AuthenticatedUser":
+        return cls(
+            id=user.id, username=user.username, email=user.email,
+            first_name=user.first_name, last_name=user.last_name, role=user.role,
+            is_active=user.is_active, is_staff=user.is_staff, is_superuser=user.is_superuser,
+            is_boarder=user.is_boarder, last_login=user.last_login, date_joined=user.date_joined
+        )
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    @property
+    def full_name(self):
+        return f"{self.first_name} {self.last_name}"
 
-def get_password_hash(password: str) -> str:
-    """Hash a password"""
-    return pwd_context.hash(password)
+def _user_tag(username: str) -> str:
+    return f"user:{username}"
+
+# JWT token scheme
+security = HTTPBearer()
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
@@ -40,10 +77,18 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def create_user_token(user: User, expires_delta: Optional[timedelta] = None):
+    """Create a JWT access token carrying the user's role and active flag"""
+    role = user.role.value if hasattr(user.role, "value") else user.role
+    return create_access_token(
+        data={"sub": user.username, "role": role, "active": bool(user.is_active)},
+        expires_delta=expires_delta
+    )
+
 def verify_token(token: str) -> Optional[dict]:
     """Verify and decode a JWT token"""
     try:
@@ -51,24 +96,33 @@ def verify_token(token: str) -> Optional[dict]:
         username: str = payload.get("sub")
         if username is None:
             return None
-        return {"username": username}
+        return {
+            "username": username,
+            "role": payload.get("role"),
+            "active": payload.get("active"),
+            "iat": payload.get("iat")
+        }
     except JWTError:
         return None
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+def invalidate_user_cache(username: str) -> None:
+    """Drop every cached entry for a user in every worker (call after changing or deleting them)"""
+    user_cache.delete_where(lambda key: key[0] == username)
+    user_tags.bump(_user_tag(username))
+
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
     """Authenticate a user with username and password"""
-    user = db.query(User).filter(User.username == username).first()
+    user = await db.scalar(select(User).filter(User.username == username))
     if not user:
         return None
-    if not verify_password(password, user.password_hash):
+    if not await password_hasher.verify(password, user.password_hash):
         return None
     return user
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get the current authenticated user from JWT token"""
+async def get_token_claims(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> dict:
+    """Decode the bearer token into its claims without touching the database"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -88,20 +142,60 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
+    return payload
+
+async def get_current_user(
+    claims: dict = Depends(get_token_claims),
+    db: AsyncSession = Depends(get_async_db)
+) -> AuthenticatedUser:
+    """Get the current authenticated user from JWT token"""
+    cache_key = (claims["username"], claims.get("iat"))
+    # Read before loading, so a change made while loading still counts as newer
+    version = user_tags.get(_user_tag(claims["username"]))
+    cached = user_cache.get(cache_key)
+    if cached is not None and cached[1] == version:
+        return cached[0]
+    
+    # The async session only opens a connection on a cache miss
+    user = await db.scalar(select(User).filter(User.username == claims["username"]))
     if user is None:
-        raise credentials_exception
-    return user
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    snapshot = AuthenticatedUser.from_user(user)
+    user_cache.set(cache_key, (snapshot, version))
+    return snapshot
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(current_user: AuthenticatedUser = Depends(get_current_user)) -> AuthenticatedUser:
     """Get the current active user"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+def _check_claims(allowed_roles: list):
+    """
+    Reject on the signed role/active claims before the user is loaded.
+    Tokens issued without these claims fall through to the database check.
+    """
+    async def claims_checker(claims: dict = Depends(get_token_claims)):
+        if claims.get("active") is False:
+            raise HTTPException(status_code=400, detail="Inactive user")
+        role = claims.get("role")
+        if role is not None and role not in allowed_roles and role != "ADMIN":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not enough permissions"
+            )
+    return claims_checker
+
 def require_role(required_role: str):
     """Decorator to require a specific role"""
-    def role_checker(current_user: User = Depends(get_current_active_user)):
+    def role_checker(
+        _claims: None = Depends(_check_claims([required_role])),
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
+    ):
         if current_user.role != required_role and current_user.role != "ADMIN":
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -112,7 +206,10 @@ def require_role(required_role: str):
 
 def require_roles(required_roles: list):
     """Decorator to require one of several roles"""
-    def role_checker(current_user: User = Depends(get_current_active_user)):
+    def role_checker(
+        _claims: None = Depends(_check_claims(required_roles)),
+        current_user: AuthenticatedUser = Depends(get_current_active_user)
+    ):
         if current_user.role not in required_roles and current_user.role != "ADMIN":
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
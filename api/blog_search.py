@@ -0,0 +1,126 @@
+"""
+Full-text search over blog posts
+
+The index is built with the blog_posts table (see models/blog.py) and by
+migrations 0004 and 0006 for existing databases. Post content is HTML, so
+it is indexed from blog_posts.search_text, the same content with its tags
+stripped: markup never matches a search or shows up in a snippet.
+
+- SQLite: the FTS5 table blog_posts_fts, ranked with bm25 (a title match
+  outweighs an excerpt match, which outweighs a body match) and highlighted
+  with snippet()
+- PostgreSQL: the generated column blog_posts.search_vector behind a GIN
+  index, ranked with ts_rank_cd and highlighted with ts_headline
+
+Other databases keep the old ILIKE scan. User input never reaches the query
+syntax: it is split into words and every word must match as a prefix, so
+"sport da" already finds "Sports day" while it is being typed. Words are
+indexed as written, without stemming, because a stemmer would store
+"running" as "run" and the half-typed "runn" would then match nothing.
+"""
+
+import html
+import re
+from typing import Dict, List, Optional
+
+from sqlalchemy import Integer, bindparam, column, func, literal_column, select, table
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.selectable import CTE, Select
+
+from models.models import BlogPost
+
+MAX_SEARCH_TERMS = 8
+SNIPPET_WORDS = 24
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+# Placed by the database around each match, then swapped for the tags once the text is escaped
+_MATCH_START = "\x02"
+_MATCH_END = "\x03"
+
+# bm25 weights for (title, excerpt, content)
+_SQLITE_WEIGHTS = (10.0, 4.0, 1.0)
+_HEADLINE_OPTIONS = (
+    f"StartSel={_MATCH_START}, StopSel={_MATCH_END}, "
+    f"MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}, MaxFragments=1"
+)
+
+blog_posts_fts = table("blog_posts_fts", column("rowid", Integer))
+_fts = literal_column("blog_posts_fts")
+_search_vector = literal_column("blog_posts.search_vector")
+
+def is_supported(db: Session) -> bool:
+    """Whether the database has a full-text index for blog posts"""
+    return db.get_bind().dialect.name in ("sqlite", "postgresql")
+
+def search_terms(text: str) -> List[str]:
+    """The words of a search box entry, lower-cased"""
+    return re.findall(r"\w+", text.lower())[:MAX_SEARCH_TERMS]
+
+def _sqlite_match(terms: List[str]) -> str:
+    return " ".join(f'"{term}"*' for term in terms)
+
+def _postgresql_query(terms: List[str]):
+    return func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+
+def matching_posts(db: Session, terms: List[str]) -> Select:
+    """Ids of the posts matching all of ``terms``, for an IN filter (and a cheap count)"""
+    if db.get_bind().dialect.name == "sqlite":
+        return select(blog_posts_fts.c.rowid).where(_fts.op("MATCH")(_sqlite_match(terms)))
+    return select(BlogPost.id).where(_search_vector.op("@@")(_postgresql_query(terms)))
+
+def ranked_posts(db: Session, terms: List[str]) -> CTE:
+    """
+    (post_id, rank) for every post matching all of ``terms``; a lower rank
+    is a better match on both databases. On SQLite the CTE is materialized:
+    left to itself the planner may scan blog_posts and re-run the MATCH for
+    every row.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return select(
+            blog_posts_fts.c.rowid.label("post_id"),
+            func.bm25(_fts, *_SQLITE_WEIGHTS).label("rank")
+        ).where(_fts.op("MATCH")(_sqlite_match(terms))).cte("ranked_posts").prefix_with("MATERIALIZED")
+
+    query = _postgresql_query(terms)
+    return select(
+        BlogPost.id.label("post_id"),
+        (-func.ts_rank_cd(_search_vector, query)).label("rank")
+    ).where(_search_vector.op("@@")(query)).cte("ranked_posts")
+
+def _highlight(extract: Optional[str]) -> Optional[str]:
+    """HTML-escape an extract; the highlight tags are its only markup"""
+    if extract is None:
+        return None
+    return html.escape(extract).replace(_MATCH_START, HIGHLIGHT_START).replace(_MATCH_END, HIGHLIGHT_END)
+
+def snippets(db: Session, terms: List[str], post_ids: List[int]) -> Dict[int, Optional[str]]:
+    """
+    Highlighted, HTML-escaped extracts for ``post_ids`` only, so a page of
+    results never pays for highlighting every match
+    """
+    if not terms or not post_ids:
+        return {}
+    if db.get_bind().dialect.name == "sqlite":
+        # -1 lets FTS5 pick the column with the best match
+        rows = db.execute(
+            select(
+                blog_posts_fts.c.rowid,
+                func.snippet(_fts, -1, _MATCH_START, _MATCH_END, "…", SNIPPET_WORDS)
+            ).where(
+                _fts.op("MATCH")(_sqlite_match(terms)),
+                blog_posts_fts.c.rowid.in_(post_ids)
+            )
+        ).all()
+    else:
+        rows = db.execute(
+            select(
+                BlogPost.id,
+                func.ts_headline(
+                    "simple",
+                    func.concat_ws(" ", BlogPost.excerpt, BlogPost.search_text),
+                    _postgresql_query(terms),
+                    bindparam("headline_options", _HEADLINE_OPTIONS)
+                )
+            ).where(BlogPost.id.in_(post_ids))
+        ).all()
+    return {post_id: _highlight(extract) for post_id, extract in rows}
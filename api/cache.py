@@ -0,0 +1,206 @@
+"""
+In-process caching primitives
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+_MISSING = object()
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire ``ttl`` seconds after being set"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for ``key`` or ``default`` if missing/expired"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store ``value`` under ``key``, evicting the least recently used entry if full"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """Remove ``key`` if present"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Remove every entry whose key matches ``predicate``; returns the count removed"""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class SingleFlight:
+    """
+    Coalesces concurrent async calls for the same key: the first caller
+    starts ``fn()`` as a task and everyone who asks for that key before it
+    finishes awaits the same result (or exception). Per event loop, so each
+    worker process computes at most once per key at a time.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Result of ``fn()``, shared with any concurrent callers for ``key``"""
+        task = self._calls.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        # A cancelled caller must not cancel the shared call for the others
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+class DiskCache:
+    """
+    Size-bounded blob cache on disk, keyed by content digest. Files are
+    written atomically and touched on every hit, so eviction (oldest mtime
+    first) approximates LRU and several worker processes can share a directory.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, suffix: str = ""):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key: str) -> str:
+        """File holding ``key``; keys are hex digests"""
+        if not key.isalnum():
+            raise ValueError(f"Invalid cache key: {key!r}")
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def get(self, key: str) -> Optional[str]:
+        """Path of the cached blob for ``key``, or None on a miss"""
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def set(self, key: str, data: bytes) -> str:
+        """Store ``data`` under ``key``, evicting the least recently used blobs if over budget"""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        path = self.path(key)
+        os.replace(tmp_path, path)
+        self._evict()
+        return path
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith(self.suffix) or entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                total -= size
+
+    def size(self) -> int:
+        """Bytes currently on disk"""
+        if not os.path.isdir(self.directory):
+            return 0
+        return sum(entry.stat().st_size for entry in os.scandir(self.directory) if entry.is_file())
+
+class TagVersions:
+    """
+    Invalidation counters shared by every worker process through a
+    directory: one file per tag, and bumping a tag appends a byte to it.
+    A tag's version is its file size (so two bumps within one clock tick
+    still differ) and its mtime is when it last changed; both come from a
+    single ``stat``.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path(self, tag: str) -> str:
+        """File holding ``tag``; named by digest since tags may embed user input such as slugs"""
+        return os.path.join(self.directory, hashlib.sha1(tag.encode()).hexdigest())
+
+    def get(self, tag: str) -> tuple:
+        """(version, last changed as a Unix time); (0, 0.0) for a tag never bumped"""
+        try:
+            stat = os.stat(self.path(tag))
+        except FileNotFoundError:
+            return 0, 0.0
+        return stat.st_size, stat.st_mtime
+
+    def bump(self, *tags: str) -> None:
+        """Invalidate everything cached under any of ``tags``"""
+        os.makedirs(self.directory, exist_ok=True)
+        for tag in tags:
+            # O_APPEND writes are atomic, so concurrent bumps never collapse into one
+            fd = os.open(self.path(tag), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                os.write(fd, b".")
+            finally:
+                os.close(fd)
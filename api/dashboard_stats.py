@@ -0,0 +1,84 @@
+"""
+School-wide dashboard counters shared by /dashboard/stats, the admin
+dashboard page and the mobile admin summary
+
+All counters come from one statement: a conditional aggregate per table
+(``COUNT(*) FILTER (WHERE ...)``), cross-joined into a single row. The
+result is cached for DASHBOARD_STATS_TTL seconds, and concurrent misses are
+coalesced so a burst of dashboard loads after expiry runs the statement
+once per worker rather than once per request. Student, teacher, parent and
+invoice writes call invalidate_dashboard_stats(), which bumps a tag every
+worker checks before serving its cached counters.
+"""
+
+import asyncio
+import os
+from typing import Any, Dict
+
+from sqlalchemy import func, select, true
+from sqlalchemy.orm import Session
+
+from api.cache import SingleFlight, TagVersions, TTLCache
+from api.database import SessionLocal
+from api.http_cache import RESPONSE_CACHE_TAG_DIR
+from models.models import (
+    ClassRoom, Dormitory, Invoice, InvoiceStatus, Parent, StudentProfile, TeacherProfile
+)
+from models.student import AcademicStatus
+
+DASHBOARD_STATS_TTL = int(os.getenv("DASHBOARD_STATS_TTL", "30"))
+
+_CACHE_KEY = "school"
+DASHBOARD_STATS_TAG = "dashboard-stats"
+stats_cache = TTLCache(maxsize=1, ttl=DASHBOARD_STATS_TTL)
+stats_flight = SingleFlight()
+stats_tags = TagVersions(RESPONSE_CACHE_TAG_DIR)
+
+def compute_dashboard_stats(db: Session) -> Dict[str, int]:
+    """Every dashboard counter in one round trip"""
+    students = select(
+        func.count().label("total_students"),
+        func.count().filter(StudentProfile.academic_status == AcademicStatus.ACTIVE).label("active_students")
+    ).select_from(StudentProfile).subquery()
+    teachers = select(func.count().label("total_teachers")).select_from(TeacherProfile).subquery()
+    parents = select(func.count().label("total_parents")).select_from(Parent).subquery()
+    classes = select(func.count().label("total_classes")).select_from(ClassRoom).subquery()
+    dormitories = select(func.count().label("total_dormitories")).select_from(Dormitory).subquery()
+    invoices = select(
+        func.count().label("total_invoices"),
+        func.count().filter(Invoice.status == InvoiceStatus.PENDING).label("pending_invoices"),
+        func.count().filter(Invoice.status == InvoiceStatus.PAID).label("paid_invoices")
+    ).select_from(Invoice).subquery()
+
+    tables = [students, teachers, parents, classes, dormitories, invoices]
+    joined = tables[0]
+    for table in tables[1:]:
+        joined = joined.join(table, true())
+    row = db.execute(select(*(column for table in tables for column in table.c)).select_from(joined)).one()
+    return dict(row._mapping)
+
+def _compute() -> Dict[str, int]:
+    with SessionLocal() as db:
+        return compute_dashboard_stats(db)
+
+async def get_dashboard_stats() -> Dict[str, Any]:
+    """Cached counters; a copy, so callers may add to it"""
+    # Read before computing, so a write made meanwhile still invalidates the result
+    version = stats_tags.get(DASHBOARD_STATS_TAG)
+    cached = stats_cache.get(_CACHE_KEY)
+    if cached is not None and cached[1] == version:
+        stats = cached[0]
+    else:
+        async def load():
+            computed = await asyncio.to_thread(_compute)
+            stats_cache.set(_CACHE_KEY, (computed, version))
+            return computed
+
+        # Keyed by version: a load started before a write is not shared with requests after it
+        stats = await stats_flight.do((_CACHE_KEY, version), load)
+    return dict(stats)
+
+def invalidate_dashboard_stats() -> None:
+    """Drop the cached counters in every worker so the next dashboard load recomputes them"""
+    stats_cache.clear()
+    stats_tags.bump(DASHBOARD_STATS_TAG)
@@ -5,6 +5,7 @@ Database configuration and connection management for FastAPI
 import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from decouple import config
 from models.models import Base
 
@@ -30,6 +31,42 @@ else:
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def get_async_database_url(url: str) -> str:
+    """
+    Map a sync DATABASE_URL onto its async driver (asyncpg / aiosqlite)
+    """
+    scheme, _, rest = url.partition('://')
+    if scheme.startswith('postgres'):
+        return f"postgresql+asyncpg://{rest}"
+    if scheme.startswith('sqlite'):
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
+ASYNC_DATABASE_URL = get_async_database_url(DATABASE_URL)
+
+# Async engine for endpoints that must not block the event loop
+if ASYNC_DATABASE_URL.startswith('postgresql'):
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        pool_pre_ping=True,
+        pool_recycle=300,
+        echo=False
+    )
+else:
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        echo=False
+    )
+
+# expire_on_commit=False so attributes stay readable after commit without
+# an implicit (and, under asyncio, illegal) lazy refresh
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 def get_db():
     """
     Dependency to get database session
@@ -40,6 +77,13 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """
+    Dependency to get an async database session
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def create_tables():
     """
     Create all database tables
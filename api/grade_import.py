@@ -0,0 +1,299 @@
+"""
+Bulk grade entry and CSV/XLSX gradebook import
+
+Rows are validated and written in batches: each batch resolves its
+students, assessments and existing grades with one set-based query each,
+then inserts new grades and updates changed ones with one executemany
+statement each. A unique index on (student_id, assessment_id) keeps
+concurrent imports from writing the same grade twice. A bad row is reported with its row number and skipped;
+it never aborts the rest of the batch.
+"""
+
+import csv
+import io
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, insert, or_, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models.models import Assessment, Grade, StudentProfile
+
+GRADE_IMPORT_BATCH_SIZE = int(os.getenv("GRADE_IMPORT_BATCH_SIZE", "1000"))
+GRADE_IMPORT_MAX_ROWS = int(os.getenv("GRADE_IMPORT_MAX_ROWS", "50000"))
+
+# Accepted header spellings for each field
+COLUMN_ALIASES = {
+    "student_id": {"student_id", "student id"},
+    "admission_number": {"admission_number", "admission number", "admission no", "adm no"},
+    "assessment_id": {"assessment_id", "assessment id"},
+    "score": {"score", "mark", "marks"},
+    "comments": {"comments", "comment", "remarks"},
+}
+
+class GradeImportError(ValueError):
+    """The file as a whole cannot be imported (bad format or header)"""
+
+def _column_map(header: Iterable[Any]) -> Dict[str, int]:
+    columns = {}
+    for index, name in enumerate(header):
+        name = str(name or "").strip().lower()
+        for field, aliases in COLUMN_ALIASES.items():
+            if name in aliases and field not in columns:
+                columns[field] = index
+    if "score" not in columns:
+        raise GradeImportError("Missing a 'score' column")
+    if "student_id" not in columns and "admission_number" not in columns:
+        raise GradeImportError("Missing a 'student_id' or 'admission_number' column")
+    return columns
+
+def _rows_to_dicts(rows: Iterator[Tuple], first_row: int) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """(row number, {field: raw value}) for every non-blank row after the header"""
+    try:
+        header = next(rows)
+    except StopIteration:
+        raise GradeImportError("The file is empty")
+    columns = _column_map(header)
+    for number, values in enumerate(rows, start=first_row + 1):
+        if not values or all(value in (None, "") for value in values):
+            continue
+        yield number, {
+            field: values[index] if index < len(values) else None
+            for field, index in columns.items()
+        }
+
+def read_csv(binary_file) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Stream rows from an uploaded CSV file without loading it into memory"""
+    text = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    try:
+        yield from _rows_to_dicts(iter(csv.reader(text)), first_row=1)
+    except UnicodeDecodeError:
+        raise GradeImportError("CSV files must be UTF-8 encoded")
+    finally:
+        text.detach()
+
+def read_xlsx(binary_file) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Stream rows from the first sheet of an uploaded XLSX workbook"""
+    import openpyxl
+
+    try:
+        workbook = openpyxl.load_workbook(binary_file, read_only=True, data_only=True)
+    except Exception as e:
+        raise GradeImportError(f"Not a readable XLSX workbook: {e}")
+    try:
+        yield from _rows_to_dicts(workbook.worksheets[0].iter_rows(values_only=True), first_row=1)
+    finally:
+        workbook.close()
+
+def _as_int(value) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return int(str(value).strip())
+
+def _as_text(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    value = str(value).strip()
+    return value or None
+
+class GradeUpserter:
+    """
+    Validates and upserts grade rows on (student_id, assessment_id) in
+    batches, accumulating counts and row-level errors across batches
+    """
+
+    def __init__(self, db: Session, default_assessment_id: Optional[int] = None):
+        self.db = db
+        self.default_assessment_id = default_assessment_id
+        self.assessments: Dict[int, float] = {}
+        self.seen = set()
+        self.total_rows = 0
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.results: Dict[int, Dict[str, Any]] = {}
+
+    def _error(self, row: int, error: str, student_id: Optional[int] = None, assessment_id: Optional[int] = None):
+        self.errors.append({"row": row, "error": error})
+        self.results[row] = {
+            "row": row, "student_id": student_id, "assessment_id": assessment_id,
+            "result": "error", "grade_id": None, "error": error
+        }
+
+    def _result(self, row: int, student_id: int, assessment_id: int, result: str, grade_id: int):
+        self.results[row] = {
+            "row": row, "student_id": student_id, "assessment_id": assessment_id,
+            "result": result, "grade_id": grade_id, "error": None
+        }
+
+    def _insert_statement(self):
+        """
+        INSERT for new grades. On PostgreSQL and SQLite a grade another import
+        created since this batch looked (the unique index on student and
+        assessment) is updated instead; elsewhere that race fails the batch
+        on the index rather than writing a duplicate.
+        """
+        dialect = self.db.get_bind().dialect.name
+        if dialect not in ("postgresql", "sqlite"):
+            return insert(Grade)
+        statement = (postgresql.insert if dialect == "postgresql" else sqlite.insert)(Grade)
+        return statement.on_conflict_do_update(
+            index_elements=["student_id", "assessment_id"],
+            set_={
+                "score": statement.excluded.score,
+                "comments": statement.excluded.comments,
+                "updated_at": func.now()
+            }
+        )
+
+    def add_batch(self, rows: List[Tuple[int, Dict[str, Any]]]) -> None:
+        """Validate and write one batch of (row number, raw fields) in a single transaction"""
+        self.total_rows += len(rows)
+        parsed = []
+        for number, fields in rows:
+            try:
+                student_id = _as_int(fields.get("student_id"))
+                admission_number = _as_text(fields.get("admission_number"))
+                assessment_id = _as_int(fields.get("assessment_id")) or self.default_assessment_id
+                score = fields.get("score")
+                score = float(str(score).strip()) if score not in (None, "") else None
+            except (TypeError, ValueError):
+                self._error(number, "Student id, assessment id and score must be numbers")
+                continue
+            if student_id is None and admission_number is None:
+                self._error(number, "Missing student")
+            elif assessment_id is None:
+                self._error(number, "Missing assessment", student_id)
+            elif score is None:
+                self._error(number, "Missing score", student_id, assessment_id)
+            else:
+                parsed.append((number, student_id, admission_number, assessment_id, score, _as_text(fields.get("comments"))))
+        if not parsed:
+            return
+
+        # Students by id and by admission number, in one query
+        ids = {row[1] for row in parsed if row[1] is not None}
+        numbers = {row[2] for row in parsed if row[1] is None}
+        filters = []
+        if ids:
+            filters.append(StudentProfile.id.in_(ids))
+        if numbers:
+            filters.append(StudentProfile.admission_number.in_(numbers))
+        students = self.db.query(StudentProfile.id, StudentProfile.admission_number).filter(or_(*filters)).all()
+        known_ids = {student.id for student in students}
+        by_number = {student.admission_number: student.id for student in students}
+
+        # Assessments (max score), cached across batches
+        missing = {row[3] for row in parsed} - set(self.assessments)
+        if missing:
+            self.assessments.update(
+                self.db.query(Assessment.id, Assessment.max_score).filter(Assessment.id.in_(missing)).all()
+            )
+
+        valid = []
+        for number, student_id, admission_number, assessment_id, score, comments in parsed:
+            if student_id is None:
+                student_id = by_number.get(admission_number)
+                if student_id is None:
+                    self._error(number, f"Unknown admission number {admission_number}", None, assessment_id)
+                    continue
+            elif student_id not in known_ids:
+                self._error(number, "Student not found", student_id, assessment_id)
+                continue
+            max_score = self.assessments.get(assessment_id)
+            if max_score is None:
+                self._error(number, "Assessment not found", student_id, assessment_id)
+                continue
+            if not 0 <= score <= min(max_score, 100):
+                self._error(number, f"Score must be between 0 and {min(max_score, 100):g}", student_id, assessment_id)
+                continue
+            if (student_id, assessment_id) in self.seen:
+                self._error(number, "Duplicate student and assessment", student_id, assessment_id)
+                continue
+            self.seen.add((student_id, assessment_id))
+            valid.append((number, student_id, assessment_id, score, comments))
+        if not valid:
+            return
+
+        # Existing grades for the batch's (student, assessment) pairs
+        pairs = [(student_id, assessment_id) for _, student_id, assessment_id, _, _ in valid]
+        existing = {
+            (grade.student_id, grade.assessment_id): grade
+            for grade in self.db.query(Grade.id, Grade.student_id, Grade.assessment_id, Grade.score, Grade.comments).filter(
+                tuple_(Grade.student_id, Grade.assessment_id).in_(pairs)
+            )
+        }
+
+        inserts, updates = [], []
+        for number, student_id, assessment_id, score, comments in valid:
+            grade = existing.get((student_id, assessment_id))
+            if grade is None:
+                inserts.append((number, {
+                    "student_id": student_id, "assessment_id": assessment_id,
+                    "score": score, "comments": comments
+                }))
+            elif grade.score == score and grade.comments == comments:
+                self.unchanged += 1
+                self._result(number, student_id, assessment_id, "unchanged", grade.id)
+            else:
+                updates.append({"id": grade.id, "score": score, "comments": comments})
+                self.updated += 1
+                self._result(number, student_id, assessment_id, "updated", grade.id)
+
+        if inserts:
+            created = self.db.execute(
+                self._insert_statement().returning(Grade.id, Grade.student_id, Grade.assessment_id),
+                [values for _, values in inserts]
+            ).all()
+            grade_ids = {(row.student_id, row.assessment_id): row.id for row in created}
+            for number, values in inserts:
+                key = (values["student_id"], values["assessment_id"])
+                self._result(number, *key, "created", grade_ids[key])
+            self.created += len(inserts)
+        if updates:
+            self.db.execute(update(Grade), updates)
+        self.db.commit()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "total_rows": self.total_rows,
+            "created": self.created,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "failed": len(self.errors),
+        }
+
+def check_file(reader, binary_file) -> int:
+    """
+    Read an uploaded file through ``reader`` (read_csv or read_xlsx) once
+    without writing anything, then rewind it. Raises GradeImportError for a
+    bad format, encoding or header, or more than GRADE_IMPORT_MAX_ROWS rows;
+    batches are committed as they go, so these must be caught before the
+    import starts. Returns the number of rows.
+    """
+    rows = 0
+    for _ in reader(binary_file):
+        rows += 1
+        if rows > GRADE_IMPORT_MAX_ROWS:
+            raise GradeImportError(f"Files are limited to {GRADE_IMPORT_MAX_ROWS} rows")
+    binary_file.seek(0)
+    return rows
+
+def import_grade_rows(db: Session, rows: Iterable[Tuple[int, Dict[str, Any]]], default_assessment_id: Optional[int] = None) -> GradeUpserter:
+    """Upsert a stream of parsed rows (from a file that passed check_file) in batches of GRADE_IMPORT_BATCH_SIZE"""
+    upserter = GradeUpserter(db, default_assessment_id)
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= GRADE_IMPORT_BATCH_SIZE:
+            upserter.add_batch(batch)
+            batch = []
+    if batch:
+        upserter.add_batch(batch)
+    return upserter
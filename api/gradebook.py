@@ -0,0 +1,144 @@
+"""
+Class gradebook: the student x assessment score matrix and its statistics
+
+The class's grades for a term are read in one query and scattered into a
+NumPy matrix (NaN where a student has no grade). Every statistic is then a
+whole-array operation rather than a Python loop over students:
+
+- percentages: score / max_score per assessment column
+- weighted percentage: sum(weight * pct) / sum(weight) over the
+  assessments a student has a grade for, so missing work is not a zero
+- subject percentages: the same, restricted to each subject's columns
+- rank: competition ranking on the weighted percentage (ties share a rank)
+- percentile: share of the class below a student, counting ties as half
+"""
+
+import warnings
+from typing import Any, Dict, List
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models.models import Assessment, Grade, StudentProfile, Subject, User
+
+def _column(values: np.ndarray, decimals: int = 2) -> List[Any]:
+    """Rounded list with NaN as None, for JSON"""
+    rounded = np.round(values, decimals).astype(object)
+    rounded[np.isnan(values)] = None
+    return rounded.tolist()
+
+def weighted_percentages(percent: np.ndarray, weights: np.ndarray, groups: np.ndarray) -> np.ndarray:
+    """
+    Weighted mean of ``percent`` (students x assessments) within each column
+    group; ``groups`` is a 0/1 matrix (assessments x groups). NaN scores
+    drop out of both the numerator and the denominator.
+    """
+    graded = ~np.isnan(percent)
+    totals = (np.where(graded, percent, 0.0) * weights) @ groups
+    weight_totals = (graded * weights) @ groups
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(weight_totals > 0, totals / weight_totals, np.nan)
+
+def rank_and_percentile(values: np.ndarray):
+    """Competition rank (1 = best) and percentile for each value; NaN stays NaN"""
+    present = np.sort(values[~np.isnan(values)])
+    ranks = np.full(values.shape, np.nan)
+    percentiles = np.full(values.shape, np.nan)
+    if present.size:
+        mask = ~np.isnan(values)
+        below = np.searchsorted(present, values[mask], side="left")
+        at_or_below = np.searchsorted(present, values[mask], side="right")
+        ranks[mask] = present.size - at_or_below + 1
+        percentiles[mask] = (below + at_or_below) / 2 / present.size * 100
+    return ranks, percentiles
+
+def build_gradebook(db: Session, classroom_id: int, term_id: int) -> Dict[str, Any]:
+    """Columnar gradebook payload for one classroom and term"""
+    students = db.query(
+        StudentProfile.id, StudentProfile.admission_number, User.first_name, User.last_name
+    ).join(User, User.id == StudentProfile.user_id).filter(
+        StudentProfile.classroom_id == classroom_id
+    ).order_by(User.last_name, User.first_name, StudentProfile.id).all()
+
+    assessments = db.query(
+        Assessment.id, Assessment.name, Assessment.subject_id, Subject.name.label("subject_name"),
+        Assessment.max_score, Assessment.weight
+    ).join(Subject, Subject.id == Assessment.subject_id).filter(
+        Assessment.term_id == term_id
+    ).order_by(Subject.name, Assessment.date, Assessment.id).all()
+
+    scores = db.query(Grade.student_id, Grade.assessment_id, Grade.score).join(
+        StudentProfile, StudentProfile.id == Grade.student_id
+    ).join(
+        Assessment, Assessment.id == Grade.assessment_id
+    ).filter(
+        StudentProfile.classroom_id == classroom_id,
+        Assessment.term_id == term_id
+    ).all()
+
+    student_index = {student.id: i for i, student in enumerate(students)}
+    assessment_index = {assessment.id: j for j, assessment in enumerate(assessments)}
+    subject_ids = list(dict.fromkeys(assessment.subject_id for assessment in assessments))
+    subject_names = {assessment.subject_id: assessment.subject_name for assessment in assessments}
+
+    matrix = np.full((len(students), len(assessments)), np.nan)
+    if scores:
+        student_ids, assessment_ids, values = zip(*scores)
+        rows = np.fromiter((student_index[s] for s in student_ids), dtype=np.intp, count=len(scores))
+        columns = np.fromiter((assessment_index[a] for a in assessment_ids), dtype=np.intp, count=len(scores))
+        matrix[rows, columns] = np.asarray(values, dtype=float)
+
+    max_scores = np.array([assessment.max_score or np.nan for assessment in assessments], dtype=float)
+    weights = np.array([1.0 if assessment.weight is None else assessment.weight for assessment in assessments], dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        percent = matrix / max_scores * 100
+
+    subject_index = {subject_id: k for k, subject_id in enumerate(subject_ids)}
+    subject_of = np.array([subject_index[assessment.subject_id] for assessment in assessments], dtype=np.intp)
+    subject_groups = np.zeros((len(assessments), len(subject_ids)))
+    subject_groups[np.arange(len(assessments)), subject_of] = 1.0
+
+    overall = weighted_percentages(percent, weights, np.ones((len(assessments), 1)))[:, 0]
+    by_subject = weighted_percentages(percent, weights, subject_groups)
+    ranks, percentiles = rank_and_percentile(overall)
+
+    counts = (~np.isnan(matrix)).sum(axis=0)
+    no_students = np.full(len(assessments), np.nan)
+    with warnings.catch_warnings():
+        # Assessments nobody has been graded on yet reduce to NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        assessment_mean = np.nanmean(matrix, axis=0) if len(students) else no_students
+        assessment_min = np.nanmin(matrix, axis=0) if len(students) else no_students
+        assessment_max = np.nanmax(matrix, axis=0) if len(students) else no_students
+        subject_mean = np.nanmean(by_subject, axis=0)
+
+    return {
+        "classroom_id": classroom_id,
+        "term_id": term_id,
+        "students": {
+            "id": [student.id for student in students],
+            "admission_number": [student.admission_number for student in students],
+            "name": [f"{student.first_name} {student.last_name}" for student in students],
+        },
+        "assessments": {
+            "id": [assessment.id for assessment in assessments],
+            "name": [assessment.name for assessment in assessments],
+            "subject_id": [assessment.subject_id for assessment in assessments],
+            "max_score": _column(max_scores),
+            "weight": _column(weights),
+            "mean": _column(assessment_mean),
+            "min": _column(assessment_min),
+            "max": _column(assessment_max),
+            "graded": counts.tolist(),
+        },
+        "subjects": {
+            "id": subject_ids,
+            "name": [subject_names[subject_id] for subject_id in subject_ids],
+            "mean_percentage": _column(subject_mean),
+        },
+        "scores": _column(matrix),
+        "subject_percentages": _column(by_subject),
+        "weighted_percentage": _column(overall),
+        "rank": [None if np.isnan(rank) else int(rank) for rank in ranks],
+        "percentile": _column(percentiles, 1),
+    }
@@ -0,0 +1,179 @@
+"""
+HTTP response cache for public, read-heavy endpoints
+
+A cached entry is the rendered JSON body plus its validators: a strong
+ETag (a digest of the body) and a Last-Modified time. Each entry remembers
+the versions of the tags it was built under, read before its data was
+loaded; a write handler bumps the tags it affects after committing, and
+the next read of any entry built under an older version is a miss. Tag
+versions live in RESPONSE_CACHE_TAG_DIR rather than in process memory, so
+a bump in one worker invalidates the entries of every worker. Entries also
+expire RESPONSE_CACHE_TTL seconds after being built.
+
+Responses carry ETag, Last-Modified and Cache-Control, and conditional
+requests get a 304 without a body, so nginx's proxy cache and browsers can
+revalidate cheaply and keep serving a stale copy while they do.
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse, Response
+
+from api.cache import TagVersions, TTLCache
+
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+RESPONSE_CACHE_TAG_DIR = os.getenv(
+    "RESPONSE_CACHE_TAG_DIR", os.path.join(tempfile.gettempdir(), "regisbridge-cache-tags")
+)
+# Freshness handed to nginx and browsers for cached listings
+RESPONSE_CACHE_MAX_AGE = int(os.getenv("RESPONSE_CACHE_MAX_AGE", "60"))
+RESPONSE_CACHE_STALE_WHILE_REVALIDATE = int(os.getenv("RESPONSE_CACHE_STALE_WHILE_REVALIDATE", "600"))
+
+PUBLIC_CACHE_CONTROL = (
+    f"public, max-age={RESPONSE_CACHE_MAX_AGE}, "
+    f"stale-while-revalidate={RESPONSE_CACHE_STALE_WHILE_REVALIDATE}"
+)
+# Shared caches may store it, but must ask the app before every reuse
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+    last_modified: float
+    tags: Tuple[str, ...]
+    versions: Tuple[Tuple[int, float], ...]
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header names ``etag`` (weak comparison)"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def not_modified(etag: str, last_modified: float, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+    """RFC 9110 conditional GET: If-None-Match wins; If-Modified-Since is only used without it"""
+    if if_none_match:
+        return etag_matches(if_none_match, etag)
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have one second resolution
+        return int(last_modified) <= since
+    return False
+
+def timestamp(value: Optional[datetime]) -> float:
+    """Unix time of a database datetime (naive values are UTC); 0 for None"""
+    if value is None:
+        return 0.0
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+class ResponseCache:
+    """Rendered JSON responses keyed by request, invalidated by tag"""
+
+    def __init__(self, tag_dir: str, maxsize: int, ttl: float):
+        self.tags = TagVersions(tag_dir)
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def versions(self, tags: Iterable[str]) -> Tuple[Tuple[int, float], ...]:
+        """Current (version, last changed) of each tag; read it before loading the data"""
+        return tuple(self.tags.get(tag) for tag in tags)
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        """The cached entry for ``key`` unless it expired or one of its tags was bumped"""
+        entry = self.entries.get(key)
+        if entry is not None and self.versions(entry.tags) != entry.versions:
+            self.entries.delete(key)
+            return None
+        return entry
+
+    def set(
+        self,
+        key: Hashable,
+        tags: Iterable[str],
+        versions: Tuple[Tuple[int, float], ...],
+        content: Any,
+        last_modified: float = 0.0,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> CachedResponse:
+        """
+        Render and cache ``content`` under the tag ``versions`` read before it
+        was loaded. Last-Modified is the latest of ``last_modified`` and the
+        tags' last bumps (which is when deletions show up), or now if neither
+        is known.
+        """
+        body = JSONResponse(content=jsonable_encoder(content)).body
+        changed = max([last_modified, *(changed_at for _, changed_at in versions)])
+        entry = CachedResponse(
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            last_modified=changed or time.time(),
+            tags=tuple(tags),
+            versions=versions,
+            meta=meta or {},
+        )
+        self.entries.set(key, entry)
+        return entry
+
+    def invalidate(self, *tags: str) -> None:
+        """Bump ``tags``: entries built under them are rebuilt on their next read, in every worker"""
+        self.tags.bump(*tags)
+
+response_cache = ResponseCache(RESPONSE_CACHE_TAG_DIR, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL)
+
+def cached_response(
+    entry: CachedResponse,
+    cache_control: str,
+    if_none_match: Optional[str] = None,
+    if_modified_since: Optional[str] = None,
+    fields: Optional[Dict[str, Any]] = None,
+) -> Response:
+    """
+    The entry's body with its validators, or a bodiless 304 when the
+    client's copy is current. ``fields`` are added to the body (a JSON
+    object) without re-encoding it: values that change on every request,
+    such as a view count, and are left out of the cached body and its ETag.
+    """
+    headers = {
+        "ETag": entry.etag,
+        "Last-Modified": formatdate(entry.last_modified, usegmt=True),
+        "Cache-Control": cache_control,
+    }
+    if not_modified(entry.etag, entry.last_modified, if_none_match, if_modified_since):
+        return Response(status_code=304, headers=headers)
+    body = entry.body
+    if fields:
+        body = body[:-1] + b"," + JSONResponse(content=jsonable_encoder(fields)).body[1:]
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def file_response(
+    path: str,
+    cache_control: str,
+    if_none_match: Optional[str] = None,
+    if_modified_since: Optional[str] = None,
+) -> Response:
+    """FileResponse that answers conditional requests with a 304"""
+    stat_result = os.stat(path)
+    response = FileResponse(path, stat_result=stat_result, headers={"Cache-Control": cache_control})
+    etag = response.headers["etag"]
+    if not_modified(etag, stat_result.st_mtime, if_none_match, if_modified_since):
+        return Response(status_code=304, headers={
+            "ETag": etag,
+            "Last-Modified": response.headers["last-modified"],
+            "Cache-Control": cache_control,
+        })
+    return response
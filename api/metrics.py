@@ -0,0 +1,165 @@
+"""
+Prometheus metrics for Regisbridge College Management System
+
+Per-route request latency, status counts, in-flight requests and the time
+each request spends in the database. Routes are labelled by their path
+template (``/api/v1/students/{student_id}``), not the raw URL, so label
+cardinality stays bounded.
+
+When running several worker processes (``uvicorn --workers N`` or gunicorn)
+set ``PROMETHEUS_MULTIPROC_DIR`` to an empty, writable directory before the
+workers start; every worker then writes its samples there and ``/metrics``
+aggregates them, whichever worker serves the scrape.
+"""
+
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from starlette.routing import Match
+
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# Test/dev aid: report each request's statement count in an X-Query-Count
+# header so test scripts can catch N+1 loads. Leave off in production.
+QUERY_COUNT_HEADER = os.getenv("QUERY_COUNT_HEADER", "false").lower() == "true"
+
+# Buckets tuned for an API whose requests mostly finish in 5ms-1s
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+DB_QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+REQUEST_COUNT = Counter(
+    "http_requests_total",
+    "HTTP requests by method, route template and status code",
+    ["method", "route", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method and route template",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served",
+    ["method", "route"],
+    multiprocess_mode="livesum",
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_duration_seconds",
+    "Time each request spent executing database statements",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Database statements executed per request",
+    ["method", "route"],
+    buckets=DB_QUERY_BUCKETS,
+)
+REQUEST_EXCEPTIONS = Counter(
+    "http_request_exceptions_total",
+    "Unhandled exceptions raised while serving a request",
+    ["method", "route", "exception"],
+)
+
+class DatabaseUsage:
+    """Mutable per-request accumulator for statement count and time"""
+
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+# Set by the middleware for the duration of a request. The accumulator is
+# mutable so that copies of the context (threadpool endpoints, SQLAlchemy's
+# async greenlets) still update the same object.
+_db_usage: ContextVar[Optional[DatabaseUsage]] = ContextVar("db_usage", default=None)
+
+def start_request() -> Tuple[DatabaseUsage, object]:
+    """Begin DB accounting for the current request; returns (usage, reset token)"""
+    usage = DatabaseUsage()
+    return usage, _db_usage.set(usage)
+
+def end_request(token) -> None:
+    """Stop DB accounting for the current request"""
+    _db_usage.reset(token)
+
+def get_route_template(request) -> str:
+    """
+    Path template of the route that will serve ``request``, e.g.
+    ``/api/v1/grades/{grade_id}``. Middleware runs before routing, so this
+    repeats the router's matching: first full match, else first partial
+    (path matched, method did not).
+    """
+    partial = None
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or "unmatched"
+
+def observe_request(method: str, route: str, status: int, duration: float, usage: DatabaseUsage) -> None:
+    """Record one finished request"""
+    REQUEST_COUNT.labels(method, route, str(status)).inc()
+    REQUEST_LATENCY.labels(method, route).observe(duration)
+    REQUEST_DB_TIME.labels(method, route).observe(usage.seconds)
+    REQUEST_DB_QUERIES.labels(method, route).observe(usage.queries)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("metrics_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    usage = _db_usage.get()
+    if usage is not None:
+        usage.queries += 1
+        usage.seconds += elapsed
+
+def _handle_error(exception_context):
+    # Failed statements never reach after_cursor_execute; drop their start time
+    conn = exception_context.connection
+    if conn is not None:
+        starts = conn.info.get("metrics_query_start")
+        if starts:
+            starts.pop()
+
+def instrument_engine(engine) -> None:
+    """Attach statement timing listeners to a sync engine (or an AsyncEngine's sync_engine)"""
+    engine = getattr(engine, "sync_engine", engine)
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+def generate_metrics() -> Tuple[bytes, str]:
+    """Prometheus text exposition, aggregated across workers in multiprocess mode"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+def mark_worker_dead(pid: Optional[int] = None) -> None:
+    """Drop a stopped worker's live gauges from the multiprocess directory"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid or os.getpid())
@@ -11,6 +11,8 @@ import json
 
 from api.database import get_db
 from api.auth import require_roles, get_current_user
+from api.attendance_rollup import student_attendance_totals
+from api.dashboard_stats import get_dashboard_stats
 from models.models import (
     User, StudentProfile, TeacherProfile, Parent, Grade, 
     AttendanceRecord, Invoice, Message, Notification, BlogPost
@@ -74,12 +76,9 @@ async def get_mobile_dashboard(
                 })
             
             # Attendance summary
-            attendance_records = db.query(AttendanceRecord).filter(
-                AttendanceRecord.student_id == student_profile.id
-            ).all()
-            
-            present_days = len([r for r in attendance_records if r.status == "PRESENT"])
-            total_days = len(attendance_records)
+            attendance = student_attendance_totals(db, [student_profile.id]).get(student_profile.id, {})
+            present_days = attendance.get("present", 0)
+            total_days = attendance.get("total", 0)
             attendance_rate = (present_days / total_days * 100) if total_days > 0 else 0
             
             dashboard_data["stats"] = {
@@ -136,14 +135,12 @@ async def get_mobile_dashboard(
             ]
     
     elif current_user.role == "ADMIN":
-        total_students = db.query(StudentProfile).count()
-        total_teachers = db.query(TeacherProfile).count()
-        total_parents = db.query(Parent).count()
+        school = await get_dashboard_stats()
         
         dashboard_data["stats"] = {
-            "total_students": total_students,
-            "total_teachers": total_teachers,
-            "total_parents": total_parents,
+            "total_students": school["total_students"],
+            "total_teachers": school["total_teachers"],
+            "total_parents": school["total_parents"],
             "pending_applications": 0  # Would be calculated
         }
         
@@ -255,12 +252,9 @@ async def get_mobile_student_profile(
         })
     
     # Get attendance summary
-    attendance_records = db.query(AttendanceRecord).filter(
-        AttendanceRecord.student_id == student_id
-    ).all()
-    
-    present_days = len([r for r in attendance_records if r.status == "PRESENT"])
-    total_days = len(attendance_records)
+    attendance = student_attendance_totals(db, [student_id]).get(student_id, {})
+    present_days = attendance.get("present", 0)
+    total_days = attendance.get("total", 0)
     attendance_rate = (present_days / total_days * 100) if total_days > 0 else 0
     
     return {
@@ -282,6 +282,57 @@ class GradeResponse(GradeBase):
     class Config:
         from_attributes = True
 
+class GradeBulkItem(BaseModel):
+    # Range is checked per row against the assessment so one bad mark
+    # does not reject the whole request
+    student_id: int
+    assessment_id: int
+    score: float
+    comments: Optional[str] = None
+
+class GradeBulkCreate(BaseModel):
+    grades: List[GradeBulkItem] = Field(..., min_length=1, max_length=1000)
+
+class GradeBulkResult(BaseModel):
+    row: int
+    student_id: Optional[int] = None
+    assessment_id: Optional[int] = None
+    result: str = Field(..., description="created, updated, unchanged or error")
+    grade_id: Optional[int] = None
+    error: Optional[str] = None
+
+class GradeBulkResponse(BaseModel):
+    created: int
+    updated: int
+    unchanged: int
+    failed: int
+    results: List[GradeBulkResult]
+
+class GradebookResponse(BaseModel):
+    # Columnar: the lists in each block, and the rows of the matrices, line up by index
+    classroom_id: int
+    term_id: int
+    students: Dict[str, List[Any]] = Field(..., description="id, admission_number, name")
+    assessments: Dict[str, List[Any]] = Field(..., description="id, name, subject_id, max_score, weight, mean, min, max, graded")
+    subjects: Dict[str, List[Any]] = Field(..., description="id, name, mean_percentage")
+    scores: List[List[Optional[float]]] = Field(..., description="students x assessments, raw scores")
+    subject_percentages: List[List[Optional[float]]] = Field(..., description="students x subjects, weighted %")
+    weighted_percentage: List[Optional[float]]
+    rank: List[Optional[int]]
+    percentile: List[Optional[float]]
+
+class GradeImportRowError(BaseModel):
+    row: int
+    error: str
+
+class GradeImportResponse(BaseModel):
+    total_rows: int
+    created: int
+    updated: int
+    unchanged: int
+    failed: int
+    errors: List[GradeImportRowError]
+
 # Attendance Models
 class AttendanceRecordBase(BaseModel):
     status: str = Field(..., description="PRESENT, ABSENT, LATE, EXCUSED")
@@ -409,6 +460,26 @@ class AttendanceRecordResponse(AttendanceRecordBase):
     class Config:
         from_attributes = True
 
+class AttendanceBulkItem(AttendanceRecordBase):
+    student_id: int
+
+class AttendanceBulkCreate(BaseModel):
+    records: List[AttendanceBulkItem] = Field(..., min_length=1, max_length=500)
+
+class AttendanceBulkResult(BaseModel):
+    student_id: int
+    result: str = Field(..., description="created, updated, unchanged or error")
+    record_id: Optional[int] = None
+    error: Optional[str] = None
+
+class AttendanceBulkResponse(BaseModel):
+    session_id: int
+    created: int
+    updated: int
+    unchanged: int
+    failed: int
+    results: List[AttendanceBulkResult]
+
 # Blog Models
 class BlogPostBase(BaseModel):
     title: str
@@ -449,6 +520,8 @@ class BlogPostResponse(BlogPostBase):
     view_count: int
     created_at: datetime
     updated_at: datetime
+    # Highlighted extract, only on search results
+    snippet: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -545,3 +618,9 @@ class PaymentGatewayResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+# Report Models
+class BulkReportCardRequest(BaseModel):
+    classroom_id: Optional[int] = Field(None, description="Students in this classroom")
+    grade_level_id: Optional[int] = Field(None, description="Students in this grade level")
+    term_id: Optional[int] = Field(None, description="Term whose grades and attendance are reported")
@@ -2,15 +2,22 @@
 Monitoring and health check system for Regisbridge College Management System
 """
 
+import os
 import time
+import asyncio
 import psutil
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
-from api.database import get_db
-from models.models import User, StudentProfile, TeacherProfile, Parent
+from sqlalchemy import text
+from api.database import async_engine
+from api.security import password_hasher
+from api.search_suggestions import suggestion_index
+
+# Background sampler settings
+HEALTH_SAMPLE_INTERVAL = float(os.getenv("HEALTH_SAMPLE_INTERVAL", "5"))
+HEALTH_DB_TIMEOUT = float(os.getenv("HEALTH_DB_TIMEOUT", "2"))
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +28,10 @@ class SystemMonitor:
         self.start_time = datetime.now()
         self.request_count = 0
         self.error_count = 0
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.snapshot_monotonic = 0.0
+        # Prime psutil so the first non-blocking cpu_percent() has a baseline
+        psutil.cpu_percent(interval=None)
     
     def increment_request_count(self):
         """Increment request counter"""
@@ -30,78 +41,110 @@ class SystemMonitor:
         """Increment error counter"""
         self.error_count += 1
     
+    async def sample(self) -> Dict[str, Any]:
+        """Take one CPU/memory/disk/DB-latency sample and store it as the latest snapshot"""
+        # interval=None compares against the previous call instead of sleeping
+        cpu_percent = psutil.cpu_percent(interval=None)
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage('/')
+        db_health = await self._check_database_health()
+        
+        snapshot = {
+            "sampled_at": datetime.now().isoformat(),
+            "system": {
+                "cpu_percent": cpu_percent,
+                "memory_percent": memory.percent,
+                "memory_available_gb": round(memory.available / (1024**3), 2),
+                "disk_percent": disk.percent,
+                "disk_free_gb": round(disk.free / (1024**3), 2)
+            },
+            "database": db_health,
+            "healthy": self._is_healthy(cpu_percent, memory.percent, db_health)
+        }
+        self.snapshot = snapshot
+        self.snapshot_monotonic = time.monotonic()
+        return snapshot
+    
+    async def run_sampler(self, interval: float = HEALTH_SAMPLE_INTERVAL):
+        """Refresh the snapshot every ``interval`` seconds until cancelled"""
+        while True:
+            try:
+                await self.sample()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Health sampler failed: {str(e)}")
+            await asyncio.sleep(interval)
+    
+    def snapshot_age(self) -> Optional[float]:
+        """Seconds since the last sample, or None if no sample has run yet"""
+        if self.snapshot is None:
+            return None
+        return time.monotonic() - self.snapshot_monotonic
+    
+    def is_snapshot_fresh(self) -> bool:
+        """A snapshot older than three intervals means the sampler has stalled"""
+        age = self.snapshot_age()
+        return age is not None and age <= HEALTH_SAMPLE_INTERVAL * 3
+    
     def get_system_health(self) -> Dict[str, Any]:
-        """Get comprehensive system health status"""
-        try:
-            # System metrics
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
-            
-            # Database health
-            db_health = self._check_database_health()
-            
-            # Application metrics
-            uptime = datetime.now() - self.start_time
-            
-            health_status = {
-                "status": "healthy" if self._is_healthy(cpu_percent, memory.percent, db_health) else "unhealthy",
-                "timestamp": datetime.now().isoformat(),
-                "uptime_seconds": uptime.total_seconds(),
-                "system": {
-                    "cpu_percent": cpu_percent,
-                    "memory_percent": memory.percent,
-                    "memory_available_gb": round(memory.available / (1024**3), 2),
-                    "disk_percent": disk.percent,
-                    "disk_free_gb": round(disk.free / (1024**3), 2)
-                },
-                "application": {
-                    "request_count": self.request_count,
-                    "error_count": self.error_count,
-                    "error_rate": round(self.error_count / max(self.request_count, 1) * 100, 2)
-                },
-                "database": db_health
-            }
-            
-            return health_status
-            
-        except Exception as e:
-            logger.error(f"Error getting system health: {str(e)}")
+        """Get comprehensive system health status from the latest background sample"""
+        uptime = datetime.now() - self.start_time
+        snapshot = self.snapshot
+        
+        if snapshot is None:
             return {
-                "status": "unhealthy",
+                "status": "starting",
                 "timestamp": datetime.now().isoformat(),
-                "error": str(e)
+                "uptime_seconds": uptime.total_seconds()
             }
+        
+        healthy = snapshot["healthy"] and self.is_snapshot_fresh()
+        return {
+            "status": "healthy" if healthy else "unhealthy",
+            "timestamp": datetime.now().isoformat(),
+            "sampled_at": snapshot["sampled_at"],
+            "sample_age_seconds": round(self.snapshot_age(), 2),
+            "uptime_seconds": uptime.total_seconds(),
+            "system": snapshot["system"],
+            "application": {
+                "request_count": self.request_count,
+                "error_count": self.error_count,
+                "error_rate": round(self.error_count / max(self.request_count, 1) * 100, 2)
+            },
+            "database": snapshot["database"]
+        }
+    
+    def is_ready(self) -> bool:
+        """Ready to serve traffic: a fresh sample exists and the database answered"""
+        snapshot = self.snapshot
+        return (
+            snapshot is not None
+            and self.is_snapshot_fresh()
+            and snapshot["database"].get("status") == "healthy"
+        )
+    
+    async def _ping_database(self):
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
     
-    def _check_database_health(self) -> Dict[str, Any]:
-        """Check database connectivity and performance"""
+    async def _check_database_health(self) -> Dict[str, Any]:
+        """Check database connectivity and round-trip latency"""
         try:
-            db = next(get_db())
-            
-            # Test basic query
-            start_time = time.time()
-            user_count = db.query(User).count()
-            query_time = time.time() - start_time
-            
-            # Get table counts
-            student_count = db.query(StudentProfile).count()
-            teacher_count = db.query(TeacherProfile).count()
-            parent_count = db.query(Parent).count()
+            start_time = time.perf_counter()
+            await asyncio.wait_for(self._ping_database(), timeout=HEALTH_DB_TIMEOUT)
+            query_time = time.perf_counter() - start_time
             
             return {
                 "status": "healthy",
-                "query_time_ms": round(query_time * 1000, 2),
-                "user_count": user_count,
-                "student_count": student_count,
-                "teacher_count": teacher_count,
-                "parent_count": parent_count
+                "query_time_ms": round(query_time * 1000, 2)
             }
             
         except Exception as e:
             logger.error(f"Database health check failed: {str(e)}")
             return {
                 "status": "unhealthy",
-                "error": str(e)
+                "error": str(e) or e.__class__.__name__
             }
     
     def _is_healthy(self, cpu_percent: float, memory_percent: float, db_health: Dict[str, Any]) -> bool:
@@ -134,7 +177,9 @@ class SystemMonitor:
             "request_count": self.request_count,
             "error_count": self.error_count,
             "error_rate": round(self.error_count / max(self.request_count, 1) * 100, 2),
-            "requests_per_minute": round(self.request_count / (uptime.total_seconds() / 60), 2)
+            "requests_per_minute": round(self.request_count / (uptime.total_seconds() / 60), 2),
+            "password_hashing": password_hasher.get_stats(),
+            "search_suggestions": suggestion_index.stats()
         }
 
 # Global monitor instance
@@ -148,6 +193,10 @@ def get_metrics() -> Dict[str, Any]:
     """Get application metrics"""
     return monitor.get_metrics()
 
+def is_ready() -> bool:
+    """Get readiness from the latest background sample"""
+    return monitor.is_ready()
+
 def increment_request_count():
     """Increment request counter"""
     monitor.increment_request_count()
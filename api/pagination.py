@@ -0,0 +1,225 @@
+"""
+Keyset (cursor) pagination shared by the list endpoints
+
+OFFSET pagination makes the database walk and discard every row before the
+requested page, and the accompanying COUNT(*) scans the whole filtered set,
+so both get slower as the tables grow. Keyset pagination instead remembers
+the sort key of the last row it returned and asks for rows strictly after
+it (``WHERE (created_at, id) < (:last_created_at, :last_id)``), which an
+index on the sort key answers directly however deep the client pages.
+
+Every list response carries an opaque ``next_cursor``. Clients pass it back
+as ``?cursor=...`` to fetch the following page; ``page`` keeps working for
+existing callers. Totals are controlled with ``?count=``:
+
+- ``exact``: COUNT(*) over the filtered query (default for page mode)
+- ``estimated``: the query planner's row estimate on PostgreSQL, exact elsewhere
+- ``none``: skip the count (default for cursor mode)
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import DateTime, and_, func, or_, select, text
+
+COUNT_PATTERN = "^(exact|estimated|none)$"
+
+def _key_name(column) -> str:
+    return f"{column.table.name}.{column.key}"
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def _decode_value(column, value: Any) -> Any:
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+def encode_cursor(keys: Sequence, values: Sequence) -> str:
+    """Opaque token holding the sort key ``values`` of the last row on a page"""
+    payload = {
+        "k": [_key_name(column) for column in keys],
+        "v": [_encode_value(value) for value in values],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(keys: Sequence, cursor: str) -> List[Any]:
+    """Sort key values from a token made by ``encode_cursor`` for the same keys"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if payload["k"] != [_key_name(column) for column in keys] or len(payload["v"]) != len(keys):
+            raise ValueError("cursor was issued for a different sort order")
+        return [_decode_value(column, value) for column, value in zip(keys, payload["v"])]
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid cursor: {e}"
+        )
+
+def _comparable(column, value, dialect_name: str):
+    """
+    SQLite keeps DATETIME as text, and ``server_default=func.now()`` rows lack
+    the fractional seconds that bound parameters carry, so equal instants
+    compare unequal. Normalise both sides there; other backends compare natively.
+    """
+    if dialect_name == "sqlite" and isinstance(column.type, DateTime):
+        return (
+            func.strftime("%Y-%m-%d %H:%M:%f", column),
+            func.strftime("%Y-%m-%d %H:%M:%f", value)
+        )
+    return column, value
+
+def keyset_condition(keys: Sequence, values: Sequence, descending: bool = False, dialect_name: str = ""):
+    """
+    Rows strictly after ``values`` in (keys) order, expanded as
+    ``a > x OR (a = x AND b > y)`` so it works on every backend
+    """
+    pairs = [_comparable(column, value, dialect_name) for column, value in zip(keys, values)]
+    clauses = []
+    for i, (column, value) in enumerate(pairs):
+        equal = [pairs[j][0] == pairs[j][1] for j in range(i)]
+        after = column < value if descending else column > value
+        clauses.append(and_(*equal, after))
+    return or_(*clauses)
+
+def order_by_keys(keys: Sequence, descending: bool = False) -> List:
+    """ORDER BY clauses matching ``keyset_condition``"""
+    return [column.desc() if descending else column.asc() for column in keys]
+
+def resolve_count_mode(count: Optional[str], cursor: Optional[str]) -> str:
+    """Default to exact totals for page mode and none for cursor mode"""
+    if count is None:
+        return "none" if cursor else "exact"
+    return count
+
+def build_pagination(
+    rows: List,
+    keys: Sequence,
+    *,
+    page: int,
+    size: int,
+    cursor: Optional[str],
+    total: Optional[int],
+    estimated: bool = False,
+    key_values: Optional[Callable] = None
+) -> Tuple[List, Dict[str, Any]]:
+    """Trim the look-ahead row and build the pagination block"""
+    has_next = len(rows) > size
+    rows = rows[:size]
+    if key_values is None:
+        key_values = lambda row: [getattr(row, column.key) for column in keys]
+    pages = (total + size - 1) // size if total is not None else None
+    pagination = {
+        "page": None if cursor else page,
+        "size": size,
+        "total": total,
+        "pages": pages,
+        "has_next": has_next,
+        "has_previous": bool(cursor) or page > 1,
+        "next_cursor": encode_cursor(keys, key_values(rows[-1])) if has_next and rows else None,
+    }
+    if estimated:
+        pagination["total_estimated"] = True
+    return rows, pagination
+
+def _explain_sql(statement, dialect) -> str:
+    compiled = statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+    return f"EXPLAIN (FORMAT JSON) {compiled}"
+
+def _plan_rows(plan) -> int:
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+async def paginate_async(
+    db,
+    query,
+    keys: Sequence,
+    *,
+    page: int = 1,
+    size: int = 10,
+    cursor: Optional[str] = None,
+    count: Optional[str] = None,
+    descending: bool = False,
+    options: Sequence = (),
+    key_values: Optional[Callable] = None
+) -> Tuple[List, Dict[str, Any]]:
+    """
+    Paginate a 2.0-style ``select()`` on an ``AsyncSession``.
+
+    ``keys`` must be non-null columns that end in a unique one (normally the
+    primary key) so the order is total. When a key lives on a joined table,
+    ``key_values(row)`` must return the key values for a result row.
+    Returns (rows, pagination).
+    """
+    count = resolve_count_mode(count, cursor)
+    total, estimated = None, False
+    if count == "estimated" and db.bind.dialect.name == "postgresql":
+        plan = await db.scalar(text(_explain_sql(query, db.bind.dialect)))
+        total, estimated = _plan_rows(plan), True
+    elif count != "none":
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
+
+    rows_query = query.options(*options).order_by(*order_by_keys(keys, descending))
+    if cursor:
+        rows_query = rows_query.where(
+            keyset_condition(keys, decode_cursor(keys, cursor), descending, db.bind.dialect.name)
+        )
+    else:
+        rows_query = rows_query.offset((page - 1) * size)
+    result = await db.execute(rows_query.limit(size + 1))
+    rows = list(result.scalars().unique().all())
+    return build_pagination(
+        rows, keys, page=page, size=size, cursor=cursor,
+        total=total, estimated=estimated, key_values=key_values
+    )
+
+def paginate(
+    query,
+    keys: Sequence,
+    *,
+    page: int = 1,
+    size: int = 10,
+    cursor: Optional[str] = None,
+    count: Optional[str] = None,
+    descending: bool = False,
+    options: Sequence = (),
+    key_values: Optional[Callable] = None
+) -> Tuple[List, Dict[str, Any]]:
+    """Same as ``paginate_async`` for a legacy ``Session.query()`` on the sync session"""
+    count = resolve_count_mode(count, cursor)
+    total, estimated = None, False
+    dialect = query.session.get_bind().dialect
+    if count == "estimated" and dialect.name == "postgresql":
+        plan = query.session.execute(text(_explain_sql(query.statement, dialect))).scalar()
+        total, estimated = _plan_rows(plan), True
+    elif count != "none":
+        total = query.order_by(None).count()
+
+    rows_query = query.options(*options).order_by(None).order_by(*order_by_keys(keys, descending))
+    if cursor:
+        rows_query = rows_query.filter(
+            keyset_condition(keys, decode_cursor(keys, cursor), descending, dialect.name)
+        )
+    else:
+        rows_query = rows_query.offset((page - 1) * size)
+    rows = rows_query.limit(size + 1).all()
+    return build_pagination(
+        rows, keys, page=page, size=size, cursor=cursor,
+        total=total, estimated=estimated, key_values=key_values
+    )
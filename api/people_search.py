@@ -0,0 +1,291 @@
+"""
+In-process people search: students, teachers and parents by name, email,
+admission number (students) and specialization (teachers)
+
+People are indexed by the trigrams of their words, the way pg_trgm does it:
+each word is padded ("  ann ") and cut into three-letter windows. A query
+scores the share of its trigrams a person has, so "jonh" still finds John
+and "0012" finds ADM0012, and the best candidates are re-ranked so that
+word-prefix and substring matches come first.
+
+The bulk of the index is a posting array per trigram (NumPy CSR), scored
+for a query with one bincount over every person. People added or changed
+since the arrays were built sit in a small overlay scored in Python, and
+the arrays are rebuilt once the overlay passes PEOPLE_INDEX_OVERLAY_LIMIT.
+
+Each worker keeps its own copy. The student, teacher and parent write
+handlers bump a shared tag after committing; on its next search (or the
+next pass of the suggestion refresher, see api/search_suggestions.py) a
+worker re-reads only the people updated since its last sync, plus their
+ids to drop anyone deleted.
+"""
+
+import os
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, or_, select, true
+from sqlalchemy.orm import Session
+
+from api.cache import TagVersions
+from api.database import SessionLocal
+from api.http_cache import RESPONSE_CACHE_TAG_DIR
+from models.models import GradeLevel, Parent, StudentProfile, TeacherProfile, User
+
+# Share of the query's trigrams a match must have: one typo in a short name still passes
+PEOPLE_SEARCH_THRESHOLD = float(os.getenv("PEOPLE_SEARCH_THRESHOLD", "0.5"))
+PEOPLE_INDEX_OVERLAY_LIMIT = int(os.getenv("PEOPLE_INDEX_OVERLAY_LIMIT", "2000"))
+
+PEOPLE_TAG = "people"
+KINDS = ("student", "teacher", "parent")
+# Best trigram scores per kind that are re-ranked for the final order
+RERANK_CANDIDATES = 50
+# A row committed just before a sync read the clock may still have been invisible to it
+_SYNC_OVERLAP = timedelta(minutes=1)
+
+def normalize(text: Any) -> str:
+    """Lower case without accents; anything but letters and digits separates words"""
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return re.sub(r"[\W_]+", " ", text).strip()
+
+def trigrams(text: str) -> frozenset:
+    """pg_trgm-style trigrams of normalized text"""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+@dataclass(eq=False)
+class Person:
+    kind: str
+    id: int
+    result: Dict[str, Any]
+    suggestion: str
+    text: str
+    trigrams: frozenset
+
+    @property
+    def key(self) -> Tuple[str, int]:
+        return self.kind, self.id
+
+def _person(kind: str, id: int, first_name: str, last_name: str, email: str, *searchable, **fields) -> Person:
+    name = f"{first_name} {last_name}"
+    result = {"id": id, "name": name, "email": email, **fields, "type": kind}
+    if kind == "student":
+        suggestion = f"{name} ({fields['admission_number']})"
+    elif kind == "teacher":
+        suggestion = f"{name} - {fields['specialization']}"
+    else:
+        suggestion = name
+    text = normalize(" ".join(str(value) for value in (name, email, *searchable) if value))
+    return Person(kind, id, result, suggestion, text, trigrams(text))
+
+def read_people(db: Session, since=None) -> List[Person]:
+    """Every student, teacher and parent, or only those whose rows changed at or after ``since``"""
+    def changed(profile):
+        return or_(User.updated_at >= since, profile.updated_at >= since) if since is not None else true()
+
+    people = []
+    students = db.execute(
+        select(
+            StudentProfile.id, User.first_name, User.last_name, User.email,
+            StudentProfile.admission_number, GradeLevel.name
+        ).join(User, User.id == StudentProfile.user_id).outerjoin(
+            GradeLevel, GradeLevel.id == StudentProfile.grade_level_id
+        ).where(changed(StudentProfile))
+    )
+    for id, first_name, last_name, email, admission_number, grade_level in students:
+        people.append(_person(
+            "student", id, first_name, last_name, email, admission_number,
+            admission_number=admission_number, grade_level=grade_level
+        ))
+    teachers = db.execute(
+        select(TeacherProfile.id, User.first_name, User.last_name, User.email, TeacherProfile.specialization).join(
+            User, User.id == TeacherProfile.user_id
+        ).where(changed(TeacherProfile))
+    )
+    for id, first_name, last_name, email, specialization in teachers:
+        people.append(_person("teacher", id, first_name, last_name, email, specialization, specialization=specialization))
+    parents = db.execute(
+        select(Parent.id, User.first_name, User.last_name, User.email, Parent.relationship_type).join(
+            User, User.id == Parent.user_id
+        ).where(changed(Parent))
+    )
+    for id, first_name, last_name, email, relationship in parents:
+        people.append(_person("parent", id, first_name, last_name, email, relationship=relationship))
+    return people
+
+class _Postings:
+    """Trigram -> people arrays over a fixed list of people"""
+
+    def __init__(self, people: List[Person]):
+        self.people = people
+        self.position = {person.key: i for i, person in enumerate(people)}
+        self.kinds = np.array([KINDS.index(person.kind) for person in people], dtype=np.int8)
+        self.alive = np.ones(len(people), dtype=bool)
+        self.vocabulary: Dict[str, int] = {}
+        gram_ids, owners = [], []
+        for i, person in enumerate(people):
+            gram_ids.extend(self.vocabulary.setdefault(gram, len(self.vocabulary)) for gram in person.trigrams)
+            owners.extend([i] * len(person.trigrams))
+        gram_ids = np.array(gram_ids, dtype=np.int32)
+        self.indices = np.array(owners, dtype=np.int32)[np.argsort(gram_ids, kind="stable")]
+        self.indptr = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(gram_ids, minlength=len(self.vocabulary)), out=self.indptr[1:])
+
+    def counts(self, grams: Iterable[str]) -> np.ndarray:
+        """How many of ``grams`` each person has"""
+        ids = [self.vocabulary[gram] for gram in grams if gram in self.vocabulary]
+        if not ids:
+            return np.zeros(len(self.people), dtype=np.int64)
+        hits = np.concatenate([self.indices[self.indptr[i]:self.indptr[i + 1]] for i in ids])
+        return np.bincount(hits, minlength=len(self.people))
+
+    def nbytes(self) -> int:
+        return self.indices.nbytes + self.indptr.nbytes + self.kinds.nbytes + self.alive.nbytes
+
+def _rank(text: str, score: float, person: Person):
+    """Sort key: word-prefix matches, then substring matches, then trigram score; shorter text wins ties"""
+    if f" {person.text}".find(f" {text}") >= 0:
+        score += 1.0
+    elif text in person.text:
+        score += 0.5
+    return -score, len(person.text), person.id
+
+class PeopleIndex:
+    """Trigram index over every student, teacher and parent, synced from the database on demand"""
+
+    def __init__(self, tags: TagVersions, session_factory=SessionLocal):
+        self.tags = tags
+        self.session_factory = session_factory
+        self._people: Dict[Tuple[str, int], Person] = {}
+        self._base: Optional[_Postings] = None
+        self._overlay: Dict[Tuple[str, int], Person] = {}
+        self._version = None
+        self._synced_at = None
+        # Bumped whenever a kind's people change, so derived indexes know when to rebuild
+        self.generations = dict.fromkeys(KINDS, 0)
+        # _sync_lock serializes loads and syncs (database reads included);
+        # _lock guards the in-memory state and is only held briefly
+        self._sync_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+    def load(self, if_empty: bool = False) -> int:
+        """Read everyone and build the arrays; returns the number indexed"""
+        with self._sync_lock:
+            if if_empty and self._base is not None:
+                return len(self._people)
+            version = self.tags.get(PEOPLE_TAG)
+            with self.session_factory() as db:
+                synced_at = db.execute(select(func.now())).scalar()
+                people = read_people(db)
+            base = _Postings(people)
+            with self._lock:
+                self._people = {person.key: person for person in people}
+                self._base, self._overlay = base, {}
+                self._version, self._synced_at = version, synced_at
+                for kind in KINDS:
+                    self.generations[kind] += 1
+            return len(people)
+
+    def sync(self) -> int:
+        """Apply the writes made since the last load or sync; returns the people changed or removed"""
+        with self._sync_lock:
+            version = self.tags.get(PEOPLE_TAG)
+            if version == self._version:
+                return 0
+            with self.session_factory() as db:
+                synced_at = db.execute(select(func.now())).scalar()
+                changed = read_people(db, self._synced_at - _SYNC_OVERLAP)
+                present = set()
+                for kind, profile in zip(KINDS, (StudentProfile, TeacherProfile, Parent)):
+                    present.update((kind, id) for id in db.execute(select(profile.id)).scalars())
+            with self._lock:
+                applied = 0
+                for person in changed:
+                    current = self._people.get(person.key)
+                    if current is None or current.result != person.result:
+                        self._replace(person.key, person)
+                        applied += 1
+                for key in [key for key in self._people if key not in present]:
+                    self._replace(key, None)
+                    applied += 1
+                if len(self._overlay) > PEOPLE_INDEX_OVERLAY_LIMIT:
+                    self._base, self._overlay = _Postings(list(self._people.values())), {}
+                self._version, self._synced_at = version, synced_at
+            return applied
+
+    def _replace(self, key: Tuple[str, int], person: Optional[Person]) -> None:
+        self.generations[key[0]] += 1
+        position = self._base.position.get(key)
+        if position is not None:
+            self._base.alive[position] = False
+        if person is None:
+            self._people.pop(key, None)
+            self._overlay.pop(key, None)
+        else:
+            self._people[key] = person
+            self._overlay[key] = person
+
+    def ensure_current(self) -> None:
+        """Load on first use; afterwards sync when another request (in any worker) changed people"""
+        if self._base is None:
+            self.load(if_empty=True)
+        elif self.tags.get(PEOPLE_TAG) != self._version:
+            self.sync()
+
+    def invalidate(self) -> None:
+        """Tell every worker that people changed; call after committing"""
+        self.tags.bump(PEOPLE_TAG)
+
+    def search(self, query: str, kinds: Iterable[str] = KINDS, limit: int = 5) -> Dict[str, List[Person]]:
+        """Best ``limit`` matches of each kind for ``query``, typo tolerant"""
+        self.ensure_current()
+        kinds = list(kinds)
+        text = normalize(query)
+        grams = trigrams(text)
+        found = {kind: [] for kind in kinds}
+        if not grams:
+            return found
+        with self._lock:
+            base = self._base
+            score = base.counts(grams) / len(grams)
+            eligible = base.alive & (score >= PEOPLE_SEARCH_THRESHOLD)
+            for kind in kinds:
+                positions = np.flatnonzero(eligible & (base.kinds == KINDS.index(kind)))
+                if len(positions) > RERANK_CANDIDATES:
+                    positions = positions[np.argpartition(-score[positions], RERANK_CANDIDATES)[:RERANK_CANDIDATES]]
+                found[kind] = [(float(score[i]), base.people[i]) for i in positions]
+            for person in self._overlay.values():
+                if person.kind in found:
+                    overlap = len(grams & person.trigrams) / len(grams)
+                    if overlap >= PEOPLE_SEARCH_THRESHOLD:
+                        found[person.kind].append((overlap, person))
+        return {
+            kind: [person for _, person in sorted(matches, key=lambda match: _rank(text, *match))[:limit]]
+            for kind, matches in found.items()
+        }
+
+    def people(self, kind: str) -> List[Person]:
+        """Everyone of ``kind`` currently indexed"""
+        with self._lock:
+            return [person for person in self._people.values() if person.kind == kind]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "people": len(self._people),
+                "overlay": len(self._overlay),
+                "trigrams": len(self._base.vocabulary) if self._base else 0,
+                "array_bytes": self._base.nbytes() if self._base else 0,
+            }
+
+# Tag files are shared with the response cache so a bump reaches every worker
+people_index = PeopleIndex(TagVersions(RESPONSE_CACHE_TAG_DIR))
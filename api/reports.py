@@ -2,12 +2,23 @@
 PDF Report Generation System
 """
 
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime, date
+from fastapi import APIRouter, HTTPException, Depends, Query, Header, BackgroundTasks
+from fastapi.responses import FileResponse, Response
+from sqlalchemy.orm import Session, contains_eager, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, and_, or_
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, date, time, timedelta
+import time as time_module
 import io
+import json
+import hashlib
+import tempfile
+import uuid
+import asyncio
+import zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -19,23 +30,83 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-from api.database import get_db
+from api.database import get_db, get_async_db, SessionLocal
+from api.cache import TTLCache, DiskCache, TagVersions
+from api.http_cache import RESPONSE_CACHE_TAG_DIR, etag_matches
 from api.auth import require_roles
-from models.models import StudentProfile, Grade, AttendanceRecord, Invoice, User
+from api.models import BulkReportCardRequest
+from api.attendance_rollup import COUNT_COLUMNS, rollup_sums, student_attendance_totals
+from models.models import (
+    StudentProfile, Grade, Assessment, AttendanceDailyRollup,
+    Invoice, InvoiceStatus, Payment, FeeStructure, Term, User
+)
 
 router = APIRouter()
 
-def create_student_report_card(student_id: int, db: Session) -> str:
-    """Generate a PDF report card for a student"""
+def load_report_card_data(db: Session, student_ids: List[int], term: Optional[Term] = None) -> Dict[int, Dict[str, Any]]:
+    """
+    Everything a report card shows for ``student_ids``, as plain picklable
+    dicts keyed by student id. Three queries however many students: the
+    students with user and grade level, their grades with assessment and
+    subject, and attendance totals from the daily rollup.
+    """
+    if not student_ids:
+        return {}
     
-    # Get student data
-    student = db.query(StudentProfile).filter(StudentProfile.id == student_id).first()
-    if not student:
-        raise HTTPException(status_code=404, detail="Student not found")
+    students = db.query(StudentProfile).options(
+        joinedload(StudentProfile.user),
+        joinedload(StudentProfile.grade_level)
+    ).filter(StudentProfile.id.in_(student_ids)).all()
+    
+    data = {
+        student.id: {
+            "student_id": student.id,
+            "first_name": student.user.first_name,
+            "last_name": student.user.last_name,
+            "admission_number": student.admission_number,
+            "grade_level": student.grade_level.name,
+            "academic_year": term.academic_year.name if term else "2024",
+            "term": term.name if term else "Term 1",
+            "grades": [],
+            "attendance": {"total": 0, "present": 0}
+        }
+        for student in students
+    }
+    
+    grades_query = db.query(Grade).join(Grade.assessment).join(Assessment.subject).options(
+        contains_eager(Grade.assessment).contains_eager(Assessment.subject)
+    ).filter(Grade.student_id.in_(student_ids))
+    if term:
+        grades_query = grades_query.filter(Assessment.term_id == term.id)
+    for grade in grades_query.order_by(Grade.student_id, Grade.id):
+        data[grade.student_id]["grades"].append({
+            "subject": grade.assessment.subject.name,
+            "assessment": grade.assessment.name,
+            "score": grade.score,
+            "comments": grade.comments
+        })
+    
+    attendance = student_attendance_totals(
+        db, student_ids,
+        term.start_date if term else None,
+        term.end_date if term else None
+    )
+    for student_id, counts in attendance.items():
+        data[student_id]["attendance"] = {"total": counts["total"], "present": counts["present"]}
+    
+    return data
+
+def render_report_card_pdf(card: Dict[str, Any]) -> bytes:
+    """
+    Build a report card PDF from ``load_report_card_data`` output (no
+    database access). The bytes depend on the card alone: no generation
+    date is drawn and the PDF metadata timestamps are fixed (invariant), so
+    a cached copy is identical to a fresh render.
+    """
     
     # Create PDF buffer
     buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    doc = SimpleDocTemplate(buffer, pagesize=A4, invariant=True)
     styles = getSampleStyleSheet()
     story = []
     
@@ -55,12 +126,11 @@ def create_student_report_card(student_id: int, db: Session) -> str:
     
     # Student Information
     student_info = [
-        ["Student Name:", f"{student.user.first_name} {student.user.last_name}"],
-        ["Admission Number:", student.admission_number],
-        ["Grade Level:", student.grade_level.name],
-        ["Academic Year:", "2024"],
-        ["Term:", "Term 1"],
-        ["Date Generated:", datetime.now().strftime("%B %d, %Y")]
+        ["Student Name:", f"{card['first_name']} {card['last_name']}"],
+        ["Admission Number:", card["admission_number"]],
+        ["Grade Level:", card["grade_level"]],
+        ["Academic Year:", card["academic_year"]],
+        ["Term:", card["term"]]
     ]
     
     student_table = Table(student_info, colWidths=[2*inch, 3*inch])
@@ -78,19 +148,17 @@ def create_student_report_card(student_id: int, db: Session) -> str:
     story.append(Spacer(1, 30))
     
     # Grades Table
-    grades = db.query(Grade).filter(Grade.student_id == student_id).all()
-    
-    if grades:
+    if card["grades"]:
         grades_data = [["Subject", "Assessment", "Score", "Grade", "Comments"]]
         
-        for grade in grades:
-            letter_grade = get_letter_grade(grade.score)
+        for grade in card["grades"]:
+            letter_grade = get_letter_grade(grade["score"])
             grades_data.append([
-                grade.assessment.subject.name,
-                grade.assessment.name,
-                f"{grade.score:.1f}",
+                grade["subject"],
+                grade["assessment"],
+                f"{grade['score']:.1f}",
                 letter_grade,
-                grade.comments or "Good work"
+                grade["comments"] or "Good work"
             ])
         
         grades_table = Table(grades_data, colWidths=[1.5*inch, 2*inch, 0.8*inch, 0.8*inch, 2*inch])
@@ -110,13 +178,9 @@ def create_student_report_card(student_id: int, db: Session) -> str:
         story.append(Spacer(1, 20))
     
     # Attendance Summary
-    attendance_records = db.query(AttendanceRecord).filter(
-        AttendanceRecord.student_id == student_id
-    ).all()
-    
-    if attendance_records:
-        present_days = len([r for r in attendance_records if r.status == "PRESENT"])
-        total_days = len(attendance_records)
+    total_days = card["attendance"]["total"]
+    if total_days:
+        present_days = card["attendance"]["present"]
         attendance_rate = (present_days / total_days * 100) if total_days > 0 else 0
         
         attendance_data = [
@@ -143,7 +207,7 @@ def create_student_report_card(student_id: int, db: Session) -> str:
     # Comments
     story.append(Paragraph("TEACHER COMMENTS", styles['Heading2']))
     story.append(Paragraph(
-        f"{student.user.first_name} has shown excellent progress this term. "
+        f"{card['first_name']} has shown excellent progress this term. "
         f"Keep up the good work and continue to participate actively in class activities.",
         styles['Normal']
     ))
@@ -166,19 +230,222 @@ def create_student_report_card(student_id: int, db: Session) -> str:
     
     # Build PDF
     doc.build(story)
-    buffer.seek(0)
+    return buffer.getvalue()
+
+def report_card_filename(card: Dict[str, Any]) -> str:
+    """File name used on disk and inside bulk ZIP archives"""
+    return f"report_card_{card['admission_number']}_{datetime.now().strftime('%Y%m%d')}.pdf"
+
+# Bump whenever render_report_card_pdf changes what it draws, so cached PDFs are re-rendered
+REPORT_CARD_TEMPLATE_VERSION = 2
+REPORT_CARD_CACHE_DIR = os.getenv("REPORT_CARD_CACHE_DIR", "reports/cache")
+REPORT_CARD_CACHE_MAX_MB = int(os.getenv("REPORT_CARD_CACHE_MAX_MB", "256"))
+report_card_cache = (
+    DiskCache(REPORT_CARD_CACHE_DIR, REPORT_CARD_CACHE_MAX_MB * 1024 * 1024, suffix=".pdf")
+    if REPORT_CARD_CACHE_MAX_MB > 0 else None
+)
+
+def report_card_digest(card: Dict[str, Any]) -> str:
+    """
+    Content address of a report card: its grades, attendance, student
+    details and term plus the template version, i.e. everything the PDF
+    is rendered from
+    """
+    content = dict(card, template_version=REPORT_CARD_TEMPLATE_VERSION)
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+
+# Optional copy of every rendered report card (e.g. for records); empty disables it
+REPORT_ARCHIVE_DIR = os.getenv("REPORT_ARCHIVE_DIR", "")
+REPORT_ARCHIVE_RETENTION_DAYS = int(os.getenv("REPORT_ARCHIVE_RETENTION_DAYS", "30"))
+REPORT_SWEEP_INTERVAL = int(os.getenv("REPORT_SWEEP_INTERVAL", "3600"))
+
+def sweep_report_files(directory: str, max_age_seconds: float) -> int:
+    """Delete files in ``directory`` older than ``max_age_seconds``; returns the count removed"""
+    if not directory or not os.path.isdir(directory):
+        return 0
+    cutoff = time_module.time() - max_age_seconds
+    removed = 0
+    for entry in os.scandir(directory):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            pass
+    return removed
+
+def archive_report_card(card: Dict[str, Any], pdf: bytes) -> Optional[str]:
+    """Keep a copy in REPORT_ARCHIVE_DIR when archiving is enabled; returns its path"""
+    if not REPORT_ARCHIVE_DIR:
+        return None
+    os.makedirs(REPORT_ARCHIVE_DIR, exist_ok=True)
+    # Write-then-rename so concurrent renders of the same card never interleave
+    fd, tmp_path = tempfile.mkstemp(dir=REPORT_ARCHIVE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(pdf)
+    filepath = os.path.join(REPORT_ARCHIVE_DIR, report_card_filename(card))
+    os.replace(tmp_path, filepath)
+    return filepath
+
+def store_report_card(digest: str, card: Dict[str, Any], pdf: bytes) -> None:
+    """Persist a freshly rendered card to the cache and the archive (run after the response is sent)"""
+    if report_card_cache is not None:
+        report_card_cache.set(digest, pdf)
+    archive_report_card(card, pdf)
+
+REPORT_CARD_WORKERS = int(os.getenv("REPORT_CARD_WORKERS", str(os.cpu_count() or 2)))
+REPORT_JOBS_DIR = os.getenv("REPORT_JOBS_DIR", "reports/jobs")
+REPORT_JOB_TTL = int(os.getenv("REPORT_JOB_TTL", "3600"))
+
+def _render_report_card_entry(card: Dict[str, Any]) -> Tuple[str, bytes]:
+    """Process pool entry point: (file name, PDF bytes) for one card"""
+    return report_card_filename(card), render_report_card_pdf(card)
+
+class ReportCardJobs:
+    """
+    Bulk report card generation. Card data is loaded in a few bulk queries,
+    PDFs are rendered in parallel on a process pool and written into a ZIP
+    as each one finishes. Job state lives in JSON files next to the archive
+    so that any API worker can answer progress polls and serve the download.
+    """
+    
+    def __init__(self, max_workers: int, jobs_dir: str, ttl: int):
+        self.max_workers = max_workers
+        self.jobs_dir = jobs_dir
+        self.ttl = ttl
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
     
-    # Save to file
-    filename = f"report_card_{student.admission_number}_{datetime.now().strftime('%Y%m%d')}.pdf"
-    filepath = f"reports/{filename}"
+    def _pool(self) -> ProcessPoolExecutor:
+        # Created on first use so workers that never run a job pay nothing;
+        # spawn avoids forking a process that is running an event loop
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
     
-    # Ensure reports directory exists
-    os.makedirs("reports", exist_ok=True)
+    def _path(self, job_id: str, suffix: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}{suffix}")
     
-    with open(filepath, "wb") as f:
-        f.write(buffer.getvalue())
+    def _save(self, job: Dict[str, Any]) -> None:
+        tmp_path = self._path(job["job_id"], ".json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(job, f)
+        os.replace(tmp_path, self._path(job["job_id"], ".json"))
     
-    return filepath
+    def _sweep(self) -> None:
+        """Delete job files older than the TTL"""
+        sweep_report_files(self.jobs_dir, self.ttl)
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Current state of a job, or None if it is unknown or expired"""
+        if not job_id.isalnum():
+            return None
+        try:
+            with open(self._path(job_id, ".json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def archive_path(self, job_id: str) -> str:
+        return self._path(job_id, ".zip")
+    
+    def submit(self, student_ids: List[int], term_id: Optional[int], requested_by: int) -> Dict[str, Any]:
+        """Record a new job and start it in the background"""
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self._sweep()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "pending",
+            "total": len(student_ids),
+            "completed": 0,
+            "failed": 0,
+            "errors": [],
+            "term_id": term_id,
+            "requested_by": requested_by,
+            "created_at": datetime.utcnow().isoformat(),
+            "finished_at": None
+        }
+        self._save(job)
+        task = asyncio.create_task(self._run(job, student_ids, term_id))
+        self._tasks[job["job_id"]] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job["job_id"], None))
+        return job
+    
+    def _load(self, student_ids: List[int], term_id: Optional[int]) -> Dict[int, Dict[str, Any]]:
+        with SessionLocal() as db:
+            term = None
+            if term_id is not None:
+                term = db.query(Term).options(joinedload(Term.academic_year)).filter(Term.id == term_id).first()
+            return load_report_card_data(db, student_ids, term)
+    
+    async def _run(self, job: Dict[str, Any], student_ids: List[int], term_id: Optional[int]) -> None:
+        part_path = self._path(job["job_id"], ".zip.part")
+        job["status"] = "running"
+        self._save(job)
+        try:
+            cards = await asyncio.to_thread(self._load, student_ids, term_id)
+            job["total"] = len(cards)
+            self._save(job)
+            
+            loop = asyncio.get_running_loop()
+            pool = self._pool()
+            
+            async def render(card):
+                try:
+                    return card, await loop.run_in_executor(pool, _render_report_card_entry, card), None
+                except Exception as e:
+                    return card, None, e
+            
+            # PDFs are already compressed; storing them keeps the archive cheap to write
+            with zipfile.ZipFile(part_path, "w", compression=zipfile.ZIP_STORED) as archive:
+                for next_done in asyncio.as_completed([render(card) for card in cards.values()]):
+                    card, entry, error = await next_done
+                    if error is None:
+                        archive.writestr(*entry)
+                        job["completed"] += 1
+                    else:
+                        logger.error(f"Report card for student {card['student_id']} failed: {error}")
+                        job["failed"] += 1
+                        job["errors"].append({"student_id": card["student_id"], "error": str(error)})
+                    self._save(job)
+            
+            os.replace(part_path, self.archive_path(job["job_id"]))
+            job["status"] = "failed" if job["failed"] and not job["completed"] else "completed"
+        except Exception as e:
+            logger.error(f"Bulk report card job {job['job_id']} failed: {e}")
+            job["status"] = "failed"
+            job["errors"].append({"student_id": None, "error": str(e)})
+            if os.path.exists(part_path):
+                os.remove(part_path)
+        job["finished_at"] = datetime.utcnow().isoformat()
+        self._save(job)
+    
+    def shutdown(self) -> None:
+        """Cancel running jobs and stop the worker processes"""
+        for task in list(self._tasks.values()):
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+report_card_jobs = ReportCardJobs(REPORT_CARD_WORKERS, REPORT_JOBS_DIR, REPORT_JOB_TTL)
+
+async def run_report_sweeper() -> None:
+    """Periodically expire archived report cards and finished bulk jobs"""
+    while True:
+        await asyncio.sleep(REPORT_SWEEP_INTERVAL)
+        try:
+            removed = await asyncio.to_thread(
+                sweep_report_files, REPORT_ARCHIVE_DIR, REPORT_ARCHIVE_RETENTION_DAYS * 86400
+            )
+            removed += await asyncio.to_thread(sweep_report_files, report_card_jobs.jobs_dir, report_card_jobs.ttl)
+            if removed:
+                logger.info(f"Report sweeper removed {removed} files")
+        except Exception as e:
+            logger.error(f"Report sweeper failed: {e}")
 
 def get_letter_grade(score: float) -> str:
     """Convert numeric score to letter grade"""
@@ -200,6 +467,9 @@ def get_letter_grade(score: float) -> str:
 @router.get("/student/{student_id}/report-card")
 async def generate_student_report_card(
     student_id: int,
+    background_tasks: BackgroundTasks,
+    term_id: Optional[int] = Query(None, description="Report on this term (default: all grades and attendance)"),
+    if_none_match: Optional[str] = Header(None),
     current_user = Depends(require_roles(["ADMIN", "TEACHER", "STUDENT", "PARENT"])),
     db: Session = Depends(get_db)
 ):
@@ -211,8 +481,8 @@ async def generate_student_report_card(
         if not student_profile or student_profile.id != student_id:
             raise HTTPException(status_code=403, detail="Not authorized to view this report")
     
-        elif current_user.role == "PARENT":
-            from models.parent import Parent
+    elif current_user.role == "PARENT":
+        from models.parent import Parent
         parent_profile = db.query(Parent).filter(Parent.user_id == current_user.id).first()
         if not parent_profile:
             raise HTTPException(status_code=403, detail="Parent profile not found")
@@ -221,32 +491,171 @@ async def generate_student_report_card(
         if student_id not in student_ids:
             raise HTTPException(status_code=403, detail="Not authorized to view this report")
     
+    term = None
+    if term_id is not None:
+        term = db.query(Term).options(joinedload(Term.academic_year)).filter(Term.id == term_id).first()
+        if not term:
+            raise HTTPException(status_code=404, detail="Term not found")
+    
+    card = load_report_card_data(db, [student_id], term).get(student_id)
+    if not card:
+        raise HTTPException(status_code=404, detail="Student not found")
+    
+    # The PDF is a pure function of the card data, so its digest is a strong
+    # validator: unchanged grades and attendance mean an unchanged download
+    digest = report_card_digest(card)
+    headers = {"ETag": f'"{digest}"', "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    
+    filename = f"report_card_{student_id}.pdf"
     try:
-        filepath = create_student_report_card(student_id, db)
-        return FileResponse(
-            path=filepath,
-            filename=f"report_card_{student_id}.pdf",
-            media_type="application/pdf"
-        )
+        filepath = report_card_cache.get(digest) if report_card_cache is not None else None
+        if filepath is not None:
+            return FileResponse(path=filepath, filename=filename, media_type="application/pdf", headers=headers)
+        
+        # Send the freshly rendered buffer straight from memory; caching and
+        # archiving happen after the response has gone out
+        pdf = await asyncio.to_thread(render_report_card_pdf, card)
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+        background_tasks.add_task(store_report_card, digest, card, pdf)
+        return Response(content=pdf, media_type="application/pdf", headers=headers, background=background_tasks)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating report: {str(e)}")
 
+@router.post("/report-cards/bulk", status_code=202)
+async def generate_bulk_report_cards(
+    request: BulkReportCardRequest,
+    current_user = Depends(require_roles(["ADMIN", "TEACHER"])),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Start rendering report cards for a classroom, grade level or term; poll the returned status URL"""
+    
+    if request.classroom_id is None and request.grade_level_id is None and request.term_id is None:
+        raise HTTPException(status_code=400, detail="Provide a classroom_id, grade_level_id or term_id")
+    
+    if request.term_id is not None and await db.get(Term, request.term_id) is None:
+        raise HTTPException(status_code=404, detail="Term not found")
+    
+    query = select(StudentProfile.id).where(StudentProfile.academic_status == "ACTIVE")
+    if request.classroom_id is not None:
+        query = query.where(StudentProfile.classroom_id == request.classroom_id)
+    if request.grade_level_id is not None:
+        query = query.where(StudentProfile.grade_level_id == request.grade_level_id)
+    student_ids = list((await db.scalars(query.order_by(StudentProfile.id))).all())
+    
+    if not student_ids:
+        raise HTTPException(status_code=404, detail="No active students match the selection")
+    
+    job = report_card_jobs.submit(student_ids, request.term_id, current_user.id)
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "total": job["total"],
+        "status_url": f"/api/v1/reports/report-cards/jobs/{job['job_id']}",
+        "download_url": f"/api/v1/reports/report-cards/jobs/{job['job_id']}/download"
+    }
+
+def _requested_job(job_id: str, current_user) -> Dict[str, Any]:
+    """A bulk report card job, visible only to the user who started it and to admins"""
+    job = report_card_jobs.get(job_id)
+    if not job or (job["requested_by"] != current_user.id and current_user.role != "ADMIN"):
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+@router.get("/report-cards/jobs/{job_id}")
+async def get_bulk_report_card_job(
+    job_id: str,
+    current_user = Depends(require_roles(["ADMIN", "TEACHER"]))
+):
+    """Progress of a bulk report card job"""
+    
+    return _requested_job(job_id, current_user)
+
+@router.get("/report-cards/jobs/{job_id}/download")
+async def download_bulk_report_cards(
+    job_id: str,
+    current_user = Depends(require_roles(["ADMIN", "TEACHER"]))
+):
+    """Stream the ZIP of a finished bulk report card job"""
+    
+    job = _requested_job(job_id, current_user)
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    return FileResponse(
+        path=report_card_jobs.archive_path(job_id),
+        filename=f"report_cards_{job_id}.zip",
+        media_type="application/zip"
+    )
+
+def _week_start(column, dialect_name: str):
+    """Monday of the week containing ``column`` (a DATE)"""
+    if dialect_name == "postgresql":
+        return func.date(func.date_trunc("week", column))
+    # SQLite: forward to Sunday (same day if already Sunday), back six days
+    return func.date(column, "weekday 0", "-6 days")
+
+def class_attendance_counts(db: Session, classroom_id: int, start_date: date, end_date: date, weekly: bool = False):
+    """
+    Attendance counts for every student in a classroom as one statement over
+    the daily rollup: a row per student (and week) with present, absent,
+    late, excused and total columns. Students without attendance in the
+    range come back once with zero counts.
+    """
+    group = [AttendanceDailyRollup.student_id]
+    if weekly:
+        group.append(_week_start(AttendanceDailyRollup.date, db.get_bind().dialect.name).label("week_start"))
+    counts = select(*group, *rollup_sums()).join(
+        StudentProfile, StudentProfile.id == AttendanceDailyRollup.student_id
+    ).where(
+        StudentProfile.classroom_id == classroom_id,
+        AttendanceDailyRollup.date >= start_date,
+        AttendanceDailyRollup.date <= end_date
+    ).group_by(*group).subquery()
+    
+    columns = [
+        StudentProfile.id,
+        User.first_name,
+        User.last_name,
+        StudentProfile.admission_number,
+        *(func.coalesce(counts.c[column], 0).label(column) for column in COUNT_COLUMNS)
+    ]
+    if weekly:
+        columns.append(counts.c.week_start)
+    return db.query(*columns).join(
+        User, User.id == StudentProfile.user_id
+    ).outerjoin(
+        counts, counts.c.student_id == StudentProfile.id
+    ).filter(StudentProfile.classroom_id == classroom_id).order_by(StudentProfile.id).all()
+
+def _attendance_stats(counts: Dict[str, int]) -> Dict[str, Any]:
+    total_days = counts.get("total", 0)
+    present_days = counts.get("present", 0)
+    return {
+        "total_days": total_days,
+        "present_days": present_days,
+        "absent_days": counts.get("absent", 0),
+        "late_days": counts.get("late", 0),
+        "attendance_percentage": round(present_days / total_days * 100, 2) if total_days > 0 else 0
+    }
+
+def _add_counts(target: Dict[str, int], row) -> None:
+    for column in COUNT_COLUMNS:
+        target[column] = target.get(column, 0) + getattr(row, column)
+
 @router.get("/attendance/class/{classroom_id}")
 async def generate_attendance_report(
     classroom_id: int,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
+    weekly: bool = Query(False, description="Add a per-week breakdown for each student and the class"),
     current_user = Depends(require_roles(["ADMIN", "TEACHER"])),
     db: Session = Depends(get_db)
 ):
     """Generate attendance report for a classroom"""
     
     try:
-        from models.school import ClassRoom
-        from models.student import Student
-        from models.grades import AttendanceRecord
-        from sqlalchemy import and_, func
-        from datetime import datetime, timedelta
+        from models.student import ClassRoom
         
         # Parse date range
         if date_from:
@@ -264,46 +673,43 @@ async def generate_attendance_report(
         if not classroom:
             raise HTTPException(status_code=404, detail="Classroom not found")
         
-        # Get students in the classroom
-        students = db.query(Student).filter(Student.classroom_id == classroom_id).all()
-        
-        # Get attendance records for the date range
-        attendance_records = db.query(AttendanceRecord).filter(
-            and_(
-                AttendanceRecord.student_id.in_([s.id for s in students]),
-                AttendanceRecord.date >= start_date,
-                AttendanceRecord.date <= end_date
-            )
-        ).all()
+        # Counts for every student in one grouped query over the rollup
+        students: Dict[int, Dict[str, Any]] = {}
+        class_weeks: Dict[str, Dict[str, int]] = {}
+        for row in class_attendance_counts(db, classroom_id, start_date, end_date, weekly):
+            student = students.setdefault(row.id, {
+                "name": f"{row.first_name} {row.last_name}",
+                "number": row.admission_number,
+                "counts": {},
+                "weeks": {}
+            })
+            _add_counts(student["counts"], row)
+            if weekly and row.week_start is not None:
+                week = str(row.week_start)
+                _add_counts(student["weeks"].setdefault(week, {}), row)
+                _add_counts(class_weeks.setdefault(week, {}), row)
         
         # Calculate attendance statistics
         attendance_data = []
-        for student in students:
-            student_attendance = [r for r in attendance_records if r.student_id == student.id]
-            
-            total_days = len(student_attendance)
-            present_days = len([r for r in student_attendance if r.status == "PRESENT"])
-            absent_days = len([r for r in student_attendance if r.status == "ABSENT"])
-            late_days = len([r for r in student_attendance if r.status == "LATE"])
-            
-            attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
-            
-            attendance_data.append({
-                "student_id": student.id,
-                "student_name": f"{student.user.first_name} {student.user.last_name}",
-                "student_number": student.student_number,
-                "total_days": total_days,
-                "present_days": present_days,
-                "absent_days": absent_days,
-                "late_days": late_days,
-                "attendance_percentage": round(attendance_percentage, 2)
-            })
+        for student_id, student in students.items():
+            entry = {
+                "student_id": student_id,
+                "student_name": student["name"],
+                "student_number": student["number"],
+                **_attendance_stats(student["counts"])
+            }
+            if weekly:
+                entry["weekly"] = [
+                    {"week_start": week, **_attendance_stats(counts)}
+                    for week, counts in sorted(student["weeks"].items())
+                ]
+            attendance_data.append(entry)
         
         # Calculate classroom summary
-        total_students = len(students)
+        total_students = len(attendance_data)
         avg_attendance = sum(s["attendance_percentage"] for s in attendance_data) / total_students if total_students > 0 else 0
         
-        return {
+        report = {
             "classroom": {
                 "id": classroom.id,
                 "name": classroom.name,
@@ -320,115 +726,167 @@ async def generate_attendance_report(
             },
             "student_attendance": attendance_data
         }
+        if weekly:
+            report["weekly_summary"] = [
+                {"week_start": week, **_attendance_stats(counts)}
+                for week, counts in sorted(class_weeks.items())
+            ]
+        return report
         
+    except HTTPException:
+        raise
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
     except Exception as e:
         logger.error(f"Error generating attendance report: {str(e)}")
         raise HTTPException(status_code=500, detail="Error generating attendance report")
 
+# Financial summaries are cached per scope in each worker; invoice, payment
+# and fee structure writes call invalidate_financial_summary(), which bumps a
+# tag every worker checks before serving a cached summary
+FINANCIAL_REPORT_CACHE_TTL = int(os.getenv("FINANCIAL_REPORT_CACHE_TTL", "300"))
+FINANCIAL_SUMMARY_TAG = "financial-summary"
+financial_summary_cache = TTLCache(maxsize=256, ttl=FINANCIAL_REPORT_CACHE_TTL)
+financial_summary_tags = TagVersions(RESPONSE_CACHE_TAG_DIR)
+
+def invalidate_financial_summary():
+    """Drop every cached financial summary, in every worker"""
+    financial_summary_cache.clear()
+    financial_summary_tags.bump(FINANCIAL_SUMMARY_TAG)
+
+def _money(value) -> float:
+    return round(float(value or 0), 2)
+
 @router.get("/financial/summary")
 async def generate_financial_report(
+    term_id: Optional[int] = Query(None, description="Scope to a term's date range"),
+    date_from: Optional[date] = Query(None, description="Scope start (overrides the term start)"),
+    date_to: Optional[date] = Query(None, description="Scope end, inclusive (overrides the term end)"),
     current_user = Depends(require_roles(["ADMIN"])),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Generate financial summary report"""
+    """
+    Generate financial summary report
+
+    Every figure is a SQL aggregate (conditional SUM/COUNT with FILTER), so
+    no invoice or payment rows are loaded. A scope limits invoices by issue
+    date, payments by payment date and fee structures by term.
+    """
+    current_date = date.today()
+    if term_id is not None:
+        term = await db.get(Term, term_id)
+        if not term:
+            raise HTTPException(status_code=404, detail="Term not found")
+        date_from = date_from or term.start_date
+        date_to = date_to or term.end_date
+    
+    cache_key = (term_id, date_from, date_to, current_date)
+    # Read before computing, so a write made meanwhile still invalidates the result
+    version = financial_summary_tags.get(FINANCIAL_SUMMARY_TAG)
+    cached = financial_summary_cache.get(cache_key)
+    if cached is not None and cached[1] == version:
+        return cached[0]
     
     try:
-        from models.payments import Invoice, Payment, FeeStructure
-        from models.student import Student
-        from sqlalchemy import func, and_
-        from datetime import datetime, timedelta
-        
-        # Get current academic year (assuming we have a way to determine this)
-        current_date = datetime.now().date()
-        
-        # Get all invoices
-        all_invoices = db.query(Invoice).all()
-        
-        # Calculate financial summary
-        total_invoices = len(all_invoices)
-        total_invoice_amount = sum(invoice.amount for invoice in all_invoices)
-        
-        # Get paid invoices
-        paid_invoices = [inv for inv in all_invoices if inv.status == "PAID"]
-        paid_amount = sum(invoice.amount for invoice in paid_invoices)
-        
-        # Get pending invoices
-        pending_invoices = [inv for inv in all_invoices if inv.status == "PENDING"]
-        pending_amount = sum(invoice.amount for invoice in pending_invoices)
-        
-        # Get overdue invoices (assuming due_date is a string, convert to date)
-        overdue_invoices = []
-        for invoice in pending_invoices:
-            try:
-                due_date = datetime.strptime(invoice.due_date, "%Y-%m-%d").date()
-                if due_date < current_date:
-                    overdue_invoices.append(invoice)
-            except (ValueError, TypeError):
-                continue
-        
-        overdue_amount = sum(invoice.amount for invoice in overdue_invoices)
+        # Invoices, scoped by issue date
+        invoice_scope = []
+        if date_from:
+            invoice_scope.append(Invoice.created_at >= datetime.combine(date_from, time.min))
+        if date_to:
+            invoice_scope.append(Invoice.created_at < datetime.combine(date_to + timedelta(days=1), time.min))
         
-        # Get payment statistics
-        all_payments = db.query(Payment).all()
-        total_payments = len(all_payments)
-        total_payment_amount = sum(payment.amount for payment in all_payments)
+        paid = Invoice.status == InvoiceStatus.PAID
+        pending = Invoice.status == InvoiceStatus.PENDING
+        overdue = or_(
+            Invoice.status == InvoiceStatus.OVERDUE,
+            and_(pending, Invoice.due_date < current_date)
+        )
+        invoice_totals = (await db.execute(
+            select(
+                func.count(Invoice.id),
+                func.sum(Invoice.amount),
+                func.count(Invoice.id).filter(paid),
+                func.sum(Invoice.amount).filter(paid),
+                func.count(Invoice.id).filter(pending),
+                func.sum(Invoice.amount).filter(pending),
+                func.count(Invoice.id).filter(overdue),
+                func.sum(Invoice.amount).filter(overdue)
+            ).where(*invoice_scope)
+        )).one()
+        (total_invoices, total_invoice_amount, paid_count, paid_amount,
+         pending_count, pending_amount, overdue_count, overdue_amount) = invoice_totals
         
-        # Payment method breakdown
-        payment_methods = {}
-        for payment in all_payments:
-            method = payment.payment_method
-            if method not in payment_methods:
-                payment_methods[method] = {"count": 0, "amount": 0}
-            payment_methods[method]["count"] += 1
-            payment_methods[method]["amount"] += payment.amount
+        # Payments, scoped by payment date
+        payment_scope = []
+        if date_from:
+            payment_scope.append(Payment.payment_date >= date_from)
+        if date_to:
+            payment_scope.append(Payment.payment_date <= date_to)
         
-        # Recent payments (last 30 days)
-        thirty_days_ago = current_date - timedelta(days=30)
-        recent_payments = []
-        for payment in all_payments:
-            try:
-                payment_date = datetime.strptime(payment.created_at, "%Y-%m-%dT%H:%M:%S").date()
-                if payment_date >= thirty_days_ago:
-                    recent_payments.append(payment)
-            except (ValueError, TypeError):
-                continue
+        recent = Payment.payment_date >= current_date - timedelta(days=30)
+        total_payments, total_payment_amount, recent_count, recent_amount = (await db.execute(
+            select(
+                func.count(Payment.id),
+                func.sum(Payment.amount),
+                func.count(Payment.id).filter(recent),
+                func.sum(Payment.amount).filter(recent)
+            ).where(*payment_scope)
+        )).one()
         
-        recent_payment_amount = sum(payment.amount for payment in recent_payments)
+        method_rows = await db.execute(
+            select(Payment.payment_method, func.count(Payment.id), func.sum(Payment.amount))
+            .where(*payment_scope)
+            .group_by(Payment.payment_method)
+        )
+        payment_methods = {
+            getattr(method, "value", method): {"count": count, "amount": _money(amount)}
+            for method, count, amount in method_rows
+        }
         
-        # Fee structure summary
-        fee_structures = db.query(FeeStructure).all()
-        fee_breakdown = {}
-        for fee in fee_structures:
-            fee_breakdown[fee.name] = {
-                "amount": fee.amount,
-                "grade_level": fee.grade_level,
-                "is_active": fee.is_active
-            }
+        # Fee structures by type, scoped by term
+        fee_query = select(
+            FeeStructure.fee_type, func.count(FeeStructure.id), func.sum(FeeStructure.amount)
+        ).group_by(FeeStructure.fee_type)
+        if term_id is not None:
+            fee_query = fee_query.where(FeeStructure.term_id == term_id)
+        fee_breakdown = {
+            getattr(fee_type, "value", fee_type): {"count": count, "amount": _money(amount)}
+            for fee_type, count, amount in await db.execute(fee_query)
+        }
         
-        return {
+        total_invoice_amount = _money(total_invoice_amount)
+        paid_amount = _money(paid_amount)
+        report = {
+            "scope": {
+                "term_id": term_id,
+                "date_from": date_from.isoformat() if date_from else None,
+                "date_to": date_to.isoformat() if date_to else None
+            },
             "summary": {
                 "total_invoices": total_invoices,
-                "total_invoice_amount": round(total_invoice_amount, 2),
-                "paid_amount": round(paid_amount, 2),
-                "pending_amount": round(pending_amount, 2),
-                "overdue_amount": round(overdue_amount, 2),
+                "total_invoice_amount": total_invoice_amount,
+                "paid_amount": paid_amount,
+                "pending_amount": _money(pending_amount),
+                "overdue_amount": _money(overdue_amount),
                 "collection_rate": round((paid_amount / total_invoice_amount * 100), 2) if total_invoice_amount > 0 else 0
             },
             "payments": {
                 "total_payments": total_payments,
-                "total_payment_amount": round(total_payment_amount, 2),
-                "recent_payments_30_days": len(recent_payments),
-                "recent_payment_amount": round(recent_payment_amount, 2),
+                "total_payment_amount": _money(total_payment_amount),
+                "recent_payments_30_days": recent_count,
+                "recent_payment_amount": _money(recent_amount),
                 "payment_methods": payment_methods
             },
             "invoices": {
-                "paid_count": len(paid_invoices),
-                "pending_count": len(pending_invoices),
-                "overdue_count": len(overdue_invoices)
+                "paid_count": paid_count,
+                "pending_count": pending_count,
+                "overdue_count": overdue_count
             },
             "fee_structures": fee_breakdown,
             "generated_at": current_date.isoformat()
         }
+        financial_summary_cache.set(cache_key, (report, version))
+        return report
         
     except Exception as e:
         logger.error(f"Error generating financial report: {str(e)}")
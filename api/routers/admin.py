@@ -11,8 +11,10 @@ from sqlalchemy import func, desc
 from typing import List, Optional
 import os
 
-from api.auth import get_current_user, require_role
+from api.auth import get_current_user, require_role, invalidate_user_cache
 from api.database import get_db
+from api.dashboard_stats import get_dashboard_stats, invalidate_dashboard_stats
+from api.people_search import people_index
 from models.models import (
     User, StudentProfile, TeacherProfile, Parent, GradeLevel, ClassRoom,
     Dormitory, Subject, AcademicYear, Term, Assessment, Grade,
@@ -27,20 +29,11 @@ templates = Jinja2Templates(directory="templates")
 @router.get("/", response_class=HTMLResponse)
 async def admin_dashboard(
     request: Request,
-    current_user: User = Depends(require_role("ADMIN")),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_role("ADMIN"))
 ):
     """Admin dashboard"""
     # Get statistics
-    stats = {
-        "total_students": db.query(StudentProfile).count(),
-        "total_teachers": db.query(TeacherProfile).count(),
-        "total_parents": db.query(Parent).count(),
-        "active_students": db.query(StudentProfile).filter(StudentProfile.academic_status == "ACTIVE").count(),
-        "total_classes": db.query(ClassRoom).count(),
-        "total_invoices": db.query(Invoice).count(),
-        "pending_invoices": db.query(Invoice).filter(Invoice.status == "PENDING").count(),
-    }
+    stats = await get_dashboard_stats()
     
     return templates.TemplateResponse("admin/dashboard.html", {
         "request": request,
@@ -279,13 +272,13 @@ async def create_user(
         raise HTTPException(status_code=400, detail="Email already exists")
     
     # Create user
-    from api.auth import get_password_hash
+    from api.security import password_hasher
     user = User(
         username=username,
         email=email,
         first_name=first_name,
         last_name=last_name,
-        password_hash=get_password_hash(password),
+        password_hash=await password_hasher.hash(password),
         role=role
     )
     
@@ -306,8 +299,12 @@ async def delete_user(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
+    username = user.username
     db.delete(user)
     db.commit()
+    invalidate_dashboard_stats()
+    people_index.invalidate()
+    invalidate_user_cache(username)
     
     return {"message": "User deleted successfully"}
 
@@ -324,5 +321,6 @@ async def toggle_user_active(
     
     user.is_active = not user.is_active
     db.commit()
+    invalidate_user_cache(user.username)
     
     return {"message": f"User {'activated' if user.is_active else 'deactivated'}"}
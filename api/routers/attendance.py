@@ -4,16 +4,22 @@ Attendance management endpoints
 
 from fastapi import APIRouter, HTTPException, status, Depends, Query
 from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy.orm import Session, contains_eager, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, func, select, insert, update
 
 from api.models import (
     AttendanceSessionCreate, AttendanceSessionUpdate, AttendanceSessionResponse,
     AttendanceRecordCreate, AttendanceRecordUpdate, AttendanceRecordResponse,
+    AttendanceBulkCreate, AttendanceBulkResult, AttendanceBulkResponse,
     PaginationParams, PaginatedResponse, BaseResponse
 )
 from api.auth import get_current_user, require_roles
-from api.database import get_db
+from api.database import get_db, get_async_db
+from api.pagination import paginate_async, COUNT_PATTERN
+from api.attendance_rollup import (
+    apply_rollup_changes, rollup_record_added, rollup_record_removed, rollup_status_changed, status_column
+)
 from models.models import AttendanceSession, AttendanceRecord, StudentProfile, ClassRoom, User
 
 router = APIRouter()
@@ -49,7 +55,9 @@ async def get_attendance_sessions(
     
     # Apply pagination
     offset = (page - 1) * size
-    sessions_query = query.offset(offset).limit(size).all()
+    sessions_query = query.options(
+        joinedload(AttendanceSession.classroom)
+    ).offset(offset).limit(size).all()
     
     sessions = []
     for session in sessions_query:
@@ -134,16 +142,18 @@ async def create_attendance_session(
 async def get_attendance_records(
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: Optional[str] = Query(None, pattern=COUNT_PATTERN),
     student_id: Optional[int] = Query(None),
     session_id: Optional[int] = Query(None),
     status: Optional[str] = Query(None),
     current_user = Depends(require_roles(["ADMIN", "TEACHER"])),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get list of attendance records with pagination and filtering
     """
-    query = db.query(AttendanceRecord).join(StudentProfile).join(User)
+    query = select(AttendanceRecord).join(StudentProfile).join(User)
     
     # Apply filters
     if student_id:
@@ -155,12 +165,15 @@ async def get_attendance_records(
     if status:
         query = query.filter(AttendanceRecord.status == status)
     
-    # Get total count
-    total = query.count()
-    
-    # Apply pagination
-    offset = (page - 1) * size
-    records_query = query.offset(offset).limit(size).all()
+    # Keyset pagination on the primary key (page/offset still accepted)
+    records_query, pagination = await paginate_async(
+        db, query, [AttendanceRecord.id],
+        page=page, size=size, cursor=cursor, count=count,
+        options=[
+            contains_eager(AttendanceRecord.student).contains_eager(StudentProfile.user),
+            joinedload(AttendanceRecord.session).joinedload(AttendanceSession.classroom)
+        ]
+    )
     
     records = []
     for record in records_query:
@@ -188,20 +201,9 @@ async def get_attendance_records(
             "updated_at": record.updated_at
         })
     
-    pages = (total + size - 1) // size
-    has_next = page < pages
-    has_previous = page > 1
-    
     return PaginatedResponse(
         data=records,
-        pagination={
-            "page": page,
-            "size": size,
-            "total": total,
-            "pages": pages,
-            "has_next": has_next,
-            "has_previous": has_previous
-        }
+        pagination=pagination
     )
 
 @router.post("/records", response_model=AttendanceRecordResponse)
@@ -249,6 +251,7 @@ async def create_attendance_record(
     )
     
     db.add(record)
+    rollup_record_added(db, record, session)
     db.commit()
     db.refresh(record)
     
@@ -276,6 +279,103 @@ async def create_attendance_record(
         updated_at=record.updated_at
     )
 
+@router.post("/sessions/{session_id}/records:bulk", response_model=AttendanceBulkResponse)
+async def bulk_mark_attendance(
+    session_id: int,
+    bulk_data: AttendanceBulkCreate,
+    current_user = Depends(require_roles(["ADMIN", "TEACHER"])),
+    db: Session = Depends(get_db)
+):
+    """
+    Mark a whole register in one transaction: creates missing records and
+    updates existing ones. Each row gets its own result; rows for unknown
+    students or students outside the session's classroom are reported as
+    errors without failing the rest.
+    """
+    # Lock the session row so two teachers marking the same register at
+    # once cannot both insert a record for the same student (no-op on SQLite)
+    session = db.query(AttendanceSession).filter(AttendanceSession.id == session_id).with_for_update().first()
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Attendance session not found"
+        )
+    
+    student_ids = {item.student_id for item in bulk_data.records}
+    
+    # Validate the roster in one query
+    classrooms = dict(db.query(StudentProfile.id, StudentProfile.classroom_id).filter(
+        StudentProfile.id.in_(student_ids)
+    ).all())
+    
+    # Existing records for these students in this session
+    existing = {
+        row.student_id: row
+        for row in db.query(AttendanceRecord.id, AttendanceRecord.student_id, AttendanceRecord.status, AttendanceRecord.notes).filter(
+            AttendanceRecord.session_id == session_id,
+            AttendanceRecord.student_id.in_(student_ids)
+        )
+    }
+    
+    results = {}
+    inserts, updates = [], []
+    rollup_changes = {}
+    seen = set()
+    for index, item in enumerate(bulk_data.records):
+        if item.student_id in seen:
+            results[index] = AttendanceBulkResult(student_id=item.student_id, result="error", error="Duplicate student in request")
+            continue
+        seen.add(item.student_id)
+        if item.student_id not in classrooms:
+            results[index] = AttendanceBulkResult(student_id=item.student_id, result="error", error="Student not found")
+            continue
+        if classrooms[item.student_id] != session.classroom_id:
+            results[index] = AttendanceBulkResult(student_id=item.student_id, result="error", error="Student is not in this session's classroom")
+            continue
+        
+        record = existing.get(item.student_id)
+        if record is None:
+            inserts.append((index, {
+                "student_id": item.student_id,
+                "session_id": session_id,
+                "status": item.status,
+                "notes": item.notes
+            }))
+            rollup_changes[item.student_id] = {status_column(item.status): 1, "total": 1}
+        elif record.status == item.status and record.notes == item.notes:
+            results[index] = AttendanceBulkResult(student_id=item.student_id, result="unchanged", record_id=record.id)
+        else:
+            updates.append({"id": record.id, "status": item.status, "notes": item.notes})
+            results[index] = AttendanceBulkResult(student_id=item.student_id, result="updated", record_id=record.id)
+            if record.status != item.status:
+                rollup_changes[item.student_id] = {status_column(record.status): -1, status_column(item.status): 1}
+    
+    # executemany for both statements, then a single commit
+    if inserts:
+        created = db.execute(
+            insert(AttendanceRecord).returning(AttendanceRecord.id, AttendanceRecord.student_id),
+            [values for _, values in inserts]
+        ).all()
+        record_ids = {row.student_id: row.id for row in created}
+        for index, values in inserts:
+            results[index] = AttendanceBulkResult(
+                student_id=values["student_id"], result="created", record_id=record_ids[values["student_id"]]
+            )
+    if updates:
+        db.execute(update(AttendanceRecord), updates)
+    apply_rollup_changes(db, session.classroom_id, session.date, rollup_changes)
+    db.commit()
+    
+    ordered = [results[index] for index in range(len(bulk_data.records))]
+    return AttendanceBulkResponse(
+        session_id=session_id,
+        created=sum(1 for r in ordered if r.result == "created"),
+        updated=sum(1 for r in ordered if r.result == "updated"),
+        unchanged=sum(1 for r in ordered if r.result == "unchanged"),
+        failed=sum(1 for r in ordered if r.result == "error"),
+        results=ordered
+    )
+
 @router.put("/records/{record_id}", response_model=AttendanceRecordResponse)
 async def update_attendance_record(
     record_id: int,
@@ -294,10 +394,13 @@ async def update_attendance_record(
         )
     
     # Update fields
+    old_status = record.status
     update_data = record_data.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(record, field, value)
     
+    if "status" in update_data:
+        rollup_status_changed(db, record, record.session, old_status)
     db.commit()
     db.refresh(record)
     
@@ -341,6 +444,7 @@ async def delete_attendance_record(
             detail="Attendance record not found"
         )
     
+    rollup_record_removed(db, record, record.session)
     db.delete(record)
     db.commit()
     
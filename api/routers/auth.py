@@ -5,19 +5,20 @@ Authentication endpoints
 from fastapi import APIRouter, HTTPException, status, Depends
 from datetime import timedelta
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from api.models import LoginRequest, TokenResponse, UserResponse
-from api.auth import authenticate_user, create_access_token, get_current_user, ACCESS_TOKEN_EXPIRE_MINUTES, get_password_hash
-from api.database import get_db
+from api.auth import authenticate_user, create_user_token, get_current_user, ACCESS_TOKEN_EXPIRE_MINUTES, get_password_hash
+from api.database import get_db, get_async_db
 from models.models import User
 
 router = APIRouter()
 
 @router.post("/login", response_model=TokenResponse)
-async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(login_data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Authenticate user and return JWT token
     """
-    user = authenticate_user(db, login_data.username, login_data.password)
+    user = await authenticate_user(db, login_data.username, login_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -32,9 +33,7 @@ async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
         )
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
-    )
+    access_token = create_user_token(user, expires_delta=access_token_expires)
     
     return TokenResponse(
         access_token=access_token,
@@ -83,9 +82,7 @@ async def refresh_token(current_user = Depends(get_current_user)):
     Refresh JWT token
     """
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": current_user.username}, expires_delta=access_token_expires
-    )
+    access_token = create_user_token(current_user, expires_delta=access_token_expires)
     
     return TokenResponse(
         access_token=access_token,
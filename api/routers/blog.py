@@ -2,10 +2,10 @@
 Blog and news management endpoints
 """
 
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Header
 from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, asc
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, or_, desc, asc, false
 from api.models import (
     BlogPostCreate, BlogPostUpdate, BlogPostResponse,
     PostCommentCreate, PostCommentResponse,
@@ -13,10 +13,21 @@ from api.models import (
 )
 from api.auth import get_current_user, require_roles
 from api.database import get_db
+from api import blog_search
+from api.http_cache import (
+    PUBLIC_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL, cached_response, response_cache, timestamp
+)
+from api.view_counts import view_counts
 from models.models import BlogPost, PostComment, User
 
 router = APIRouter()
 
+# Response cache tags: every listing page, and one post's detail by slug
+BLOG_LIST_TAG = "blog:list"
+
+def _post_tag(slug: str) -> str:
+    return f"blog:post:{slug}"
+
 @router.get("/", response_model=PaginatedResponse)
 async def get_blog_posts(
     page: int = Query(1, ge=1),
@@ -24,19 +35,36 @@ async def get_blog_posts(
     search: Optional[str] = Query(None),
     category: Optional[str] = Query(None),
     status: Optional[str] = Query("PUBLISHED"),
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
     """
-    Get list of blog posts with pagination and filtering
+    Get list of blog posts with pagination and filtering (served from the response cache)
+
+    With ``search`` the posts come from the full-text index, best match
+    first, each with a highlighted ``snippet``.
     """
+    cache_key = (BLOG_LIST_TAG, page, size, search, category, status)
+    entry = response_cache.get(cache_key)
+    if entry is not None:
+        return cached_response(entry, PUBLIC_CACHE_CONTROL, if_none_match, if_modified_since)
+
+    versions = response_cache.versions([BLOG_LIST_TAG])
     query = db.query(BlogPost)
+    terms = blog_search.search_terms(search) if search and blog_search.is_supported(db) else []
 
     # Apply filters
-    if search:
+    if terms:
+        query = query.filter(BlogPost.id.in_(blog_search.matching_posts(db, terms)))
+    elif search and blog_search.is_supported(db):
+        # Nothing searchable in it (only punctuation)
+        query = query.filter(false())
+    elif search:
         query = query.filter(
             or_(
                 BlogPost.title.ilike(f"%{search}%"),
-                BlogPost.content.ilike(f"%{search}%"),
+                BlogPost.search_text.ilike(f"%{search}%"),
                 BlogPost.excerpt.ilike(f"%{search}%")
             )
         )
@@ -47,15 +75,21 @@ async def get_blog_posts(
     if status:
         query = query.filter(BlogPost.status == status)
 
-    # Order by published date (newest first)
-    query = query.order_by(desc(BlogPost.published_at))
-
     # Get total count
     total = query.count()
 
+    # Order by relevance when searching, then by published date (newest first)
+    if terms:
+        ranked = blog_search.ranked_posts(db, terms)
+        query = query.join(ranked, ranked.c.post_id == BlogPost.id).order_by(ranked.c.rank)
+    query = query.order_by(desc(BlogPost.published_at))
+
     # Apply pagination
     offset = (page - 1) * size
-    posts_query = query.offset(offset).limit(size).all()
+    posts_query = query.options(
+        joinedload(BlogPost.author)
+    ).offset(offset).limit(size).all()
+    highlights = blog_search.snippets(db, terms, [post.id for post in posts_query])
 
     posts = []
     for post in posts_query:
@@ -81,14 +115,15 @@ async def get_blog_posts(
             meta_title=post.meta_title,
             meta_description=post.meta_description,
             created_at=post.created_at,
-            updated_at=post.updated_at
+            updated_at=post.updated_at,
+            snippet=highlights.get(post.id)
         ).dict())
 
     pages = (total + size - 1) // size
     has_next = page < pages
     has_previous = page > 1
 
-    return PaginatedResponse(
+    response = PaginatedResponse(
         data=posts,
         pagination={
             "page": page,
@@ -99,15 +134,37 @@ async def get_blog_posts(
             "has_previous": has_previous
         }
     )
+    last_modified = max([timestamp(post.updated_at or post.created_at) for post in posts_query], default=0.0)
+    entry = response_cache.set(cache_key, [BLOG_LIST_TAG], versions, response, last_modified)
+    return cached_response(entry, PUBLIC_CACHE_CONTROL, if_none_match, if_modified_since)
 
 @router.get("/{slug}", response_model=BlogPostResponse)
 async def get_blog_post(
     slug: str,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
     """
-    Get a specific blog post by slug
+    Get a specific blog post by slug (served from the response cache)
+
+    Every request reaches the app, even a revalidation, because each one is
+    a view. The cached body and its ETag leave view_count out; it is added
+    to each response from the count stored when the entry was built plus
+    the views this worker has counted since.
     """
+    cache_key = ("blog:post", slug)
+    entry = response_cache.get(cache_key)
+    if entry is not None:
+        post_id = entry.meta["post_id"]
+        view_counts.record(post_id)
+        view_count = entry.meta["view_base"] + view_counts.recorded(post_id)
+        return cached_response(
+            entry, REVALIDATE_CACHE_CONTROL, if_none_match, if_modified_since, {"view_count": view_count}
+        )
+
+    tags = [_post_tag(slug)]
+    versions = response_cache.versions(tags)
     post = db.query(BlogPost).filter(BlogPost.slug == slug).first()
     if not post:
         raise HTTPException(
@@ -115,13 +172,10 @@ async def get_blog_post(
             detail="Blog post not found"
         )
 
-    # Increment view count
-    post.view_count += 1
-    db.add(post)
-    db.commit()
-    db.refresh(post)
+    # Count the view in the write-behind buffer; it reaches the row on the next flush
+    pending_views = view_counts.record(post.id)
 
-    return BlogPostResponse(
+    response = BlogPostResponse(
         id=post.id,
         title=post.title,
         slug=post.slug,
@@ -136,7 +190,7 @@ async def get_blog_post(
         status=post.status,
         featured_image=post.featured_image,
         tags=post.tags.split(',') if post.tags else [],
-        view_count=post.view_count,
+        view_count=(post.view_count or 0) + pending_views,
         is_featured=post.is_featured,
         allow_comments=post.allow_comments,
         published_at=post.published_at,
@@ -145,6 +199,16 @@ async def get_blog_post(
         created_at=post.created_at,
         updated_at=post.updated_at
     )
+    # The stored count less this worker's views already flushed into it, so
+    # adding everything the worker has counted never counts a view twice
+    view_base = response.view_count - view_counts.recorded(post.id)
+    entry = response_cache.set(
+        cache_key, tags, versions, response.dict(exclude={"view_count"}),
+        timestamp(post.updated_at or post.created_at), {"post_id": post.id, "view_base": view_base}
+    )
+    return cached_response(
+        entry, REVALIDATE_CACHE_CONTROL, if_none_match, if_modified_since, {"view_count": response.view_count}
+    )
 
 @router.post("/", response_model=BlogPostResponse, status_code=status.HTTP_201_CREATED)
 async def create_blog_post(
@@ -181,6 +245,7 @@ async def create_blog_post(
     db.add(new_post)
     db.commit()
     db.refresh(new_post)
+    response_cache.invalidate(BLOG_LIST_TAG, _post_tag(new_post.slug))
 
     return BlogPostResponse(
         id=new_post.id,
@@ -239,6 +304,8 @@ async def update_blog_post(
                 detail="Slug already exists"
             )
 
+    old_slug = post.slug
+
     # Update fields
     for field, value in post_data.dict(exclude_unset=True).items():
         if field == "tags" and value:
@@ -249,6 +316,7 @@ async def update_blog_post(
     db.add(post)
     db.commit()
     db.refresh(post)
+    response_cache.invalidate(BLOG_LIST_TAG, _post_tag(old_slug), _post_tag(post.slug))
 
     return BlogPostResponse(
         id=post.id,
@@ -298,8 +366,10 @@ async def delete_blog_post(
             detail="Not authorized to delete this post"
         )
 
+    slug = post.slug
     db.delete(post)
     db.commit()
+    response_cache.invalidate(BLOG_LIST_TAG, _post_tag(slug))
 
     return BaseResponse(message="Blog post deleted successfully")
 
@@ -2,47 +2,31 @@
 Dashboard endpoints
 """
 
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from typing import Dict, Any, Optional
+from datetime import date
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
 from api.auth import get_current_user, require_roles
 from api.database import get_db
+from api import dashboard_stats
+from api.attendance_rollup import attendance_windows, windowed_attendance_totals
 from models.models import (
     User, StudentProfile, TeacherProfile, Parent, GradeLevel, ClassRoom,
-    Dormitory, Grade, AttendanceRecord, Invoice
+    Dormitory, Grade, Invoice, Term
 )
 
 router = APIRouter()
 
 @router.get("/stats")
 async def get_dashboard_stats(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ):
     """
-    Get dashboard statistics
+    Get dashboard statistics (cached for DASHBOARD_STATS_TTL seconds)
     """
-    stats = {
-        "total_students": db.query(StudentProfile).count(),
-        "total_teachers": db.query(TeacherProfile).count(),
-        "total_parents": db.query(Parent).count(),
-        "active_students": db.query(StudentProfile).filter(
-            StudentProfile.academic_status == "ACTIVE"
-        ).count(),
-        "total_classes": db.query(ClassRoom).count(),
-        "total_dormitories": db.query(Dormitory).count(),
-        "total_invoices": db.query(Invoice).count(),
-        "pending_invoices": db.query(Invoice).filter(
-            Invoice.status == "PENDING"
-        ).count(),
-        "paid_invoices": db.query(Invoice).filter(
-            Invoice.status == "PAID"
-        ).count(),
-    }
-    
-    return stats
+    return await dashboard_stats.get_dashboard_stats()
 
 @router.get("/student-stats")
 async def get_student_stats(
@@ -64,29 +48,51 @@ async def get_student_stats(
         ]
     }
 
+def _attendance_figures(counts: Dict[str, int]) -> Dict[str, Any]:
+    total = counts["total"]
+    return {
+        "total_records": total,
+        "present": counts["present"],
+        "absent": counts["absent"],
+        "late": counts["late"],
+        "excused": counts["excused"],
+        "attendance_rate": round(counts["present"] / total * 100, 2) if total else 0
+    }
+
 @router.get("/attendance-stats")
 async def get_attendance_stats(
+    term_id: Optional[int] = Query(None, description="Term for the this_term window (default: the current term)"),
     current_user = Depends(require_roles(["ADMIN", "TEACHER"])),
     db: Session = Depends(get_db)
 ):
     """
-    Get attendance statistics
+    Get attendance statistics for today, this week and this term
+
+    One aggregate over the attendance rollup, limited to the widest window
+    by session date. The top-level figures are the widest window's (the
+    term, or the week when there is no current term); ``windows`` has all three.
     """
-    attendance_stats = db.query(
-        func.count(AttendanceRecord.id).label('total_records'),
-        func.sum(func.case([(AttendanceRecord.status == "PRESENT", 1)], else_=0)).label('present'),
-        func.sum(func.case([(AttendanceRecord.status == "ABSENT", 1)], else_=0)).label('absent'),
-        func.sum(func.case([(AttendanceRecord.status == "LATE", 1)], else_=0)).label('late')
-    ).first()
+    if term_id is not None:
+        term = db.get(Term, term_id)
+        if not term:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Term not found")
+    else:
+        term = db.query(Term).filter(Term.is_current == True).order_by(Term.start_date.desc()).first()
+    
+    today = date.today()
+    windows = attendance_windows(today, term.start_date if term else None, term.end_date if term else None)
+    totals = windowed_attendance_totals(db, windows)
+    scope = "this_term" if "this_term" in windows else "this_week"
     
     return {
-        "total_records": attendance_stats.total_records or 0,
-        "present": attendance_stats.present or 0,
-        "absent": attendance_stats.absent or 0,
-        "late": attendance_stats.late or 0,
-        "attendance_rate": (
-            (attendance_stats.present or 0) / (attendance_stats.total_records or 1) * 100
-        ) if attendance_stats.total_records else 0
+        **_attendance_figures(totals[scope]),
+        "scope": scope,
+        "as_of": today,
+        "term_id": term.id if term else None,
+        "windows": {
+            name: {"start": start, "end": end, **_attendance_figures(totals[name])}
+            for name, (start, end) in windows.items()
+        }
     }
 
 @router.get("/recent-activity")
@@ -4,8 +4,9 @@ Fee management endpoints
 
 from fastapi import APIRouter, HTTPException, status, Depends, Query
 from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy.orm import Session, contains_eager, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, func, select
 
 from api.models import (
     FeeStructureCreate, FeeStructureUpdate, FeeStructureResponse,
@@ -13,7 +14,10 @@ from api.models import (
     PaginationParams, PaginatedResponse, BaseResponse
 )
 from api.auth import get_current_user, require_roles
-from api.database import get_db
+from api.database import get_db, get_async_db
+from api.pagination import paginate_async, COUNT_PATTERN
+from api.reports import invalidate_financial_summary
+from api.dashboard_stats import invalidate_dashboard_stats
 from models.models import FeeStructure, Invoice, StudentProfile, GradeLevel, Term, User
 
 router = APIRouter()
@@ -45,7 +49,10 @@ async def get_fee_structures(
     
     # Apply pagination
     offset = (page - 1) * size
-    fee_structures_query = query.offset(offset).limit(size).all()
+    fee_structures_query = query.options(
+        joinedload(FeeStructure.grade_level),
+        joinedload(FeeStructure.term)
+    ).offset(offset).limit(size).all()
     
     fee_structures = []
     for fee_structure in fee_structures_query:
@@ -120,6 +127,7 @@ async def create_fee_structure(
     
     db.add(fee_structure)
     db.commit()
+    invalidate_financial_summary()
     db.refresh(fee_structure)
     
     return FeeStructureResponse(
@@ -145,15 +153,17 @@ async def create_fee_structure(
 async def get_invoices(
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: Optional[str] = Query(None, pattern=COUNT_PATTERN),
     student_id: Optional[int] = Query(None),
     status: Optional[str] = Query(None),
     current_user = Depends(require_roles(["ADMIN", "TEACHER", "PARENT"])),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get list of invoices with pagination and filtering
     """
-    query = db.query(Invoice).join(StudentProfile).join(User)
+    query = select(Invoice).join(StudentProfile).join(User)
     
     # Apply filters
     if student_id:
@@ -162,12 +172,14 @@ async def get_invoices(
     if status:
         query = query.filter(Invoice.status == status)
     
-    # Get total count
-    total = query.count()
-    
-    # Apply pagination
-    offset = (page - 1) * size
-    invoices_query = query.offset(offset).limit(size).all()
+    # Keyset pagination on the primary key (page/offset still accepted)
+    invoices_query, pagination = await paginate_async(
+        db, query, [Invoice.id],
+        page=page, size=size, cursor=cursor, count=count,
+        options=[
+            contains_eager(Invoice.student).contains_eager(StudentProfile.user)
+        ]
+    )
     
     invoices = []
     for invoice in invoices_query:
@@ -192,20 +204,9 @@ async def get_invoices(
             "updated_at": invoice.updated_at
         })
     
-    pages = (total + size - 1) // size
-    has_next = page < pages
-    has_previous = page > 1
-    
     return PaginatedResponse(
         data=invoices,
-        pagination={
-            "page": page,
-            "size": size,
-            "total": total,
-            "pages": pages,
-            "has_next": has_next,
-            "has_previous": has_previous
-        }
+        pagination=pagination
     )
 
 @router.post("/invoices", response_model=InvoiceResponse)
@@ -241,6 +242,8 @@ async def create_invoice(
     
     db.add(invoice)
     db.commit()
+    invalidate_dashboard_stats()
+    invalidate_financial_summary()
     db.refresh(invoice)
     
     return InvoiceResponse(
@@ -287,6 +290,8 @@ async def update_invoice(
         setattr(invoice, field, value)
     
     db.commit()
+    invalidate_dashboard_stats()
+    invalidate_financial_summary()
     db.refresh(invoice)
     
     return InvoiceResponse(
@@ -328,5 +333,7 @@ async def delete_invoice(
     
     db.delete(invoice)
     db.commit()
+    invalidate_dashboard_stats()
+    invalidate_financial_summary()
     
     return {"message": "Invoice deleted successfully"}
\ No newline at end of file
@@ -2,18 +2,26 @@
 Grade management endpoints
 """
 
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+import asyncio
+
+from fastapi import APIRouter, HTTPException, status, Depends, Query, File, UploadFile
 from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy.orm import Session, contains_eager, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, func, select
+from sqlalchemy.exc import IntegrityError
 
 from api.models import (
     GradeCreate, GradeUpdate, GradeResponse,
+    GradeBulkCreate, GradeBulkResponse, GradeImportResponse, GradebookResponse,
     PaginationParams, PaginatedResponse, BaseResponse
 )
 from api.auth import get_current_user, require_roles
-from api.database import get_db
-from models.models import Grade, StudentProfile, Assessment, User
+from api.database import get_db, get_async_db
+from api.pagination import paginate_async, COUNT_PATTERN
+from api.gradebook import build_gradebook
+from api.grade_import import GradeImportError, GradeUpserter, check_file, import_grade_rows, read_csv, read_xlsx
+from models.models import Grade, StudentProfile, Assessment, User, ClassRoom, Term
 
 router = APIRouter()
 
@@ -21,16 +29,18 @@ router = APIRouter()
 async def get_grades(
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: Optional[str] = Query(None, pattern=COUNT_PATTERN),
     search: Optional[str] = Query(None),
     student_id: Optional[int] = Query(None),
     assessment_id: Optional[int] = Query(None),
     current_user = Depends(require_roles(["ADMIN", "TEACHER"])),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get list of grades with pagination and filtering
     """
-    query = db.query(Grade).join(StudentProfile).join(User)
+    query = select(Grade).join(StudentProfile).join(User)
     
     # Apply filters
     if search:
@@ -48,12 +58,15 @@ async def get_grades(
     if assessment_id:
         query = query.filter(Grade.assessment_id == assessment_id)
     
-    # Get total count
-    total = query.count()
-    
-    # Apply pagination
-    offset = (page - 1) * size
-    grades_query = query.offset(offset).limit(size).all()
+    # Keyset pagination on the primary key (page/offset still accepted)
+    grades_query, pagination = await paginate_async(
+        db, query, [Grade.id],
+        page=page, size=size, cursor=cursor, count=count,
+        options=[
+            contains_eager(Grade.student).contains_eager(StudentProfile.user),
+            joinedload(Grade.assessment)
+        ]
+    )
     
     grades = []
     for grade in grades_query:
@@ -78,22 +91,35 @@ async def get_grades(
             "updated_at": grade.updated_at
         })
     
-    pages = (total + size - 1) // size
-    has_next = page < pages
-    has_previous = page > 1
-    
     return PaginatedResponse(
         data=grades,
-        pagination={
-            "page": page,
-            "size": size,
-            "total": total,
-            "pages": pages,
-            "has_next": has_next,
-            "has_previous": has_previous
-        }
+        pagination=pagination
     )
 
+@router.get("/gradebook", response_model=GradebookResponse)
+async def get_gradebook(
+    classroom_id: int = Query(...),
+    term_id: int = Query(...),
+    current_user = Depends(require_roles(["ADMIN", "TEACHER"])),
+    db: Session = Depends(get_db)
+):
+    """
+    The class's student x assessment score matrix for a term, with weighted
+    percentages (by Assessment.weight and max_score), subject percentages,
+    class rank and percentile, as columnar JSON
+    """
+    if db.get(ClassRoom, classroom_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Classroom not found"
+        )
+    if db.get(Term, term_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Term not found"
+        )
+    return build_gradebook(db, classroom_id, term_id)
+
 @router.get("/{grade_id}", response_model=GradeResponse)
 async def get_grade(
     grade_id: int,
@@ -176,7 +202,15 @@ async def create_grade(
     )
     
     db.add(grade)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another request created it since the check above
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Grade already exists for this student and assessment"
+        )
     db.refresh(grade)
     
     return GradeResponse(
@@ -200,6 +234,68 @@ async def create_grade(
         updated_at=grade.updated_at
     )
 
+@router.post("/bulk", response_model=GradeBulkResponse)
+async def bulk_create_grades(
+    bulk_data: GradeBulkCreate,
+    current_user = Depends(require_roles(["ADMIN", "TEACHER"])),
+    db: Session = Depends(get_db)
+):
+    """
+    Enter many marks in one transaction, upserting on (student, assessment).
+    Each row gets its own result; unknown students or assessments, scores out
+    of range and repeated pairs are reported as errors without failing the rest.
+    """
+    upserter = GradeUpserter(db)
+    upserter.add_batch([
+        (row, item.model_dump()) for row, item in enumerate(bulk_data.grades, start=1)
+    ])
+    summary = upserter.summary()
+    return GradeBulkResponse(
+        created=summary["created"],
+        updated=summary["updated"],
+        unchanged=summary["unchanged"],
+        failed=summary["failed"],
+        results=[upserter.results[row] for row in sorted(upserter.results)]
+    )
+
+@router.post("/import", response_model=GradeImportResponse)
+async def import_grades(
+    file: UploadFile = File(..., description="CSV or XLSX with student_id or admission_number, assessment_id, score, comments"),
+    assessment_id: Optional[int] = Query(None, description="Assessment for rows without an assessment_id column"),
+    current_user = Depends(require_roles(["ADMIN", "TEACHER"])),
+    db: Session = Depends(get_db)
+):
+    """
+    Import a gradebook file. The whole file is checked first (format,
+    encoding, header, row limit), so a 400 means nothing was written; rows
+    are then streamed and upserted in batches, each committed on its own.
+    Bad rows are listed by row number and skipped.
+    """
+    filename = (file.filename or "").lower()
+    if filename.endswith(".xlsx"):
+        reader = read_xlsx
+    elif filename.endswith(".csv") or file.content_type == "text/csv":
+        reader = read_csv
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Upload a .csv or .xlsx file"
+        )
+
+    # Reject a bad or oversized file before the first batch is committed
+    try:
+        await asyncio.to_thread(check_file, reader, file.file)
+    except GradeImportError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    upserter = await asyncio.to_thread(import_grade_rows, db, reader(file.file), assessment_id)
+
+    errors = sorted(upserter.errors, key=lambda error: error["row"])
+    return GradeImportResponse(**upserter.summary(), errors=errors)
+
 @router.put("/{grade_id}", response_model=GradeResponse)
 async def update_grade(
     grade_id: int,
@@ -4,7 +4,7 @@ Parent management endpoints
 
 from fastapi import APIRouter, HTTPException, status, Depends, Query
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager, selectinload
 from sqlalchemy import and_, or_
 
 from api.models import (
@@ -13,6 +13,9 @@ from api.models import (
 )
 from api.auth import get_current_user, require_roles
 from api.database import get_db
+from api.pagination import paginate, COUNT_PATTERN
+from api.people_search import people_index
+from api.dashboard_stats import invalidate_dashboard_stats
 from models.models import Parent, StudentProfile, User
 
 router = APIRouter()
@@ -21,6 +24,8 @@ router = APIRouter()
 async def get_parents(
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: Optional[str] = Query(None, pattern=COUNT_PATTERN),
     search: Optional[str] = Query(None),
     relationship: Optional[str] = Query(None),
     current_user = Depends(require_roles(["ADMIN", "TEACHER"])),
@@ -43,14 +48,16 @@ async def get_parents(
         )
     
     if relationship:
-        query = query.filter(Parent.relationship == relationship)
+        query = query.filter(Parent.relationship_type == relationship)
     
-    # Get total count
-    total = query.count()
-    
-    # Apply pagination
-    offset = (page - 1) * size
-    parents_query = query.offset(offset).limit(size).all()
+    # Keyset pagination on the primary key (page/offset still accepted)
+    parents_query, pagination = paginate(
+        query, [Parent.id], page=page, size=size, cursor=cursor, count=count,
+        options=[
+            contains_eager(Parent.user),
+            selectinload(Parent.students).joinedload(StudentProfile.user)
+        ]
+    )
     
     parents = []
     for parent in parents_query:
@@ -64,7 +71,7 @@ async def get_parents(
                 "last_name": parent.user.last_name,
                 "is_active": parent.user.is_active
             },
-            "relationship": parent.relationship,
+            "relationship": parent.relationship_type,
             "phone_number": parent.phone_number,
             "alternative_phone": parent.alternative_phone,
             "address": parent.address,
@@ -91,20 +98,9 @@ async def get_parents(
             "updated_at": parent.updated_at
         })
     
-    pages = (total + size - 1) // size
-    has_next = page < pages
-    has_previous = page > 1
-    
     return PaginatedResponse(
         data=parents,
-        pagination={
-            "page": page,
-            "size": size,
-            "total": total,
-            "pages": pages,
-            "has_next": has_next,
-            "has_previous": has_previous
-        }
+        pagination=pagination
     )
 
 @router.get("/{parent_id}", response_model=ParentProfileResponse)
@@ -214,6 +210,8 @@ async def create_parent(
     
     db.add(parent)
     db.commit()
+    invalidate_dashboard_stats()
+    people_index.invalidate()
     db.refresh(parent)
     
     return ParentProfileResponse(
@@ -270,6 +268,7 @@ async def update_parent(
         setattr(parent, field, value)
     
     db.commit()
+    people_index.invalidate()
     db.refresh(parent)
     
     return ParentProfileResponse(
@@ -330,6 +329,8 @@ async def delete_parent(
     
     db.delete(parent)
     db.commit()
+    invalidate_dashboard_stats()
+    people_index.invalidate()
     
     return {"message": "Parent deleted successfully"}
 
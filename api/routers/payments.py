@@ -15,6 +15,7 @@ from api.models import (
 )
 from api.auth import get_current_user, require_roles
 from api.database import get_db
+from api.reports import invalidate_financial_summary
 from models.models import Payment, PaymentGateway, Invoice, StudentProfile, User
 
 router = APIRouter()
@@ -52,6 +53,7 @@ async def process_innbucks_payment(
         
         db.add(payment)
         db.commit()
+        invalidate_financial_summary()
         
         return BaseResponse(message="Payment processed successfully via InnBucks")
         
@@ -95,6 +97,7 @@ async def process_bank_payment(
         
         db.add(payment)
         db.commit()
+        invalidate_financial_summary()
         
         return BaseResponse(message="Payment processed successfully via Bank Transfer")
         
@@ -138,6 +141,7 @@ async def process_ecocash_payment(
         
         db.add(payment)
         db.commit()
+        invalidate_financial_summary()
         
         return BaseResponse(message="Payment processed successfully via EcoCash")
         
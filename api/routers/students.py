@@ -4,15 +4,19 @@ Student management endpoints
 
 from fastapi import APIRouter, HTTPException, status, Depends, Query
 from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, contains_eager, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, select, func
 
 from api.models import (
     StudentProfileCreate, StudentProfileUpdate, StudentProfileResponse,
     PaginationParams, PaginatedResponse, BaseResponse
 )
 from api.auth import get_current_user, require_roles
-from api.database import get_db
+from api.database import get_db, get_async_db
+from api.pagination import paginate_async, COUNT_PATTERN
+from api.people_search import people_index
+from api.dashboard_stats import invalidate_dashboard_stats
 from models.models import StudentProfile, GradeLevel, ClassRoom, Dormitory, User
 
 router = APIRouter()
@@ -21,16 +25,18 @@ router = APIRouter()
 async def get_students(
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: Optional[str] = Query(None, pattern=COUNT_PATTERN),
     search: Optional[str] = Query(None),
     grade_level: Optional[int] = Query(None),
     academic_status: Optional[str] = Query(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get list of students with pagination and filtering
     """
-    query = db.query(StudentProfile).join(User)
+    query = select(StudentProfile).join(User)
     
     # Apply filters
     if search:
@@ -49,12 +55,17 @@ async def get_students(
     if academic_status:
         query = query.filter(StudentProfile.academic_status == academic_status)
     
-    # Get total count
-    total = query.count()
-    
-    # Apply pagination
-    offset = (page - 1) * size
-    students_query = query.offset(offset).limit(size).all()
+    # Keyset pagination on the primary key (page/offset still accepted)
+    students_query, pagination = await paginate_async(
+        db, query, [StudentProfile.id],
+        page=page, size=size, cursor=cursor, count=count,
+        options=[
+            contains_eager(StudentProfile.user),
+            joinedload(StudentProfile.grade_level),
+            joinedload(StudentProfile.classroom),
+            joinedload(StudentProfile.dormitory)
+        ]
+    )
     
     students = []
     for student in students_query:
@@ -98,20 +109,9 @@ async def get_students(
             "updated_at": student.updated_at
         })
     
-    pages = (total + size - 1) // size
-    has_next = page < pages
-    has_previous = page > 1
-    
     return PaginatedResponse(
         data=students,
-        pagination={
-            "page": page,
-            "size": size,
-            "total": total,
-            "pages": pages,
-            "has_next": has_next,
-            "has_previous": has_previous
-        }
+        pagination=pagination
     )
 
 @router.get("/{student_id}", response_model=StudentProfileResponse)
@@ -264,6 +264,8 @@ async def create_student(
     
     db.add(student)
     db.commit()
+    invalidate_dashboard_stats()
+    people_index.invalidate()
     db.refresh(student)
     
     return StudentProfileResponse(
@@ -332,6 +334,8 @@ async def update_student(
         setattr(student, field, value)
     
     db.commit()
+    invalidate_dashboard_stats()
+    people_index.invalidate()
     db.refresh(student)
     
     return StudentProfileResponse(
@@ -395,5 +399,7 @@ async def delete_student(
     
     db.delete(student)
     db.commit()
+    invalidate_dashboard_stats()
+    people_index.invalidate()
     
     return {"message": "Student deleted successfully"}
\ No newline at end of file
@@ -4,7 +4,7 @@ Teacher management endpoints
 
 from fastapi import APIRouter, HTTPException, status, Depends, Query
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager
 from sqlalchemy import and_, or_
 
 from api.models import (
@@ -13,6 +13,8 @@ from api.models import (
 )
 from api.auth import get_current_user, require_roles
 from api.database import get_db
+from api.people_search import people_index
+from api.dashboard_stats import invalidate_dashboard_stats
 from models.models import TeacherProfile, User
 
 router = APIRouter()
@@ -54,7 +56,9 @@ async def get_teachers(
     
     # Apply pagination
     offset = (page - 1) * size
-    teachers_query = query.offset(offset).limit(size).all()
+    teachers_query = query.options(
+        contains_eager(TeacherProfile.user)
+    ).offset(offset).limit(size).all()
     
     teachers = []
     for teacher in teachers_query:
@@ -205,6 +209,8 @@ async def create_teacher(
     
     db.add(teacher)
     db.commit()
+    invalidate_dashboard_stats()
+    people_index.invalidate()
     db.refresh(teacher)
     
     return TeacherProfileResponse(
@@ -259,6 +265,7 @@ async def update_teacher(
         setattr(teacher, field, value)
     
     db.commit()
+    people_index.invalidate()
     db.refresh(teacher)
     
     return TeacherProfileResponse(
@@ -308,5 +315,7 @@ async def delete_teacher(
     
     db.delete(teacher)
     db.commit()
+    invalidate_dashboard_stats()
+    people_index.invalidate()
     
     return {"message": "Teacher deleted successfully"}
\ No newline at end of file
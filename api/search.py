@@ -3,31 +3,155 @@ Advanced Search and Filtering System
 """
 
 from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc, asc
-from typing import List, Optional, Dict, Any
+from sqlalchemy.orm import Session, contains_eager, joinedload
+from sqlalchemy import and_, or_, func, desc, asc, event
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import time
 
-from api.database import get_db
+from api.database import SessionLocal, get_db
+from api.pagination import paginate, COUNT_PATTERN
+from api import blog_search
+from api.people_search import people_index
+from api.search_suggestions import suggestion_index
 from api.auth import require_roles, get_current_user
 from models.models import (
-    User, StudentProfile, TeacherProfile, Parent, Grade, 
-    AttendanceRecord, Invoice, BlogPost, Message
+    User, StudentProfile, TeacherProfile, Parent, Grade, Assessment,
+    AttendanceRecord, AttendanceSession, Invoice, BlogPost, Message
 )
 
+logger = logging.getLogger(__name__)
+
+# Seconds each entity of a global search may take before it is left out
+SEARCH_ENTITY_TIMEOUT = float(os.getenv("SEARCH_ENTITY_TIMEOUT", "0.5"))
+# Threads (and so database connections) shared by all global searches
+SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", "8"))
+
+search_executor = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="search")
+
 router = APIRouter()
 
+def _limit_statement_time(db: Session, deadline: float) -> Callable[[], None]:
+    """
+    Abort the session's statements once ``deadline`` (time.monotonic()) has
+    passed, so a search that overran its budget gives its connection back
+    instead of finishing work nobody waits for. Returns the cleanup to run
+    before the session is closed.
+    """
+    hooked = []
+
+    def after_begin(session, transaction, connection):
+        if connection.dialect.name == "postgresql":
+            remaining = max(int((deadline - time.monotonic()) * 1000), 1)
+            connection.exec_driver_sql(f"SET LOCAL statement_timeout = {remaining}")
+        elif connection.dialect.name == "sqlite":
+            raw = connection.connection.driver_connection
+            raw.set_progress_handler(lambda: time.monotonic() > deadline, 1000)
+            hooked.append(raw)
+
+    event.listen(db, "after_begin", after_begin)
+
+    def release():
+        # The connection goes back to the pool; it must not carry the handler along
+        for raw in hooked:
+            raw.set_progress_handler(None, 0)
+
+    return release
+
+def _search_people(kind: str):
+    def search(db: Session, q: str) -> List[Dict[str, Any]]:
+        return [dict(person.result) for person in people_index.search(q, [kind], limit=5)[kind]]
+    return search
+
+def _search_grades(db: Session, q: str) -> List[Dict[str, Any]]:
+    # Grades of the students whose names match best
+    student_ids = [person.id for person in people_index.search(q, ["student"], limit=50)["student"]]
+    if not student_ids:
+        return []
+    grades = db.query(Grade).filter(Grade.student_id.in_(student_ids)).options(
+        joinedload(Grade.student).joinedload(StudentProfile.user),
+        joinedload(Grade.assessment).joinedload(Assessment.subject)
+    ).limit(5).all()
+    return [{
+        "id": grade.id,
+        "student_name": grade.student.user.full_name,
+        "subject": grade.assessment.subject.name,
+        "score": grade.score,
+        "assessment": grade.assessment.name,
+        "type": "grade"
+    } for grade in grades]
+
+def _search_blog_posts(db: Session, q: str) -> List[Dict[str, Any]]:
+    # Best full-text matches first
+    blog_query = db.query(BlogPost).options(joinedload(BlogPost.author))
+    terms = blog_search.search_terms(q) if blog_search.is_supported(db) else []
+    if terms:
+        ranked = blog_search.ranked_posts(db, terms)
+        blog_query = blog_query.join(ranked, ranked.c.post_id == BlogPost.id).order_by(ranked.c.rank)
+    else:
+        blog_query = blog_query.filter(
+            or_(
+                BlogPost.title.ilike(f"%{q}%"),
+                BlogPost.search_text.ilike(f"%{q}%"),
+                BlogPost.excerpt.ilike(f"%{q}%")
+            )
+        )
+    return [{
+        "id": post.id,
+        "title": post.title,
+        "excerpt": post.excerpt,
+        "author": post.author.full_name if post.author else "Unknown",
+        "published_at": post.published_at,
+        "type": "blog_post"
+    } for post in blog_query.limit(5).all()]
+
+# Suggestion kind -> roles allowed to see it, or None for everyone
+SUGGESTION_ROLES = {
+    "student": ["ADMIN", "TEACHER", "BOARDING_STAFF"],
+    "teacher": ["ADMIN", "STUDENT", "PARENT"],
+    "subject": None,
+}
+
+# Result key -> (roles allowed to see it, or None for everyone; search)
+ENTITY_SEARCHES = {
+    "students": (["ADMIN", "TEACHER", "BOARDING_STAFF"], _search_people("student")),
+    "teachers": (["ADMIN", "STUDENT", "PARENT"], _search_people("teacher")),
+    "parents": (["ADMIN", "TEACHER"], _search_people("parent")),
+    "grades": (["ADMIN", "TEACHER", "STUDENT", "PARENT"], _search_grades),
+    "blog_posts": (None, _search_blog_posts),
+}
+
+def _run_entity_search(search, q: str, deadline: float) -> Tuple[List[Dict[str, Any]], float]:
+    """One entity search on its own session; returns (results, seconds spent running it)"""
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        release = _limit_statement_time(db, deadline)
+        try:
+            return search(db, q), time.perf_counter() - started
+        finally:
+            release()
+
 @router.get("/global")
 async def global_search(
     q: str = Query(..., description="Search query"),
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
     filters: Optional[str] = Query(None, description="JSON filters"),
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user = Depends(get_current_user)
 ):
     """
     Global search across all entities
+
+    Each entity is searched concurrently on its own connection. An entity
+    still running after SEARCH_ENTITY_TIMEOUT seconds is left out and listed
+    in ``timed_out``; one that fails is listed in ``failed``. ``timings_ms``
+    has the run time of every entity that finished.
     """
     search_results = {
         "students": [],
@@ -40,108 +164,36 @@ async def global_search(
         "messages": []
     }
     
-    # Search students
-    if current_user.role in ["ADMIN", "TEACHER", "BOARDING_STAFF"]:
-        students = db.query(StudentProfile).join(User).filter(
-            or_(
-                User.first_name.ilike(f"%{q}%"),
-                User.last_name.ilike(f"%{q}%"),
-                User.email.ilike(f"%{q}%"),
-                StudentProfile.admission_number.ilike(f"%{q}%")
-            )
-        ).limit(5).all()
-        
-        for student in students:
-            search_results["students"].append({
-                "id": student.id,
-                "name": student.user.full_name,
-                "admission_number": student.admission_number,
-                "email": student.user.email,
-                "grade_level": student.grade_level.name,
-                "type": "student"
-            })
-    
-    # Search teachers
-    if current_user.role in ["ADMIN", "STUDENT", "PARENT"]:
-        teachers = db.query(TeacherProfile).join(User).filter(
-            or_(
-                User.first_name.ilike(f"%{q}%"),
-                User.last_name.ilike(f"%{q}%"),
-                User.email.ilike(f"%{q}%"),
-                TeacherProfile.specialization.ilike(f"%{q}%")
-            )
-        ).limit(5).all()
-        
-        for teacher in teachers:
-            search_results["teachers"].append({
-                "id": teacher.id,
-                "name": teacher.user.full_name,
-                "email": teacher.user.email,
-                "specialization": teacher.specialization,
-                "type": "teacher"
-            })
-    
-    # Search parents
-    if current_user.role in ["ADMIN", "TEACHER"]:
-        parents = db.query(Parent).join(User).filter(
-            or_(
-                User.first_name.ilike(f"%{q}%"),
-                User.last_name.ilike(f"%{q}%"),
-                User.email.ilike(f"%{q}%")
-            )
-        ).limit(5).all()
-        
-        for parent in parents:
-            search_results["parents"].append({
-                "id": parent.id,
-                "name": parent.user.full_name,
-                "email": parent.user.email,
-                "relationship": parent.relationship_type,
-                "type": "parent"
-            })
-    
-    # Search grades
-    if current_user.role in ["ADMIN", "TEACHER", "STUDENT", "PARENT"]:
-        grades = db.query(Grade).join(StudentProfile).join(User).filter(
-            or_(
-                User.first_name.ilike(f"%{q}%"),
-                User.last_name.ilike(f"%{q}%")
-            )
-        ).limit(5).all()
-        
-        for grade in grades:
-            search_results["grades"].append({
-                "id": grade.id,
-                "student_name": grade.student.user.full_name,
-                "subject": grade.assessment.subject.name,
-                "score": grade.score,
-                "assessment": grade.assessment.name,
-                "type": "grade"
-            })
-    
-    # Search blog posts
-    blog_posts = db.query(BlogPost).filter(
-        or_(
-            BlogPost.title.ilike(f"%{q}%"),
-            BlogPost.content.ilike(f"%{q}%"),
-            BlogPost.excerpt.ilike(f"%{q}%")
-        )
-    ).limit(5).all()
-    
-    for post in blog_posts:
-        search_results["blog_posts"].append({
-            "id": post.id,
-            "title": post.title,
-            "excerpt": post.excerpt,
-            "author": post.author.full_name if post.author else "Unknown",
-            "published_at": post.published_at,
-            "type": "blog_post"
-        })
+    loop = asyncio.get_running_loop()
+    deadline = time.monotonic() + SEARCH_ENTITY_TIMEOUT
+    tasks = {}
+    for entity, (roles, search) in ENTITY_SEARCHES.items():
+        if roles is None or current_user.role in roles:
+            # Copy the request context so the queries still count towards it
+            run = functools.partial(contextvars.copy_context().run, _run_entity_search, search, q, deadline)
+            tasks[loop.run_in_executor(search_executor, run)] = entity
+    
+    done, pending = await asyncio.wait(tasks, timeout=SEARCH_ENTITY_TIMEOUT) if tasks else (set(), set())
+    timings, timed_out, failed = {}, [], []
+    for task, entity in tasks.items():
+        if task in pending:
+            task.cancel()
+            timed_out.append(entity)
+            continue
+        try:
+            search_results[entity], elapsed = task.result()
+            timings[entity] = round(elapsed * 1000, 2)
+        except Exception as e:
+            logger.error(f"Global search of {entity} failed: {e}")
+            failed.append(entity)
     
     return {
         "query": q,
         "results": search_results,
-        "total_results": sum(len(results) for results in search_results.values())
+        "total_results": sum(len(results) for results in search_results.values()),
+        "timings_ms": timings,
+        "timed_out": timed_out,
+        "failed": failed
     }
 
 @router.get("/students/advanced")
@@ -155,6 +207,8 @@ async def advanced_student_search(
     enrollment_date_to: Optional[date] = Query(None),
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: Optional[str] = Query(None, pattern=COUNT_PATTERN),
     sort_by: Optional[str] = Query("created_at"),
     sort_order: Optional[str] = Query("desc"),
     current_user = Depends(require_roles(["ADMIN", "TEACHER", "BOARDING_STAFF"])),
@@ -195,32 +249,28 @@ async def advanced_student_search(
     if enrollment_date_to:
         query = query.filter(StudentProfile.enrollment_date <= enrollment_date_to)
     
-    # Sorting
-    if sort_by == "name":
-        if sort_order == "asc":
-            query = query.order_by(asc(User.first_name))
-        else:
-            query = query.order_by(desc(User.first_name))
-    elif sort_by == "admission_number":
-        if sort_order == "asc":
-            query = query.order_by(asc(StudentProfile.admission_number))
-        else:
-            query = query.order_by(desc(StudentProfile.admission_number))
-    elif sort_by == "enrollment_date":
-        if sort_order == "asc":
-            query = query.order_by(asc(StudentProfile.enrollment_date))
-        else:
-            query = query.order_by(desc(StudentProfile.enrollment_date))
-    else:
-        if sort_order == "asc":
-            query = query.order_by(asc(StudentProfile.created_at))
-        else:
-            query = query.order_by(desc(StudentProfile.created_at))
+    # Sorting: keyset on (sort column, id) so cursors stay stable on ties
+    sort_columns = {
+        "name": (User.first_name, lambda student: student.user.first_name),
+        "admission_number": (StudentProfile.admission_number, lambda student: student.admission_number),
+        "enrollment_date": (StudentProfile.enrollment_date, lambda student: student.enrollment_date),
+    }
+    sort_column, sort_value = sort_columns.get(
+        sort_by, (StudentProfile.created_at, lambda student: student.created_at)
+    )
     
     # Pagination
-    total = query.count()
-    offset = (page - 1) * size
-    students = query.offset(offset).limit(size).all()
+    students, pagination = paginate(
+        query, [sort_column, StudentProfile.id],
+        page=page, size=size, cursor=cursor, count=count,
+        descending=sort_order != "asc",
+        options=[
+            contains_eager(StudentProfile.user),
+            joinedload(StudentProfile.grade_level),
+            joinedload(StudentProfile.classroom)
+        ],
+        key_values=lambda student: [sort_value(student), student.id]
+    )
     
     results = []
     for student in students:
@@ -239,14 +289,7 @@ async def advanced_student_search(
     
     return {
         "results": results,
-        "pagination": {
-            "page": page,
-            "size": size,
-            "total": total,
-            "pages": (total + size - 1) // size,
-            "has_next": page < (total + size - 1) // size,
-            "has_previous": page > 1
-        }
+        "pagination": pagination
     }
 
 @router.get("/grades/advanced")
@@ -261,6 +304,8 @@ async def advanced_grade_search(
     date_to: Optional[date] = Query(None),
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: Optional[str] = Query(None, pattern=COUNT_PATTERN),
     current_user = Depends(require_roles(["ADMIN", "TEACHER", "STUDENT", "PARENT"])),
     db: Session = Depends(get_db)
 ):
@@ -313,13 +358,15 @@ async def advanced_grade_search(
             student_ids = [s.id for s in parent_profile.students]
             query = query.filter(Grade.student_id.in_(student_ids))
     
-    # Sorting
-    query = query.order_by(desc(Grade.created_at))
-    
-    # Pagination
-    total = query.count()
-    offset = (page - 1) * size
-    grades = query.offset(offset).limit(size).all()
+    # Pagination, newest first; keyset on (created_at, id)
+    grades, pagination = paginate(
+        query, [Grade.created_at, Grade.id],
+        page=page, size=size, cursor=cursor, count=count, descending=True,
+        options=[
+            contains_eager(Grade.student).contains_eager(StudentProfile.user),
+            joinedload(Grade.assessment).joinedload(Assessment.subject)
+        ]
+    )
     
     results = []
     for grade in grades:
@@ -336,14 +383,7 @@ async def advanced_grade_search(
     
     return {
         "results": results,
-        "pagination": {
-            "page": page,
-            "size": size,
-            "total": total,
-            "pages": (total + size - 1) // size,
-            "has_next": page < (total + size - 1) // size,
-            "has_previous": page > 1
-        }
+        "pagination": pagination
     }
 
 @router.get("/attendance/advanced")
@@ -356,6 +396,8 @@ async def advanced_attendance_search(
     date_to: Optional[date] = Query(None),
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    count: Optional[str] = Query(None, pattern=COUNT_PATTERN),
     current_user = Depends(require_roles(["ADMIN", "TEACHER", "BOARDING_STAFF"])),
     db: Session = Depends(get_db)
 ):
@@ -389,13 +431,16 @@ async def advanced_attendance_search(
     if date_to:
         query = query.join(AttendanceRecord.session).filter(AttendanceSession.date <= date_to)
     
-    # Sorting
-    query = query.order_by(desc(AttendanceRecord.created_at))
-    
-    # Pagination
-    total = query.count()
-    offset = (page - 1) * size
-    records = query.offset(offset).limit(size).all()
+    # Pagination, newest first; keyset on (created_at, id)
+    records, pagination = paginate(
+        query, [AttendanceRecord.created_at, AttendanceRecord.id],
+        page=page, size=size, cursor=cursor, count=count, descending=True,
+        options=[
+            contains_eager(AttendanceRecord.student).contains_eager(StudentProfile.user),
+            contains_eager(AttendanceRecord.student).joinedload(StudentProfile.classroom),
+            joinedload(AttendanceRecord.session)
+        ]
+    )
     
     results = []
     for record in records:
@@ -411,60 +456,22 @@ async def advanced_attendance_search(
     
     return {
         "results": results,
-        "pagination": {
-            "page": page,
-            "size": size,
-            "total": total,
-            "pages": (total + size - 1) // size,
-            "has_next": page < (total + size - 1) // size,
-            "has_previous": page > 1
-        }
+        "pagination": pagination
     }
 
 @router.get("/suggestions")
 async def get_search_suggestions(
     q: str = Query(..., min_length=2),
     entity_type: Optional[str] = Query(None),
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user = Depends(get_current_user)
 ):
     """
-    Get search suggestions as user types
+    Get search suggestions as user types (from memory, see api/search_suggestions.py)
     """
-    suggestions = []
-    
-    if not entity_type or entity_type == "students":
-        if current_user.role in ["ADMIN", "TEACHER", "BOARDING_STAFF"]:
-            students = db.query(StudentProfile).join(User).filter(
-                or_(
-                    User.first_name.ilike(f"%{q}%"),
-                    User.last_name.ilike(f"%{q}%"),
-                    StudentProfile.admission_number.ilike(f"%{q}%")
-                )
-            ).limit(5).all()
-            
-            for student in students:
-                suggestions.append({
-                    "text": f"{student.user.full_name} ({student.admission_number})",
-                    "type": "student",
-                    "id": student.id
-                })
-    
-    if not entity_type or entity_type == "teachers":
-        if current_user.role in ["ADMIN", "STUDENT", "PARENT"]:
-            teachers = db.query(TeacherProfile).join(User).filter(
-                or_(
-                    User.first_name.ilike(f"%{q}%"),
-                    User.last_name.ilike(f"%{q}%")
-                )
-            ).limit(5).all()
-            
-            for teacher in teachers:
-                suggestions.append({
-                    "text": f"{teacher.user.full_name} - {teacher.specialization}",
-                    "type": "teacher",
-                    "id": teacher.id
-                })
-    
-    return {"suggestions": suggestions}
-
+    kinds = [
+        kind for kind, roles in SUGGESTION_ROLES.items()
+        if (not entity_type or entity_type == f"{kind}s") and (roles is None or current_user.role in roles)
+    ]
+    suggestions = suggestion_index.suggest(q, kinds, limit=5)
+    
+    return {"suggestions": [suggestion.as_dict() for suggestion in suggestions]}
@@ -0,0 +1,187 @@
+"""
+Autocomplete for /search/suggestions, answered from memory
+
+Every student, teacher and subject is reachable through a few normalized
+keys: each word of the name, the full name in both orders, the admission
+number (students) and the subject code. The keys of one kind are kept as
+a sorted NumPy array of fixed-width byte strings, so a prefix is the
+range between two binary searches and a keystroke never reaches the
+database.
+
+Students and teachers come from the people search index (see
+api/people_search.py): the refresher keeps it current in the background
+and rebuilds a kind's arrays when its people changed. Subjects have no
+write endpoint, so the refresher re-reads them only when their row count
+or latest update moved.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from api.database import SessionLocal
+from api.people_search import PeopleIndex, Person, normalize, people_index
+from models.models import Subject
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks for new, changed or deleted people and subjects
+SUGGESTION_REFRESH_INTERVAL = float(os.getenv("SUGGESTION_REFRESH_INTERVAL", "2"))
+# Keys (and queries) are compared on their first KEY_BYTES bytes of UTF-8
+KEY_BYTES = 32
+
+@dataclass(frozen=True)
+class Suggestion:
+    type: str
+    id: int
+    text: str
+
+    def as_dict(self) -> Dict[str, object]:
+        return {"text": self.text, "type": self.type, "id": self.id}
+
+def _encode(text: str) -> bytes:
+    return text.encode()[:KEY_BYTES]
+
+def name_keys(name: str) -> List[str]:
+    """Each word of a name plus the whole name forwards and backwards"""
+    words = normalize(name).split()
+    return [*words, " ".join(words), " ".join(reversed(words))]
+
+def person_keys(person: Person) -> List[bytes]:
+    keys = name_keys(person.result["name"]) + [normalize(person.result.get("admission_number"))]
+    return list(dict.fromkeys(_encode(key) for key in keys if key))
+
+class _PrefixArrays:
+    """Sorted keys of one kind and the suggestion each key leads to"""
+
+    def __init__(self, suggestions: List[Suggestion], keys: List[List[bytes]]):
+        flat = [key for entry_keys in keys for key in entry_keys]
+        owners = np.repeat(np.arange(len(keys), dtype=np.int32), [len(entry_keys) for entry_keys in keys])
+        flat = np.array(flat, dtype=f"S{KEY_BYTES}")
+        order = np.argsort(flat, kind="stable")
+        self.suggestions = suggestions
+        self.keys = flat[order]
+        self.entries = owners[order]
+
+    def lookup(self, prefix: bytes, limit: int) -> List[Suggestion]:
+        """The first ``limit`` suggestions with a key starting with ``prefix``, in key order"""
+        # No UTF-8 sequence contains 0xff, so this bounds every key with the prefix
+        start, end = np.searchsorted(self.keys, [prefix, prefix + b"\xff"])
+        found, seen = [], set()
+        for i in self.entries[start:end]:
+            if i not in seen:
+                seen.add(i)
+                found.append(self.suggestions[i])
+                if len(found) == limit:
+                    break
+        return found
+
+    def nbytes(self) -> int:
+        return self.keys.nbytes + self.entries.nbytes
+
+    def text_bytes(self) -> int:
+        return sum(sys.getsizeof(suggestion) + sys.getsizeof(suggestion.text) for suggestion in self.suggestions)
+
+def read_subjects(db: Session) -> _PrefixArrays:
+    subjects = db.execute(select(Subject.id, Subject.code, Subject.name)).all()
+    suggestions = [Suggestion("subject", id, f"{name} ({code})") for id, code, name in subjects]
+    keys = [
+        list(dict.fromkeys(_encode(key) for key in name_keys(name) + [normalize(code)] if key))
+        for _, code, name in subjects
+    ]
+    return _PrefixArrays(suggestions, keys)
+
+class SuggestionIndex:
+    """Prefix arrays per kind (student, teacher, subject), refreshed off the request path"""
+
+    KINDS = ("student", "teacher", "subject")
+
+    def __init__(self, people: PeopleIndex, session_factory=SessionLocal):
+        self.people = people
+        self.session_factory = session_factory
+        self._arrays: Dict[str, _PrefixArrays] = {}
+        # (kind, id) -> (person, suggestion, keys): only new or changed people are normalized again
+        self._entries: Dict[str, Dict[Tuple[str, int], Tuple[Person, Suggestion, List[bytes]]]] = {}
+        self._generations: Dict[str, int] = {}
+        self._subjects_version: Optional[Tuple] = None
+        self._refresh_lock = threading.Lock()
+
+    def refresh(self) -> List[str]:
+        """Bring every kind up to date (loading on first use); returns the kinds rebuilt"""
+        with self._refresh_lock:
+            self.people.ensure_current()
+            rebuilt = []
+            for kind in ("student", "teacher"):
+                generation = self.people.generations[kind]
+                if self._generations.get(kind) != generation:
+                    # Swapping the dict entry is atomic; readers keep the arrays they already hold
+                    self._arrays[kind] = self._people_arrays(kind)
+                    self._generations[kind] = generation
+                    rebuilt.append(kind)
+
+            with self.session_factory() as db:
+                version = tuple(db.execute(select(func.count(Subject.id), func.max(Subject.updated_at))).one())
+                if version != self._subjects_version:
+                    self._arrays["subject"] = read_subjects(db)
+                    self._subjects_version = version
+                    rebuilt.append("subject")
+            return rebuilt
+
+    def _people_arrays(self, kind: str) -> _PrefixArrays:
+        previous = self._entries.get(kind, {})
+        entries = {}
+        for person in self.people.people(kind):
+            entry = previous.get(person.key)
+            if entry is None or entry[0] is not person:
+                entry = (person, Suggestion(person.kind, person.id, person.suggestion), person_keys(person))
+            entries[person.key] = entry
+        self._entries[kind] = entries
+        return _PrefixArrays(
+            [suggestion for _, suggestion, _ in entries.values()],
+            [keys for _, _, keys in entries.values()]
+        )
+
+    def suggest(self, query: str, kinds: Iterable[str], limit: int = 5) -> List[Suggestion]:
+        """Up to ``limit`` suggestions of each of ``kinds`` whose keys start with ``query``"""
+        prefix = _encode(normalize(query))
+        if not prefix:
+            return []
+        suggestions = []
+        for kind in kinds:
+            arrays = self._arrays.get(kind)
+            if arrays is not None:
+                suggestions.extend(arrays.lookup(prefix, limit))
+        return suggestions
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Entries, keys and approximate bytes held per kind"""
+        return {
+            kind: {
+                "entries": len(arrays.suggestions),
+                "keys": len(arrays.keys),
+                "array_bytes": arrays.nbytes(),
+                "text_bytes": arrays.text_bytes(),
+            }
+            for kind, arrays in list(self._arrays.items())
+        }
+
+suggestion_index = SuggestionIndex(people_index)
+
+async def run_suggestion_refresher(interval: float = SUGGESTION_REFRESH_INTERVAL):
+    """Load the suggestion (and people search) indexes now, then keep them current until cancelled"""
+    while True:
+        try:
+            rebuilt = await asyncio.to_thread(suggestion_index.refresh)
+            if rebuilt:
+                logger.info(f"Search suggestions rebuilt: {', '.join(rebuilt)}")
+        except Exception as e:
+            logger.error(f"Error refreshing search suggestions: {e}")
+        await asyncio.sleep(interval)
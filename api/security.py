@@ -3,7 +3,11 @@ Security configuration and utilities
 """
 
 import os
-from typing import List
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any
 from fastapi import HTTPException, status
 from fastapi.security import HTTPBearer
 from passlib.context import CryptContext
@@ -11,6 +15,11 @@ from passlib.context import CryptContext
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt offload pool: workers run hashes in parallel (bcrypt releases the GIL),
+# anything beyond workers + queue limit is rejected with 503 instead of piling up
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "256"))
+
 # Security constants
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
@@ -40,6 +49,87 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+class PasswordHasher:
+    """Runs bcrypt work on a dedicated, size-limited thread pool"""
+    
+    def __init__(self, max_workers: int, queue_limit: int):
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+    
+    @property
+    def queue_depth(self) -> int:
+        """Jobs waiting for a free worker"""
+        return max(0, self.in_flight - self.max_workers)
+    
+    async def _run(self, func, *args):
+        with self._lock:
+            if self.in_flight >= self.max_workers + self.queue_limit:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Server busy, please retry",
+                    headers={"Retry-After": "1"}
+                )
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        
+        submitted_at = time.perf_counter()
+        
+        def timed():
+            started_at = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                finished_at = time.perf_counter()
+                with self._lock:
+                    self.total_wait_seconds += started_at - submitted_at
+                    self.total_run_seconds += finished_at - started_at
+        
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, timed)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+    
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password without blocking the event loop"""
+        return await self._run(verify_password, plain_password, hashed_password)
+    
+    async def hash(self, password: str) -> str:
+        """Hash a password without blocking the event loop"""
+        return await self._run(get_password_hash, password)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool utilisation and queue-depth metrics"""
+        completed = max(self.completed, 1)
+        return {
+            "workers": self.max_workers,
+            "queue_limit": self.queue_limit,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_in_flight": self.max_in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.total_wait_seconds / completed * 1000, 2),
+            "avg_run_ms": round(self.total_run_seconds / completed * 1000, 2)
+        }
+    
+    def shutdown(self):
+        """Stop the worker threads"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_LIMIT)
+
 def validate_file_upload(filename: str, file_size: int, file_type: str = 'document') -> bool:
     """Validate file upload security"""
     # Check file size
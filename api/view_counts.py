@@ -0,0 +1,119 @@
+"""
+Write-behind buffer for blog post view counts
+
+A page view only bumps an in-memory counter; a background task flushes
+the counters every BLOG_VIEW_FLUSH_INTERVAL seconds with one executemany
+``UPDATE blog_posts SET view_count = view_count + :n WHERE id = :id``, so
+reading a post never takes a row lock. Each worker process keeps its own
+buffer; the increments are additive, so workers never overwrite each other.
+Views buffered when a worker dies without shutting down are lost, which is
+the trade for not writing on every read.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy import bindparam, func, update
+
+from api.database import SessionLocal
+from models.models import BlogPost
+
+logger = logging.getLogger(__name__)
+
+BLOG_VIEW_FLUSH_INTERVAL = float(os.getenv("BLOG_VIEW_FLUSH_INTERVAL", "10"))
+
+VIEW_FLUSH_LAG = Gauge(
+    "blog_view_flush_lag_seconds",
+    "Age of the oldest buffered blog view at the last flush that wrote views",
+    multiprocess_mode="max",
+)
+VIEWS_PENDING = Gauge(
+    "blog_views_pending",
+    "Blog views buffered and not yet written",
+    multiprocess_mode="livesum",
+)
+VIEWS_FLUSHED = Counter(
+    "blog_views_flushed_total",
+    "Blog views written to blog_posts.view_count",
+)
+VIEW_FLUSH_ERRORS = Counter(
+    "blog_view_flush_errors_total",
+    "Failed view count flushes (the views are kept for the next one)",
+)
+
+class ViewCountBuffer:
+    """Thread-safe {post_id: views} accumulator with a batched flush"""
+
+    def __init__(self):
+        self._counts: Dict[int, int] = {}
+        # Every view this worker has counted, flushed or not
+        self._recorded: Dict[int, int] = {}
+        self._oldest: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record(self, post_id: int) -> int:
+        """Count one view; returns the views buffered for the post so far"""
+        with self._lock:
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            count = self._counts.get(post_id, 0) + 1
+            self._counts[post_id] = count
+            self._recorded[post_id] = self._recorded.get(post_id, 0) + 1
+        VIEWS_PENDING.inc()
+        return count
+
+    def pending(self, post_id: int) -> int:
+        """Views buffered for ``post_id`` and not yet written"""
+        return self._counts.get(post_id, 0)
+
+    def recorded(self, post_id: int) -> int:
+        """Views this worker has counted for ``post_id`` since it started, flushed or not"""
+        return self._recorded.get(post_id, 0)
+
+    def flush(self) -> int:
+        """Write every buffered count in one statement; returns the views written"""
+        with self._lock:
+            counts, oldest = self._counts, self._oldest
+            self._counts, self._oldest = {}, None
+        if not counts:
+            return 0
+
+        VIEW_FLUSH_LAG.set(time.monotonic() - oldest)
+        table = BlogPost.__table__
+        statement = update(table).where(table.c.id == bindparam("post_id")).values(
+            view_count=func.coalesce(table.c.view_count, 0) + bindparam("views")
+        )
+        try:
+            with SessionLocal() as db:
+                db.execute(statement, [{"post_id": post_id, "views": views} for post_id, views in counts.items()])
+                db.commit()
+        except Exception:
+            VIEW_FLUSH_ERRORS.inc()
+            # Put them back so the next flush retries them
+            with self._lock:
+                for post_id, views in counts.items():
+                    self._counts[post_id] = self._counts.get(post_id, 0) + views
+                if self._oldest is None or oldest < self._oldest:
+                    self._oldest = oldest
+            raise
+
+        views = sum(counts.values())
+        VIEWS_PENDING.dec(views)
+        VIEWS_FLUSHED.inc(views)
+        return views
+
+view_counts = ViewCountBuffer()
+
+async def run_view_count_flusher(interval: float = BLOG_VIEW_FLUSH_INTERVAL):
+    """Flush buffered views every ``interval`` seconds until cancelled"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(view_counts.flush)
+        except Exception as e:
+            logger.error(f"Error flushing blog view counts: {e}")
@@ -0,0 +1,352 @@
+"""
+Concurrent-request benchmark for the FastAPI backend
+
+Run it against a live server (``python start_server.py``), once on the
+build you want to compare against and once on the current build:
+
+    python benchmark_api.py --concurrency 50 --requests 1000
+    python benchmark_api.py --scenario login --concurrency 200 --requests 200
+    python benchmark_api.py --scenario registers --concurrency 60
+    python benchmark_api.py --scenario dashboard --concurrency 500 --requests 500
+    python benchmark_api.py --scenario blog --concurrency 50 --requests 2000
+    python benchmark_api.py --scenario blog-list --concurrency 50 --requests 2000
+    python benchmark_api.py --scenario global-search --concurrency 10 --requests 500
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date
+
+import httpx
+
+BASE_URL = "http://localhost:8001"
+
+# Hot read endpoints served from the async session
+LIST_ENDPOINTS = [
+    "/api/v1/students/?size=50",
+    "/api/v1/grades/?size=50",
+    "/api/v1/attendance/records?size=50",
+    "/api/v1/fees/invoices?size=50",
+]
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def summarize(name, latencies, errors, elapsed):
+    """Print throughput and latency percentiles for one run"""
+    count = len(latencies)
+    print(f"\n📊 {name}")
+    print(f"   Requests:   {count} ok / {errors} failed in {elapsed:.2f}s")
+    print(f"   Throughput: {count / elapsed if elapsed else 0:.1f} req/s")
+    if latencies:
+        print(f"   Latency:    p50={percentile(latencies, 50) * 1000:.1f}ms "
+              f"p95={percentile(latencies, 95) * 1000:.1f}ms "
+              f"p99={percentile(latencies, 99) * 1000:.1f}ms "
+              f"mean={statistics.mean(latencies) * 1000:.1f}ms")
+
+async def login(client, username, password):
+    """Log in and return auth headers"""
+    response = await client.post("/api/v1/auth/login", json={"username": username, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+async def run_load(client, paths, total, concurrency, headers=None):
+    """Fire ``total`` GET requests over ``paths`` with bounded concurrency"""
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.get(paths[i % len(paths)], headers=headers)
+                if response.status_code >= 400:
+                    errors += 1
+                    return
+            except httpx.HTTPError:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return latencies, errors, time.perf_counter() - start
+
+async def probe_while_loaded(client, paths, total, concurrency, headers):
+    """
+    Measure latency of a trivial endpoint while the list endpoints are under
+    load. If handlers block the event loop this number tracks the slowest query.
+    """
+    probe_latencies = []
+    load = asyncio.create_task(run_load(client, paths, total, concurrency, headers))
+    while not load.done():
+        start = time.perf_counter()
+        await client.post("/api/v1/auth/logout")
+        probe_latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.05)
+    latencies, errors, elapsed = await load
+    return (latencies, errors, elapsed), probe_latencies
+
+async def benchmark_lists(args):
+    """Throughput of the hot list endpoints plus event-loop responsiveness"""
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        headers = await login(client, args.username, args.password)
+        # Warm up connection pools and caches
+        await run_load(client, LIST_ENDPOINTS, min(args.requests, 50), args.concurrency, headers)
+
+        (latencies, errors, elapsed), probe = await probe_while_loaded(
+            client, LIST_ENDPOINTS, args.requests, args.concurrency, headers
+        )
+        summarize(f"List endpoints @ concurrency {args.concurrency}", latencies, errors, elapsed)
+        summarize("Trivial endpoint while list endpoints are loaded", probe, 0, sum(probe))
+
+async def benchmark_login(args):
+    """Latency of a burst of concurrent logins (bcrypt-bound)"""
+    # One connection per login, like a rush of distinct clients
+    limits = httpx.Limits(max_connections=args.concurrency + 1, max_keepalive_connections=0)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=120) as client:
+        latencies, errors = [], 0
+        rejected = 0
+        semaphore = asyncio.Semaphore(args.concurrency)
+        payload = {"username": args.username, "password": args.password}
+
+        async def one():
+            nonlocal errors, rejected
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/api/v1/auth/login", json=payload)
+                if response.status_code == 503:
+                    rejected += 1
+                elif response.status_code != 200:
+                    errors += 1
+                else:
+                    latencies.append(time.perf_counter() - start)
+
+        # Probe a trivial endpoint during the burst to show the loop stays free
+        async def probe():
+            samples = []
+            while len(latencies) + errors + rejected < args.requests:
+                start = time.perf_counter()
+                await client.post("/api/v1/auth/logout")
+                samples.append(time.perf_counter() - start)
+                await asyncio.sleep(0.05)
+            return samples
+
+        start = time.perf_counter()
+        probe_task = asyncio.create_task(probe())
+        await asyncio.gather(*(one() for _ in range(args.requests)))
+        elapsed = time.perf_counter() - start
+        probe_samples = await probe_task
+
+        summarize(f"{args.requests} logins @ concurrency {args.concurrency}", latencies, errors, elapsed)
+        if rejected:
+            print(f"   Rejected:   {rejected} (503, hash queue full)")
+        summarize("Trivial endpoint during the login burst", probe_samples, 0, sum(probe_samples))
+
+        metrics = (await client.get("/metrics/summary")).json()
+        if "password_hashing" in metrics:
+            print(f"\n🔐 Hash pool: {metrics['password_hashing']}")
+
+async def class_rosters(client, headers):
+    """{classroom_id: [student_id, ...]} walked from the students list with cursors"""
+    rosters, cursor = {}, None
+    while True:
+        params = {"size": 100, **({"cursor": cursor} if cursor else {})}
+        page = (await client.get("/api/v1/students/", params=params, headers=headers)).json()
+        for student in page["data"]:
+            if student["classroom"]:
+                rosters.setdefault(student["classroom"]["id"], []).append(student["id"])
+        cursor = page["pagination"]["next_cursor"]
+        if not cursor:
+            return rosters
+
+async def benchmark_registers(args):
+    """
+    Morning register rush: every class marks its register at once, first
+    with one bulk request per class, then with one request per student
+    """
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=120) as client:
+        headers = await login(client, args.username, args.password)
+        rosters = await class_rosters(client, headers)
+        students = sum(len(roster) for roster in rosters.values())
+        print(f"   {len(rosters)} classes, {students} students")
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def new_sessions():
+            sessions = {}
+            for classroom_id in rosters:
+                response = await client.post("/api/v1/attendance/sessions", headers=headers, json={
+                    "classroom_id": classroom_id, "date": date.today().isoformat()
+                })
+                response.raise_for_status()
+                sessions[classroom_id] = response.json()["id"]
+            return sessions
+
+        async def timed_post(path, payload, latencies, failures):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(path, json=payload, headers=headers)
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    failures.append(response.status_code)
+
+        sessions = await new_sessions()
+        latencies, failures = [], []
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            timed_post(f"/api/v1/attendance/sessions/{sessions[classroom_id]}/records:bulk", {
+                "records": [{"student_id": student_id, "status": "PRESENT"} for student_id in roster]
+            }, latencies, failures)
+            for classroom_id, roster in rosters.items()
+        ))
+        elapsed = time.perf_counter() - start
+        summarize(f"Bulk: {len(rosters)} registers, one request each", latencies, len(failures), elapsed)
+        print(f"   Registers:  {students / elapsed:.0f} students marked/s")
+
+        sessions = await new_sessions()
+        latencies, failures = [], []
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            timed_post("/api/v1/attendance/records", {
+                "student_id": student_id, "session_id": sessions[classroom_id], "status": "PRESENT"
+            }, latencies, failures)
+            for classroom_id, roster in rosters.items() for student_id in roster
+        ))
+        elapsed = time.perf_counter() - start
+        summarize(f"Single: {students} requests, one per student", latencies, len(failures), elapsed)
+        print(f"   Registers:  {students / elapsed:.0f} students marked/s")
+
+async def benchmark_dashboard(args):
+    """
+    8am rush: everyone opens the dashboard at once. Start the server with
+    QUERY_COUNT_HEADER=true to see how many statements the burst cost.
+    """
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=120) as client:
+        headers = await login(client, args.username, args.password)
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies, queries, failures = [], [], 0
+
+        async def one():
+            nonlocal failures
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get("/api/v1/dashboard/stats", headers=headers)
+                if response.status_code != 200:
+                    failures += 1
+                    return
+                latencies.append(time.perf_counter() - start)
+                if "X-Query-Count" in response.headers:
+                    queries.append(int(response.headers["X-Query-Count"]))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(args.requests)))
+        summarize(f"Dashboard stats, {args.requests} requests @ concurrency {args.concurrency}",
+                  latencies, failures, time.perf_counter() - start)
+        if queries:
+            print(f"   Statements: {sum(queries)} in total, {max(queries)} at most per request")
+
+async def benchmark_blog(args):
+    """A shared news post: anonymous reads of one post, each counting a view"""
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=120) as client:
+        posts = (await client.get("/api/v1/blog/", params={"size": 1})).json()["data"]
+        if not posts:
+            print("⚠️  No published blog posts")
+            return
+        path = f"/api/v1/blog/{posts[0]['slug']}"
+        latencies, errors, elapsed = await run_load(client, [path], args.requests, args.concurrency)
+        summarize(f"Blog post reads @ concurrency {args.concurrency}", latencies, errors, elapsed)
+
+        # Revalidations: what browsers and nginx send once they hold a copy
+        etag = (await client.get(path)).headers.get("etag")
+        if etag:
+            headers = {"If-None-Match": etag}
+            latencies, errors, elapsed = await run_load(client, [path], args.requests, args.concurrency, headers)
+            summarize(f"Blog post revalidations @ concurrency {args.concurrency}", latencies, errors, elapsed)
+
+async def benchmark_blog_list(args):
+    """Anonymous reads of the public blog listing: the first pages, a category and a search"""
+    paths = [
+        "/api/v1/blog/",
+        "/api/v1/blog/?page=2",
+        "/api/v1/blog/?category=NEWS",
+        "/api/v1/blog/?search=school",
+    ]
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=120) as client:
+        latencies, errors, elapsed = await run_load(client, paths, args.requests, args.concurrency)
+        summarize(f"Blog listing reads @ concurrency {args.concurrency}", latencies, errors, elapsed)
+
+async def benchmark_global_search(args):
+    """Search-box queries against /search/global, with the per-entity timings it reports"""
+    queries = ["stu", "dent", "school", "adm0012", "studnet", "results"]
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=120) as client:
+        headers = await login(client, args.username, args.password)
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies, timings, timed_out, failures = [], {}, {}, 0
+
+        async def one(i):
+            nonlocal failures
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get("/api/v1/search/global", params={"q": queries[i % len(queries)]}, headers=headers)
+                if response.status_code != 200:
+                    failures += 1
+                    return
+                latencies.append(time.perf_counter() - start)
+                body = response.json()
+                for entity, ms in body.get("timings_ms", {}).items():
+                    timings.setdefault(entity, []).append(ms)
+                for entity in body.get("timed_out", []):
+                    timed_out[entity] = timed_out.get(entity, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        summarize(f"Global search @ concurrency {args.concurrency}", latencies, failures, time.perf_counter() - start)
+        for entity, samples in timings.items():
+            print(f"   {entity:<11} p50={percentile(samples, 50):.1f}ms p95={percentile(samples, 95):.1f}ms "
+                  f"timed out {timed_out.get(entity, 0)}x")
+
+def main():
+    """Parse arguments and run the selected benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=["lists", "login", "registers", "dashboard", "blog", "blog-list", "global-search"], default="lists")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    print("🏁 Benchmarking FastAPI Backend...")
+    print("=" * 50)
+    if args.scenario == "login":
+        asyncio.run(benchmark_login(args))
+    elif args.scenario == "registers":
+        asyncio.run(benchmark_registers(args))
+    elif args.scenario == "dashboard":
+        asyncio.run(benchmark_dashboard(args))
+    elif args.scenario == "blog":
+        asyncio.run(benchmark_blog(args))
+    elif args.scenario == "blog-list":
+        asyncio.run(benchmark_blog_list(args))
+    elif args.scenario == "global-search":
+        asyncio.run(benchmark_global_search(args))
+    else:
+        asyncio.run(benchmark_lists(args))
+
+if __name__ == "__main__":
+    main()
@@ -3,21 +3,31 @@ FastAPI Backend for Regisbridge College Management System
 """
 
 import os
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Header, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
+import asyncio
+import time
 import uvicorn
+from typing import Optional
 
 from api.routers import auth, students, teachers, parents, grades, attendance, fees, payments, dashboard, admin, blog
 from api import reports, notifications, search, mobile
-from api.database import get_db, create_tables
+from api.database import get_db, create_tables, engine, async_engine
 from api.auth import get_current_user
-from api.monitoring import get_system_health, get_metrics, increment_request_count, increment_error_count
+from api.monitoring import monitor, get_system_health, get_metrics, is_ready, increment_request_count, increment_error_count
+from api.metrics import (
+    QUERY_COUNT_HEADER, REQUESTS_IN_PROGRESS, REQUEST_EXCEPTIONS, instrument_engine, get_route_template,
+    start_request, end_request, observe_request, generate_metrics, mark_worker_dead
+)
 from api.logging import log_system_event, log_error
-from api.security import ALLOWED_ORIGINS
+from api.security import ALLOWED_ORIGINS, password_hasher
+from api.view_counts import view_counts, run_view_count_flusher
+from api.http_cache import REVALIDATE_CACHE_CONTROL, file_response
+from api.search_suggestions import run_suggestion_refresher
 from models.models import User
 
 # Security
@@ -30,9 +40,31 @@ async def lifespan(app: FastAPI):
     # Create database tables
     create_tables()
     print("✅ Database tables created/verified")
+    # Take a first health sample, then keep refreshing it in the background
+    await monitor.sample()
+    sampler_task = asyncio.create_task(monitor.run_sampler())
+    # Expire archived report cards and finished bulk report jobs
+    report_sweeper_task = asyncio.create_task(reports.run_report_sweeper())
+    # Write buffered blog view counts back in batches
+    view_flusher_task = asyncio.create_task(run_view_count_flusher())
+    # Build the people search and suggestion indexes, then keep them current
+    suggestion_refresher_task = asyncio.create_task(run_suggestion_refresher())
     yield
     # Shutdown
     print("🛑 Shutting down Regisbridge FastAPI Backend...")
+    sampler_task.cancel()
+    report_sweeper_task.cancel()
+    view_flusher_task.cancel()
+    suggestion_refresher_task.cancel()
+    try:
+        view_counts.flush()
+    except Exception as e:
+        log_error(e, "Flushing blog view counts on shutdown")
+    await async_engine.dispose()
+    password_hasher.shutdown()
+    reports.report_card_jobs.shutdown()
+    search.search_executor.shutdown(wait=False, cancel_futures=True)
+    mark_worker_dead()
 
 # Create FastAPI app
 app = FastAPI(
@@ -53,17 +85,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Time every database statement so requests can report their DB time
+instrument_engine(engine)
+instrument_engine(async_engine)
+
 # Add middleware for monitoring
 @app.middleware("http")
 async def monitoring_middleware(request, call_next):
     increment_request_count()
+    method = request.method
+    route = get_route_template(request)
+    in_progress = REQUESTS_IN_PROGRESS.labels(method, route)
+    in_progress.inc()
+    usage, token = start_request()
+    start_time = time.perf_counter()
+    status_code = 500
     try:
         response = await call_next(request)
+        status_code = response.status_code
+        if QUERY_COUNT_HEADER:
+            response.headers["X-Query-Count"] = str(usage.queries)
         return response
     except Exception as e:
         increment_error_count()
+        REQUEST_EXCEPTIONS.labels(method, route, type(e).__name__).inc()
         log_error(e, f"Request to {request.url}")
         raise
+    finally:
+        observe_request(method, route, status_code, time.perf_counter() - start_time, usage)
+        end_request(token)
+        in_progress.dec()
 
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
@@ -87,10 +138,13 @@ if os.path.exists("frontend/dist"):
     app.mount("/assets", StaticFiles(directory="frontend/dist/assets"), name="assets")
 
 @app.get("/")
-async def root():
-    """Serve the frontend application"""
+async def root(
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None)
+):
+    """Serve the frontend application (revalidated on every load so a deploy shows up at once)"""
     if os.path.exists("frontend/dist/index.html"):
-        return FileResponse("frontend/dist/index.html")
+        return file_response("frontend/dist/index.html", REVALIDATE_CACHE_CONTROL, if_none_match, if_modified_since)
     else:
         return {
             "message": "Welcome to Regisbridge College Management System API",
@@ -100,9 +154,21 @@ async def root():
             "note": "Frontend not built. Run 'npm run build' in frontend directory."
         }
 
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness probe: the process is up and the event loop is responding"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness probe: a fresh background sample saw the database answer"""
+    if is_ready():
+        return {"status": "ready"}
+    return JSONResponse(status_code=503, content={"status": "not_ready"})
+
 @app.get("/health")
 async def health_check():
-    """Health check endpoint for monitoring"""
+    """Health check endpoint for monitoring (serves the latest background sample)"""
     try:
         health_data = get_system_health()
         return health_data
@@ -116,7 +182,13 @@ async def health_check():
 
 @app.get("/metrics")
 async def metrics():
-    """Application metrics endpoint"""
+    """Prometheus metrics endpoint (aggregated across workers)"""
+    data, content_type = generate_metrics()
+    return Response(content=data, headers={"Content-Type": content_type})
+
+@app.get("/metrics/summary")
+async def metrics_summary():
+    """Application metrics summary for this worker"""
     try:
         metrics_data = get_metrics()
         return metrics_data
@@ -139,10 +211,14 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
     }
 
 @app.get("/{full_path:path}")
-async def serve_frontend(full_path: str):
+async def serve_frontend(
+    full_path: str,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None)
+):
     """Catch-all route to serve frontend for React Router"""
     if os.path.exists("frontend/dist/index.html"):
-        return FileResponse("frontend/dist/index.html")
+        return file_response("frontend/dist/index.html", REVALIDATE_CACHE_CONTROL, if_none_match, if_modified_since)
     else:
         raise HTTPException(status_code=404, detail="Frontend not found")
 
@@ -2,7 +2,7 @@
 Attendance-related models
 """
 
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Date, Time, Enum
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Date, Time, Enum, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 import enum
@@ -16,6 +16,9 @@ class AttendanceStatus(str, enum.Enum):
 class AttendanceSession(BaseModel):
     """Attendance session model"""
     __tablename__ = "attendance_sessions"
+    __table_args__ = (
+        Index("ix_attendance_sessions_classroom_date", "classroom_id", "date"),
+    )
     
     classroom_id = Column(Integer, ForeignKey("classrooms.id"), nullable=False)
     date = Column(Date, nullable=False)
@@ -33,6 +36,10 @@ class AttendanceSession(BaseModel):
 class AttendanceRecord(BaseModel):
     """Individual attendance record"""
     __tablename__ = "attendance_records"
+    __table_args__ = (
+        Index("ix_attendance_records_student_session", "student_id", "session_id"),
+        Index("ix_attendance_records_session_status", "session_id", "status"),
+    )
     
     student_id = Column(Integer, ForeignKey("student_profiles.id"), nullable=False)
     session_id = Column(Integer, ForeignKey("attendance_sessions.id"), nullable=False)
@@ -45,3 +52,29 @@ class AttendanceRecord(BaseModel):
     
     def __str__(self):
         return f"{self.student.user.full_name} - {self.session.date}: {self.status.value}"
+
+class AttendanceDailyRollup(BaseModel):
+    """
+    Attendance counts per student, classroom and day, one column per status.
+    Maintained by the attendance record handlers (api/attendance_rollup.py)
+    so statistics read these rows instead of scanning attendance_records.
+    """
+    __tablename__ = "attendance_daily_rollups"
+    __table_args__ = (
+        UniqueConstraint("student_id", "classroom_id", "date", name="uq_attendance_daily_rollups_student_classroom_date"),
+        Index("ix_attendance_daily_rollups_classroom_date", "classroom_id", "date"),
+        # Covering: date-window totals are read from the index alone
+        Index("ix_attendance_daily_rollups_date_counts", "date", "present", "absent", "late", "excused", "total"),
+    )
+    
+    student_id = Column(Integer, ForeignKey("student_profiles.id"), nullable=False)
+    classroom_id = Column(Integer, ForeignKey("classrooms.id"), nullable=False)
+    date = Column(Date, nullable=False)
+    present = Column(Integer, nullable=False, default=0)
+    absent = Column(Integer, nullable=False, default=0)
+    late = Column(Integer, nullable=False, default=0)
+    excused = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=False, default=0)
+    
+    def __str__(self):
+        return f"Student {self.student_id} - {self.date}: {self.present}/{self.total}"
@@ -2,10 +2,12 @@
 Blog and news models
 """
 
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum, Index, DDL, event
+from sqlalchemy.orm import relationship, validates
 from .base import BaseModel
 import enum
+import html
+import re
 
 class PostStatus(str, enum.Enum):
     DRAFT = "DRAFT"
@@ -20,13 +22,28 @@ class PostCategory(str, enum.Enum):
     SPORTS = "SPORTS"
     GENERAL = "GENERAL"
 
+_INVISIBLE_HTML = re.compile(r"<!--.*?-->|<(script|style)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_HTML_TAG = re.compile(r"<[^>]*>")
+
+def html_to_text(value):
+    """The readable text of an HTML fragment: tags dropped, entities decoded, whitespace collapsed"""
+    if value is None:
+        return None
+    text = _HTML_TAG.sub(" ", _INVISIBLE_HTML.sub(" ", value))
+    return " ".join(html.unescape(text).split())
+
 class BlogPost(BaseModel):
     """Blog post model"""
     __tablename__ = "blog_posts"
+    __table_args__ = (
+        Index("ix_blog_posts_status_published", "status", "published_at"),
+    )
 
     title = Column(String(200), nullable=False)
     slug = Column(String(250), unique=True, nullable=False)
-    content = Column(Text, nullable=False)
+    content = Column(Text, nullable=False)  # HTML
+    # content without its markup, kept in step by set_content; the full-text index reads this
+    search_text = Column(Text, nullable=True)
     excerpt = Column(Text, nullable=True)
     author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     category = Column(Enum(PostCategory), nullable=False)
@@ -44,9 +61,50 @@ class BlogPost(BaseModel):
     author = relationship("User")
     comments = relationship("PostComment", back_populates="post")
 
+    @validates("content")
+    def set_content(self, key, value):
+        self.search_text = html_to_text(value)
+        return value
+
     def __str__(self):
         return self.title
 
+# Full-text index over title, excerpt and the text of the content (queried by
+# api/blog_search.py); tag and attribute names never reach it.
+# SQLite: an external-content FTS5 table kept in step by triggers; the update
+# trigger only fires for the indexed columns, so view count writes skip it.
+BLOG_POSTS_FTS_SQLITE = [
+    "CREATE VIRTUAL TABLE blog_posts_fts USING fts5("
+    "title, excerpt, search_text, content='blog_posts', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER blog_posts_fts_insert AFTER INSERT ON blog_posts BEGIN "
+    "INSERT INTO blog_posts_fts(rowid, title, excerpt, search_text) VALUES (new.id, new.title, new.excerpt, new.search_text); "
+    "END",
+    "CREATE TRIGGER blog_posts_fts_delete AFTER DELETE ON blog_posts BEGIN "
+    "INSERT INTO blog_posts_fts(blog_posts_fts, rowid, title, excerpt, search_text) "
+    "VALUES ('delete', old.id, old.title, old.excerpt, old.search_text); "
+    "END",
+    "CREATE TRIGGER blog_posts_fts_update AFTER UPDATE OF title, excerpt, search_text ON blog_posts BEGIN "
+    "INSERT INTO blog_posts_fts(blog_posts_fts, rowid, title, excerpt, search_text) "
+    "VALUES ('delete', old.id, old.title, old.excerpt, old.search_text); "
+    "INSERT INTO blog_posts_fts(rowid, title, excerpt, search_text) VALUES (new.id, new.title, new.excerpt, new.search_text); "
+    "END",
+]
+# PostgreSQL: a stored generated tsvector (title > excerpt > content text) with a GIN index
+BLOG_POSTS_FTS_POSTGRESQL = [
+    "ALTER TABLE blog_posts ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(excerpt, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(search_text, '')), 'C')) STORED",
+    "CREATE INDEX ix_blog_posts_search_vector ON blog_posts USING GIN (search_vector)",
+]
+
+for _statement in BLOG_POSTS_FTS_SQLITE:
+    event.listen(BlogPost.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+for _statement in BLOG_POSTS_FTS_POSTGRESQL:
+    event.listen(BlogPost.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+event.listen(BlogPost.__table__, "before_drop", DDL("DROP TABLE IF EXISTS blog_posts_fts").execute_if(dialect="sqlite"))
+
 class PostComment(BaseModel):
     """Blog post comment model"""
     __tablename__ = "post_comments"
@@ -2,7 +2,7 @@
 Fee and finance models
 """
 
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Date, Float, Enum
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Date, Float, Enum, Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 import enum
@@ -44,6 +44,10 @@ class FeeStructure(BaseModel):
 class Invoice(BaseModel):
     """Invoice model"""
     __tablename__ = "invoices"
+    __table_args__ = (
+        Index("ix_invoices_status_due_date", "status", "due_date"),
+        Index("ix_invoices_student_status", "student_id", "status"),
+    )
     
     student_id = Column(Integer, ForeignKey("student_profiles.id"), nullable=False)
     invoice_number = Column(String(50), unique=True, nullable=False)
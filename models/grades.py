@@ -2,7 +2,7 @@
 Grade and assessment models
 """
 
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Date, Float, Boolean, Enum
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Date, Float, Boolean, Enum, Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 import enum
@@ -58,6 +58,10 @@ class Assessment(BaseModel):
 class Grade(BaseModel):
     """Grade model"""
     __tablename__ = "grades"
+    __table_args__ = (
+        Index("ix_grades_student_assessment", "student_id", "assessment_id", unique=True),
+        Index("ix_grades_assessment", "assessment_id"),
+    )
     
     student_id = Column(Integer, ForeignKey("student_profiles.id"), nullable=False)
     assessment_id = Column(Integer, ForeignKey("assessments.id"), nullable=False)
@@ -2,7 +2,7 @@
 Messaging and communication models
 """
 
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 import enum
@@ -38,6 +38,9 @@ class Thread(BaseModel):
 class Message(BaseModel):
     """Message model"""
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_thread_created", "thread_id", "created_at"),
+    )
 
     thread_id = Column(Integer, ForeignKey("threads.id"), nullable=False)
     sender_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -82,6 +85,9 @@ class ThreadParticipant(BaseModel):
 class Notification(BaseModel):
     """Notification model"""
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_user_read_created", "user_id", "is_read", "created_at"),
+    )
 
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     title = Column(String(200), nullable=False)
@@ -14,7 +14,7 @@ from .grades import (
     Term, Assessment, Grade, AssessmentType
 )
 from .attendance import (
-    AttendanceSession, AttendanceRecord, AttendanceStatus
+    AttendanceSession, AttendanceRecord, AttendanceStatus, AttendanceDailyRollup
 )
 from .fees import (
     FeeStructure, Invoice, FeeType, InvoiceStatus
@@ -80,6 +80,7 @@ __all__ = [
     "AttendanceSession",
     "AttendanceRecord",
     "AttendanceStatus",
+    "AttendanceDailyRollup",
     
     # Fee models
     "FeeStructure",
@@ -2,7 +2,7 @@
 Payment and financial models
 """
 
-from sqlalchemy import Column, Integer, String, Text, Boolean, Date, DateTime, ForeignKey, Enum, Float, Numeric
+from sqlalchemy import Column, Integer, String, Text, Boolean, Date, DateTime, ForeignKey, Enum, Float, Numeric, Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 import enum
@@ -40,6 +40,9 @@ class FeeType(str, enum.Enum):
 class Payment(BaseModel):
     """Payment model"""
     __tablename__ = "payments"
+    __table_args__ = (
+        Index("ix_payments_invoice", "invoice_id"),
+    )
 
     invoice_id = Column(Integer, ForeignKey("invoices.id"), nullable=False)
     amount = Column(Numeric(10, 2), nullable=False)
@@ -2,7 +2,7 @@
 Student-related models
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, Date, Text, ForeignKey, Enum, Table
+from sqlalchemy import Column, Integer, String, Boolean, Date, Text, ForeignKey, Enum, Table, Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 import enum
@@ -94,6 +94,10 @@ class Bed(BaseModel):
 class StudentProfile(BaseModel):
     """Student profile model"""
     __tablename__ = "student_profiles"
+    __table_args__ = (
+        Index("ix_student_profiles_classroom", "classroom_id"),
+        Index("ix_student_profiles_grade_level", "grade_level_id"),
+    )
     
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True)
     admission_number = Column(String(30), unique=True, nullable=False)
@@ -0,0 +1,28 @@
+"""
+Rebuild the attendance rollup table from attendance_records
+
+Run after deploying the rollup for the first time, or whenever records were
+changed outside the API (imports, manual SQL):
+
+    python rebuild_attendance_rollup.py
+"""
+
+import time
+
+from api.database import SessionLocal, create_tables
+from api.attendance_rollup import rebuild_attendance_rollup
+
+def main():
+    """Recompute every rollup row in one transaction"""
+    create_tables()
+    db = SessionLocal()
+    try:
+        print("🔄 Rebuilding attendance rollup...")
+        started = time.perf_counter()
+        rows = rebuild_attendance_rollup(db)
+        print(f"✅ Wrote {rows:,} rollup rows in {time.perf_counter() - started:.1f}s")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Checks that blog search reads the text of a post, not its HTML
+
+Builds the schema from the models in a throwaway SQLite database, stores a
+post whose content is HTML and searches it through api/blog_search.py:
+words that only occur in tags or attributes must not match, and snippets
+must be escaped text whose only markup is the highlight. Runs standalone
+or under pytest:
+
+    python test_blog_search.py
+"""
+
+import os
+import sys
+import tempfile
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from api import blog_search
+from models.models import Base, BlogPost, User
+from models.blog import PostCategory, PostStatus
+
+HTML_CONTENT = (
+    '<p class="lead"><strong>Results</strong> of the inter-house athletics &amp; swimming gala.</p>'
+    '<p>See the <a href="https://example.com/photos">photo gallery</a> for more.</p>'
+    '<script>var tracker = "hidden";</script>'
+)
+
+def search(db, text):
+    """Ids of the posts matching ``text``, and their snippets"""
+    terms = blog_search.search_terms(text)
+    post_ids = list(db.scalars(blog_search.matching_posts(db, terms)))
+    return post_ids, blog_search.snippets(db, terms, post_ids)
+
+def check_html_content(db_url):
+    """Return a list of failure messages (empty when search ignores the markup)"""
+    engine = create_engine(db_url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    author = User(
+        username="author", email="author@example.com", password_hash="-",
+        first_name="Blog", last_name="Author", role="ADMIN"
+    )
+    db.add(author)
+    db.flush()
+    post = BlogPost(
+        title="Sports day", slug="sports-day", content=HTML_CONTENT, excerpt="Gala day",
+        author_id=author.id, category=PostCategory.SPORTS, status=PostStatus.PUBLISHED
+    )
+    db.add(post)
+    db.commit()
+
+    failures = []
+    for markup in ("strong", "href", "class lead", "tracker"):
+        post_ids, _ = search(db, markup)
+        if post_ids:
+            failures.append(f"{markup!r} matched through the markup")
+
+    post_ids, found = search(db, "swimming")
+    if post_ids != [post.id]:
+        failures.append(f"'swimming' should match the post, got {post_ids}")
+    else:
+        snippet = found[post.id] or ""
+        if "<mark>swimming</mark>" not in snippet:
+            failures.append(f"match not highlighted: {snippet!r}")
+        if "&amp;" not in snippet:
+            failures.append(f"snippet text not escaped: {snippet!r}")
+        if snippet.replace("<mark>", "").replace("</mark>", "").count("<"):
+            failures.append(f"snippet carries markup: {snippet!r}")
+
+    # Editing the content re-indexes the new text
+    post.content = "<em>Netball</em> fixtures"
+    db.commit()
+    if search(db, "swimming")[0] or search(db, "netball")[0] != [post.id]:
+        failures.append("edited content not re-indexed")
+    if db.scalar(select(BlogPost.search_text).where(BlogPost.id == post.id)) != "Netball fixtures":
+        failures.append("search_text not kept in step with content")
+
+    db.close()
+    engine.dispose()
+    return failures
+
+def test_search_ignores_html():
+    """pytest entry point: markup never matches and snippets are escaped text"""
+    with tempfile.TemporaryDirectory() as tmp:
+        failures = check_html_content(f"sqlite:///{os.path.join(tmp, 'blog.db')}")
+    assert not failures, failures
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        failures = check_html_content(f"sqlite:///{os.path.join(tmp, 'blog.db')}")
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✅ Blog search ignores HTML markup and escapes snippets")
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,11 @@ Comprehensive test script to verify all system functionality
 """
 
 import requests
+import io
 import json
 import sys
+import time
+import zipfile
 
 BASE_URL = "http://localhost:8001"
 
@@ -69,6 +72,7 @@ def test_api_endpoints(headers):
     
     # Test grades
     test_endpoint("GET", f"{BASE_URL}/api/v1/grades/", headers=headers)
+    test_endpoint("GET", f"{BASE_URL}/api/v1/grades/gradebook?classroom_id=1&term_id=1", headers=headers)
     
     # Test attendance
     test_endpoint("GET", f"{BASE_URL}/api/v1/attendance/", headers=headers)
@@ -88,6 +92,329 @@ def test_api_endpoints(headers):
     # Test notifications
     test_endpoint("GET", f"{BASE_URL}/api/v1/notifications/", headers=headers)
 
+# List endpoints whose query count must not depend on page size
+QUERY_COUNT_ENDPOINTS = [
+    "/api/v1/students/",
+    "/api/v1/teachers/",
+    "/api/v1/parents/",
+    "/api/v1/grades/",
+    "/api/v1/attendance/sessions",
+    "/api/v1/attendance/records",
+    "/api/v1/fees/structures",
+    "/api/v1/fees/invoices",
+    "/api/v1/payments/history",
+    "/api/v1/blog/",
+    "/api/v1/search/students/advanced",
+    "/api/v1/search/grades/advanced",
+    "/api/v1/search/attendance/advanced",
+]
+
+# More than the small page, so the two page sizes load a different number of posts
+QUERY_COUNT_BLOG_POSTS = 12
+
+def test_query_counts(headers):
+    """
+    Detect N+1 lazy loads: each list endpoint must run the same number of
+    queries at size=10 and size=100. Needs the server started with
+    QUERY_COUNT_HEADER=true; returns the endpoints that failed.
+    """
+    print("\n🔎 Testing query counts against page size...")
+    # The blog listing is served from the response cache, where a hit runs no
+    # queries. Searching a word unique to this run misses the cache, and a few
+    # posts carrying that word give both pages rows to load.
+    word = f"querycount{int(time.time())}"
+    posts = []
+    for i in range(QUERY_COUNT_BLOG_POSTS):
+        post = {"title": f"Query count {word}", "slug": f"{word}-{i}", "content": f"<p>{word}</p>",
+                "category": "NEWS", "status": "PUBLISHED"}
+        created = requests.post(f"{BASE_URL}/api/v1/blog/", json=post, headers=headers)
+        if created.status_code == 201:
+            posts.append(created.json()["id"])
+    params = {"/api/v1/blog/": {"search": word}}
+
+    failures = []
+    try:
+        for path in QUERY_COUNT_ENDPOINTS:
+            counts = []
+            for size in (10, 100):
+                response = requests.get(f"{BASE_URL}{path}", params={**params.get(path, {}), "size": size}, headers=headers)
+                counts.append(response.headers.get("X-Query-Count"))
+            if None in counts:
+                print("⚠️  X-Query-Count header missing - start the server with QUERY_COUNT_HEADER=true")
+                return failures
+            small, large = int(counts[0]), int(counts[1])
+            if large > small:
+                print(f"❌ {path} - {small} queries at size=10, {large} at size=100")
+                failures.append(path)
+            else:
+                print(f"✅ {path} - {large} queries at size=100")
+    finally:
+        for post_id in posts:
+            requests.delete(f"{BASE_URL}/api/v1/blog/{post_id}", headers=headers)
+    return failures
+
+def test_bulk_report_cards(headers):
+    """Start a bulk report card job for grade level 1, poll it and download the ZIP"""
+    print("\n📄 Testing bulk report cards...")
+    response = requests.post(
+        f"{BASE_URL}/api/v1/reports/report-cards/bulk", json={"grade_level_id": 1}, headers=headers
+    )
+    if response.status_code == 404:
+        print("⚠️  No active students in grade level 1 - skipped")
+        return True
+    if response.status_code != 202:
+        print(f"❌ Bulk report cards - Expected: 202, Got: {response.status_code}")
+        return False
+    job = response.json()
+    
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        progress = requests.get(f"{BASE_URL}{job['status_url']}", headers=headers).json()
+        print(f"   {progress['status']}: {progress['completed']}/{progress['total']}")
+        if progress["status"] in ("completed", "failed"):
+            break
+        time.sleep(1)
+    
+    download = requests.get(f"{BASE_URL}{job['download_url']}", headers=headers)
+    if download.status_code != 200:
+        print(f"❌ Bulk report card download - Status: {download.status_code}")
+        return False
+    names = zipfile.ZipFile(io.BytesIO(download.content)).namelist()
+    print(f"✅ Bulk report cards - {len(names)} PDFs in {len(download.content):,} bytes")
+    return len(names) == progress["completed"]
+
+def test_report_card_etag(headers):
+    """A repeated report card download with If-None-Match gets 304 Not Modified"""
+    print("\n📄 Testing report card ETag...")
+    response = requests.get(f"{BASE_URL}/api/v1/reports/student/1/report-card", headers=headers)
+    if response.status_code == 404:
+        print("⚠️  No student 1 - skipped")
+        return True
+    etag = response.headers.get("ETag")
+    if response.status_code != 200 or not etag:
+        print(f"❌ Report card - Status: {response.status_code}, ETag: {etag}")
+        return False
+    revalidated = requests.get(
+        f"{BASE_URL}/api/v1/reports/student/1/report-card", headers={**headers, "If-None-Match": etag}
+    )
+    if revalidated.status_code != 304:
+        print(f"❌ Report card revalidation - Expected: 304, Got: {revalidated.status_code}")
+        return False
+    print("✅ Report card - ETag revalidated with 304")
+    return True
+
+def test_attendance_stats(headers):
+    """Attendance stats return today/this week/this term windows that nest"""
+    print("\n📅 Testing windowed attendance stats...")
+    response = requests.get(f"{BASE_URL}/api/v1/dashboard/attendance-stats", headers=headers)
+    if response.status_code != 200:
+        print(f"❌ Attendance stats - Expected: 200, Got: {response.status_code}")
+        return False
+    stats = response.json()
+    windows = stats.get("windows", {})
+    if "today" not in windows or "this_week" not in windows or stats["scope"] not in windows:
+        print(f"❌ Attendance stats - Missing windows: {list(windows)}")
+        return False
+    if windows["today"]["total_records"] > windows["this_week"]["total_records"]:
+        print("❌ Attendance stats - today has more records than this week")
+        return False
+    if not 0 <= stats["attendance_rate"] <= 100:
+        print(f"❌ Attendance stats - Rate out of range: {stats['attendance_rate']}")
+        return False
+    counts = ", ".join(f"{name}: {window['total_records']}" for name, window in windows.items())
+    print(f"✅ Attendance stats - records {counts}")
+    return True
+
+def test_grade_import(headers):
+    """A CSV import reports bad rows by row number instead of failing the upload"""
+    print("\n📝 Testing grade import...")
+    upload = b"admission_number,assessment_id,score\nNO-SUCH-STUDENT,1,50\nNO-SUCH-STUDENT-2,1,abc\n"
+    response = requests.post(
+        f"{BASE_URL}/api/v1/grades/import",
+        files={"file": ("grades.csv", upload, "text/csv")},
+        headers=headers
+    )
+    if response.status_code != 200:
+        print(f"❌ Grade import - Expected: 200, Got: {response.status_code}")
+        return False
+    result = response.json()
+    if result["failed"] != 2 or [error["row"] for error in result["errors"]] != [2, 3]:
+        print(f"❌ Grade import - Unexpected result: {result}")
+        return False
+    # A file that turns out not to be UTF-8 halfway through is rejected before any batch is written
+    upload = b"admission_number,assessment_id,score\n" + b"NO-SUCH-STUDENT,1,50\n" * 1500 + b"\xff\xfe,1,50\n"
+    response = requests.post(
+        f"{BASE_URL}/api/v1/grades/import",
+        files={"file": ("grades.csv", upload, "text/csv")},
+        headers=headers
+    )
+    if response.status_code != 400:
+        print(f"❌ Grade import - Bad encoding expected: 400, Got: {response.status_code}")
+        return False
+    print("✅ Grade import - row errors reported for rows 2 and 3, bad encoding rejected up front")
+    return True
+
+def test_blog_cache(headers):
+    """Blog listings revalidate with a 304 until a new post invalidates them"""
+    print("\n📰 Testing blog response cache...")
+    url = f"{BASE_URL}/api/v1/blog/"
+    response = requests.get(url)
+    etag = response.headers.get("ETag")
+    if response.status_code != 200 or not etag or "stale-while-revalidate" not in response.headers.get("Cache-Control", ""):
+        print(f"❌ Blog cache - Missing cache headers: {dict(response.headers)}")
+        return False
+    revalidated = requests.get(url, headers={"If-None-Match": etag})
+    if revalidated.status_code != 304:
+        print(f"❌ Blog cache - Revalidation expected 304, got {revalidated.status_code}")
+        return False
+
+    slug = f"cache-test-{int(time.time())}"
+    post = {"title": "Cache test", "slug": slug, "content": "Cache test", "category": "NEWS", "status": "PUBLISHED"}
+    created = requests.post(url, json=post, headers=headers)
+    if created.status_code != 201:
+        print(f"❌ Blog cache - Creating a post failed: {created.status_code}")
+        return False
+    try:
+        changed = requests.get(url, headers={"If-None-Match": etag})
+        if changed.status_code != 200 or changed.headers.get("ETag") == etag:
+            print(f"❌ Blog cache - Listing not invalidated by a new post: {changed.status_code}")
+            return False
+
+        # Cached post reads still count up, and the count does not break revalidation
+        reads = [requests.get(f"{url}{slug}") for _ in range(3)]
+        views = [read.json()["view_count"] for read in reads]
+        if views != sorted(set(views)) or len({read.headers.get("ETag") for read in reads}) != 1:
+            print(f"❌ Blog cache - Cached post views {views}, ETags {[read.headers.get('ETag') for read in reads]}")
+            return False
+        revalidated = requests.get(f"{url}{slug}", headers={"If-None-Match": reads[-1].headers["ETag"]})
+        if revalidated.status_code != 304:
+            print(f"❌ Blog cache - Post revalidation expected 304, got {revalidated.status_code}")
+            return False
+    finally:
+        requests.delete(f"{url}{created.json()['id']}", headers=headers)
+    print(f"✅ Blog cache - 304 on revalidation, fresh listing after a new post, cached post views {views}")
+    return True
+
+def test_blog_search(headers):
+    """Blog search finds a new post by a word prefix and highlights the match"""
+    print("\n🔎 Testing blog full-text search...")
+    url = f"{BASE_URL}/api/v1/blog/"
+    word = f"searchtest{int(time.time())}"
+    post = {"title": f"Full text {word}", "slug": word, "content": "Search test", "category": "NEWS", "status": "PUBLISHED"}
+    created = requests.post(url, json=post, headers=headers)
+    if created.status_code != 201:
+        print(f"❌ Blog search - Creating a post failed: {created.status_code}")
+        return False
+    try:
+        results = requests.get(url, params={"search": word[:-3]}).json()
+        slugs = [result["slug"] for result in results["data"]]
+        if word not in slugs:
+            print(f"❌ Blog search - New post not found by prefix: {slugs}")
+            return False
+        snippet = results["data"][slugs.index(word)].get("snippet") or ""
+        if "<mark>" not in snippet:
+            print(f"❌ Blog search - No highlighted snippet: {snippet!r}")
+            return False
+    finally:
+        requests.delete(f"{url}{created.json()['id']}", headers=headers)
+    print(f"✅ Blog search - found by prefix with snippet {snippet!r}")
+    return True
+
+def test_people_search(headers):
+    """Global search finds a new teacher by a misspelt surname"""
+    print("\n🧑‍🏫 Testing people search...")
+    stamp = int(time.time())
+    user = requests.post(f"{BASE_URL}/admin/users/create", data={
+        "username": f"peoplesearch{stamp}", "email": f"peoplesearch{stamp}@example.com",
+        "first_name": "Tabitha", "last_name": "Nyamweya", "password": "people-search-123", "role": "TEACHER"
+    }, headers=headers)
+    if user.status_code != 200:
+        print(f"❌ People search - Creating a user failed: {user.status_code}")
+        return False
+    user_id = user.json()["user_id"]
+    try:
+        teacher = requests.post(f"{BASE_URL}/api/v1/teachers/", json={
+            "user_id": user_id, "employee_id": f"PS{stamp}"[:20], "specialization": "Geography"
+        }, headers=headers)
+        if teacher.status_code != 200:
+            print(f"❌ People search - Creating a teacher failed: {teacher.status_code}")
+            return False
+        try:
+            results = requests.get(
+                f"{BASE_URL}/api/v1/search/global", params={"q": "tabitha nyamwyea"}, headers=headers
+            ).json()["results"]
+            ids = [result["id"] for result in results["teachers"]]
+            if teacher.json()["id"] not in ids:
+                print(f"❌ People search - New teacher not found by a misspelt name: {results['teachers']}")
+                return False
+        finally:
+            requests.delete(f"{BASE_URL}/api/v1/teachers/{teacher.json()['id']}", headers=headers)
+    finally:
+        requests.post(f"{BASE_URL}/admin/users/{user_id}/delete", headers=headers)
+    print("✅ People search - found 'Tabitha Nyamweya' searching 'tabitha nyamwyea'")
+    return True
+
+def test_global_search(headers):
+    """Global search reports how long each entity took and nothing timed out on a small database"""
+    print("\n🌐 Testing global search fan-out...")
+    response = requests.get(f"{BASE_URL}/api/v1/search/global", params={"q": "student"}, headers=headers)
+    if response.status_code != 200:
+        print(f"❌ Global search - Expected: 200, Got: {response.status_code}")
+        return False
+    body = response.json()
+    # Every entity an admin may see
+    expected = {"students", "teachers", "parents", "grades", "blog_posts"}
+    if set(body["timings_ms"]) != expected or body["timed_out"] or body["failed"]:
+        print(f"❌ Global search - Unexpected timings: {body['timings_ms']}, timed out {body['timed_out']}, failed {body['failed']}")
+        return False
+    timings = ", ".join(f"{entity}: {ms}ms" for entity, ms in body["timings_ms"].items())
+    print(f"✅ Global search - {timings}")
+    return True
+
+def test_search_suggestions(headers):
+    """A new teacher shows up in the in-memory suggestions within a few refreshes, and leaves with them"""
+    print("\n💡 Testing search suggestions...")
+    stamp = int(time.time())
+    user = requests.post(f"{BASE_URL}/admin/users/create", data={
+        "username": f"suggestions{stamp}", "email": f"suggestions{stamp}@example.com",
+        "first_name": "Zawadi", "last_name": "Chelimo", "password": "suggestions-123", "role": "TEACHER"
+    }, headers=headers)
+    if user.status_code != 200:
+        print(f"❌ Search suggestions - Creating a user failed: {user.status_code}")
+        return False
+    user_id = user.json()["user_id"]
+
+    def suggested(teacher_id, expected=True):
+        """Poll until the teacher is (or is no longer) suggested; the indexes refresh in the background"""
+        for _ in range(20):
+            suggestions = requests.get(
+                f"{BASE_URL}/api/v1/search/suggestions", params={"q": "chelimo za", "entity_type": "teachers"}, headers=headers
+            ).json()["suggestions"]
+            if (teacher_id in [suggestion["id"] for suggestion in suggestions]) == expected:
+                return True
+            time.sleep(0.5)
+        return False
+
+    try:
+        teacher = requests.post(f"{BASE_URL}/api/v1/teachers/", json={
+            "user_id": user_id, "employee_id": f"SG{stamp}"[:20], "specialization": "Music"
+        }, headers=headers)
+        if teacher.status_code != 200:
+            print(f"❌ Search suggestions - Creating a teacher failed: {teacher.status_code}")
+            return False
+        teacher_id = teacher.json()["id"]
+        if not suggested(teacher_id):
+            print("❌ Search suggestions - New teacher never suggested for 'chelimo za'")
+            return False
+        requests.delete(f"{BASE_URL}/api/v1/teachers/{teacher_id}", headers=headers)
+    finally:
+        requests.post(f"{BASE_URL}/admin/users/{user_id}/delete", headers=headers)
+    if not suggested(teacher_id, expected=False):
+        print("❌ Search suggestions - Deleted teacher still suggested")
+        return False
+    print("✅ Search suggestions - new teacher suggested for 'chelimo za', dropped once deleted")
+    return True
+
 def test_frontend():
     """Test frontend accessibility"""
     print("\n🎨 Testing Frontend...")
@@ -112,8 +439,14 @@ def test_system_health():
         print(f"   System Status: {health_data.get('status', 'unknown')}")
         print(f"   Uptime: {health_data.get('uptime_seconds', 0):.2f} seconds")
     
-    # Test metrics
-    test_endpoint("GET", f"{BASE_URL}/metrics")
+    # Test metrics (Prometheus text, labelled by route template)
+    response = test_endpoint("GET", f"{BASE_URL}/metrics")
+    if response:
+        if 'http_request_duration_seconds_bucket{' in response.text and 'route="/health"' in response.text:
+            print("   ✅ Per-route latency histograms exported")
+        else:
+            print("   ❌ Per-route latency histograms missing from /metrics")
+    test_endpoint("GET", f"{BASE_URL}/metrics/summary")
 
 def main():
     """Run all tests"""
@@ -133,6 +466,32 @@ def main():
         # Test API endpoints
         test_api_endpoints(headers)
         
+        # Test for N+1 queries in list endpoints
+        query_count_failures = test_query_counts(headers)
+        if query_count_failures:
+            print(f"\n❌ Query count grows with page size: {', '.join(query_count_failures)}")
+            sys.exit(1)
+        
+        # Test bulk report card generation
+        if not test_bulk_report_cards(headers):
+            sys.exit(1)
+        if not test_report_card_etag(headers):
+            sys.exit(1)
+        if not test_grade_import(headers):
+            sys.exit(1)
+        if not test_attendance_stats(headers):
+            sys.exit(1)
+        if not test_blog_cache(headers):
+            sys.exit(1)
+        if not test_blog_search(headers):
+            sys.exit(1)
+        if not test_people_search(headers):
+            sys.exit(1)
+        if not test_global_search(headers):
+            sys.exit(1)
+        if not test_search_suggestions(headers):
+            sys.exit(1)
+        
         print("\n✅ All tests completed!")
         print("\n🎯 System Status Summary:")
         print("   - Frontend: ✅ Serving correctly")